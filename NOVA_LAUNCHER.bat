@@ -27,7 +27,7 @@ start "NOVA Backend" cmd /k ^
 .\venv\Scripts\activate && ^
 :backend_loop ^
 echo [Backend] Starting... >> backend.log && ^
-uvicorn app:app --host 127.0.0.1 --port 9001 --reload >> backend.log 2>&1 && ^
+uvicorn app:app --host 127.0.0.1 --port 9001 --reload --reload-include "*.py" --reload-exclude "workspace/*" --reload-exclude "integrated/*" --reload-exclude "backups/*" --reload-exclude "benchmarks/*" >> backend.log 2>&1 && ^
 echo [Backend] CRASHED! Restarting in 3 sec... >> backend.log && ^
 timeout /t 3 >nul && ^
 goto backend_loop"
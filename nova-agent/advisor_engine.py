@@ -1,36 +1,27 @@
 # advisor_engine.py
 from pathlib import Path
-import ast
 import json
 from typing import List, Dict, Any, Optional
 
+from import_index import project_imports, refresh, imports_from
+from dependency_resolver import find_missing
+from perf_analyzer import rank_suggestions
+from profiling import latest_hotspots
+
 
 # ---------- 1. BASIC IMPORT SCANNER ----------
 
 def scan_imports(project_root: Path) -> List[str]:
     """
-    Scan all .py files under project_root and collect top-level imports.
+    Collect top-level imports of all .py files under project_root.
     This is a simple static analyzer (no execution).
+
+    Backed by a persistent per-file index (see import_index.py): only files
+    whose mtime/size changed since the last call are read and re-parsed.
     """
-    imports = set()
     if not project_root.exists():
         return []
-
-    for py_file in project_root.rglob("*.py"):
-        try:
-            text = py_file.read_text(encoding="utf-8")
-            tree = ast.parse(text)
-        except Exception:
-            continue
-
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for n in node.names:
-                    imports.add(n.name.split(".")[0])
-            elif isinstance(node, ast.ImportFrom):
-                if node.module:
-                    imports.add(node.module.split(".")[0])
-    return sorted(imports)
+    return project_imports(project_root)
 
 
 # ---------- 2. INTENT / CATEGORY DETECTION (VERY SIMPLE) ----------
@@ -52,7 +43,7 @@ def classify_query(query: str) -> str:
         return "dependencies"
 
     # performance / speed
-    if any(w in q for w in ["fast", "slow", "optimize", "performance", "lag", "heavy"]):
+    if any(w in q for w in ["fast", "slow", "optimize", "performance", "lag", "heavy", "hotspot", "bottleneck"]):
         return "performance"
 
     # safety / backup / version
@@ -150,15 +141,30 @@ def _suggest_generic_beginner(project_imports: List[str], env_meta: Optional[Dic
     return suggestions
 
 
-def _suggest_dependency_related(project_imports: List[str], env_meta: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _local_modules(project_files: Dict[str, Dict[str, Any]]) -> set:
+    """Top-level module/package names defined by the project itself."""
+    out = set()
+    for rel in project_files:
+        head = rel.split("/", 1)[0]
+        out.add(head[:-3] if head.endswith(".py") else head)
+    return out
+
+
+def _suggest_dependency_related(project_imports: List[str],
+                                env_meta: Optional[Dict[str, Any]],
+                                local_modules: Optional[set] = None) -> List[Dict[str, Any]]:
     suggestions = []
 
-    installed = set()
+    # distributions from the captured env if we have it, else the live one
+    installed = None
     if env_meta and env_meta.get("pip_packages"):
-        installed = set(env_meta["pip_packages"].keys())
+        installed = env_meta["pip_packages"].keys()
 
-    # missing = imports that are not in installed list (best-effort; may not be perfect)
-    missing = [imp for imp in project_imports if imp not in installed and imp not in ("sys", "os", "pathlib", "json", "typing", "subprocess")]
+    # import name -> distribution resolution (stdlib, top_level.txt, aliases
+    # like yaml -> PyYAML); see dependency_resolver.py
+    unresolved = find_missing(project_imports, installed=installed, local_modules=local_modules)
+    missing = [m["module"] for m in unresolved]
+    to_install = sorted({m["install"] for m in unresolved})
 
     if missing:
         suggestions.append({
@@ -169,11 +175,13 @@ def _suggest_dependency_related(project_imports: List[str], env_meta: Optional[D
             "impact": "high",
             "auto_applicable": True,
             "explanation": (
-                f"These imports appear in your code but are not in your current environment: {', '.join(missing)}. "
+                f"These imports appear in your code but are not in your current environment: {', '.join(missing)} "
+                f"(pip packages: {', '.join(to_install)}). "
                 "We can auto-create a sandbox venv for the request and install only these packages there, "
                 "instead of polluting your global system."
             ),
-            "missing_modules": missing
+            "missing_modules": missing,
+            "install_packages": to_install,
         })
     else:
         suggestions.append({
@@ -192,8 +200,136 @@ def _suggest_dependency_related(project_imports: List[str], env_meta: Optional[D
     return suggestions
 
 
-def _suggest_performance(env_meta: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+# libraries that take seconds to import; worth loading on first use
+HEAVY_MODULES = {
+    "torch", "tensorflow", "transformers", "sentence_transformers",
+    "pandas", "scipy", "sklearn", "matplotlib", "cv2", "keras",
+}
+
+
+def _suggest_from_facts(project_files: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Project-specific performance hints from the per-module facts the import
+    index already holds (no extra scan).
+    """
     suggestions = []
+
+    heavy = []
+    for rel, f in sorted(project_files.items()):
+        for mod, where in (f.get("import_sites") or {}).items():
+            if mod in HEAVY_MODULES and where == "top":
+                heavy.append({"file": rel, "module": mod})
+    if heavy:
+        mods = sorted({h["module"] for h in heavy})
+        suggestions.append({
+            "id": "perf_lazy_heavy_imports",
+            "title": "Import heavy libraries lazily",
+            "category": "performance",
+            "difficulty": "easy",
+            "impact": "high",
+            "auto_applicable": False,
+            "explanation": (
+                f"{len(heavy)} module(s) import {', '.join(mods)} at top level. "
+                "These take seconds to load, so every start (and every --reload) pays for them. "
+                "Move the import inside the function that needs it, or load it in a background task."
+            ),
+            "locations": heavy[:20],
+        })
+
+    big = sorted(
+        ({"file": rel, "lines": f.get("lines", 0)} for rel, f in project_files.items()
+         if f.get("lines", 0) > 800),
+        key=lambda x: x["lines"], reverse=True,
+    )
+    if big:
+        suggestions.append({
+            "id": "perf_split_large_modules",
+            "title": "Split very large modules",
+            "category": "performance",
+            "difficulty": "medium",
+            "impact": "medium",
+            "auto_applicable": False,
+            "explanation": (
+                f"{len(big)} file(s) are over 800 lines (largest: {big[0]['file']}, {big[0]['lines']} lines). "
+                "Big modules are slower to import and re-check, and harder for the builder to patch safely."
+            ),
+            "locations": big[:10],
+        })
+
+    long_funcs = sorted(
+        ({"file": rel, "line": fn["line"], "function": fn["name"], "lines": fn["lines"]}
+         for rel, f in project_files.items() for fn in f.get("functions", [])
+         if fn["lines"] > 120),
+        key=lambda x: x["lines"], reverse=True,
+    )
+    if long_funcs:
+        top = long_funcs[0]
+        suggestions.append({
+            "id": "perf_long_functions",
+            "title": "Break up very long functions",
+            "category": "performance",
+            "difficulty": "medium",
+            "impact": "medium",
+            "auto_applicable": False,
+            "explanation": (
+                f"{len(long_funcs)} function(s) are longer than 120 lines "
+                f"(longest: {top['function']} in {top['file']}, {top['lines']} lines). "
+                "Smaller functions are easier to profile, cache and optimise one at a time."
+            ),
+            "locations": long_funcs[:10],
+        })
+
+    return suggestions
+
+
+def _suggest_hotspots(project_files: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Static performance hotspots (string building in loops, per-iteration
+    subprocesses, list membership in loops, blocking calls in async code,
+    repeated JSON loads), most costly first. The findings are computed by
+    perf_analyzer while the import index parses each file, so they are
+    cached by content hash along with the other facts.
+    """
+    return rank_suggestions(project_files)
+
+
+def _suggest_measured() -> List[Dict[str, Any]]:
+    """
+    Hotspots measured by recent profiled runs (tools run_python_file /
+    /run_tests with profile=true). Nothing is suggested until something
+    has been profiled.
+    """
+    hot = latest_hotspots()
+    if not hot:
+        return []
+    top = hot[0]
+    return [{
+        "id": "perf_measured_hotspots",
+        "title": "Optimise the functions that profiling shows are hot",
+        "category": "performance",
+        "difficulty": "medium",
+        "impact": "high",
+        "auto_applicable": False,
+        "explanation": (
+            f"In recent profiled runs, {top['label']} accounts for {top['self_pct']}% of samples on its own "
+            f"({top['total_pct']}% including callees). "
+            "These numbers are measured, not guessed: start with the functions listed here, "
+            "and compare the flamegraph from /profiles/<id>/collapsed before and after a change."
+        ),
+        "locations": [
+            {"file": h["file"], "line": h["line"], "function": h["function"],
+             "self_pct": h["self_pct"], "total_pct": h["total_pct"], "runs": h["runs"]}
+            for h in hot
+        ],
+    }]
+
+
+def _suggest_performance(env_meta: Optional[Dict[str, Any]],
+                         project_files: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    suggestions = _suggest_measured()
+    if project_files:
+        suggestions.extend(_suggest_hotspots(project_files))
+        suggestions.extend(_suggest_from_facts(project_files))
     suggestions.append({
         "id": "perf_logs",
         "title": "Add simple timing logs around heavy operations",
@@ -263,7 +399,10 @@ def generate_advice(query: str,
     - env_meta: optional environment metadata dict (from environment_<id>.meta.json)
     """
     intent = classify_query(query)
-    imports = scan_imports(project_root)
+    # one index refresh gives both the import list and per-module facts
+    project_files = refresh(project_root)["files"] if project_root.exists() else {}
+    imports = imports_from(project_files)
+    local_modules = _local_modules(project_files)
 
     suggestions: List[Dict[str, Any]] = []
 
@@ -271,15 +410,15 @@ def generate_advice(query: str,
     suggestions.extend(_suggest_generic_beginner(imports, env_meta))
 
     if intent == "dependencies":
-        suggestions.extend(_suggest_dependency_related(imports, env_meta))
+        suggestions.extend(_suggest_dependency_related(imports, env_meta, local_modules))
     elif intent == "performance":
-        suggestions.extend(_suggest_performance(env_meta))
+        suggestions.extend(_suggest_performance(env_meta, project_files))
     elif intent == "safety":
         suggestions.extend(_suggest_safety(env_meta))
     elif intent == "suggest_features":
         # for feature-suggestion queries, mix all categories a bit
-        suggestions.extend(_suggest_dependency_related(imports, env_meta))
-        suggestions.extend(_suggest_performance(env_meta))
+        suggestions.extend(_suggest_dependency_related(imports, env_meta, local_modules))
+        suggestions.extend(_suggest_performance(env_meta, project_files))
         suggestions.extend(_suggest_safety(env_meta))
     # intent == "generic" -> only generic + maybe later we add more
 
@@ -0,0 +1,211 @@
+# analysis_engine.py
+import os
+import ast
+import hashlib
+import threading
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from perf_analyzer import find_hotspots
+
+# below this many files a process pool costs more than it saves
+PARALLEL_THRESHOLD = int(os.getenv("NOVA_ANALYSIS_PARALLEL_MIN", "64"))
+MAX_WORKERS = int(os.getenv("NOVA_ANALYSIS_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+TOP_CALLS = 15
+# workers are started fresh, not forked: forking the server would copy its
+# threads' locks (executor pools, SQLite, tracing) mid-use into the child
+START_METHOD = os.getenv("NOVA_ANALYSIS_START_METHOD", "spawn")
+
+
+# ---------- fact collector (single pass) ----------
+
+class _FactCollector(ast.NodeVisitor):
+    """
+    One traversal that records:
+      - imports, tagged by where they happen (top-level / conditional / lazy)
+      - functions (line, length, async) and classes (line, methods)
+      - call counts by callee name
+    Performance hotspots come from perf_analyzer on the same tree.
+    """
+
+    def __init__(self):
+        self.imports: Dict[str, str] = {}
+        self.functions: List[Dict[str, Any]] = []
+        self.classes: List[Dict[str, Any]] = []
+        self.calls: Counter = Counter()
+        self._scope: List[str] = []      # "def" / "class" / "cond"
+
+    # -- imports --
+    def _where(self) -> str:
+        if "def" in self._scope:
+            return "lazy"
+        if "cond" in self._scope:
+            return "conditional"
+        return "top"
+
+    def _add_import(self, name: str):
+        where = self._where()
+        # keep the "earliest" kind: top beats conditional beats lazy
+        rank = {"top": 0, "conditional": 1, "lazy": 2}
+        prev = self.imports.get(name)
+        if prev is None or rank[where] < rank[prev]:
+            self.imports[name] = where
+
+    def visit_Import(self, node):
+        for n in node.names:
+            self._add_import(n.name.split(".")[0])
+
+    def visit_ImportFrom(self, node):
+        if node.module and not node.level:
+            self._add_import(node.module.split(".")[0])
+
+    # -- scopes --
+    def _visit_def(self, node, is_async: bool):
+        end = getattr(node, "end_lineno", node.lineno) or node.lineno
+        self.functions.append({
+            "name": node.name,
+            "line": node.lineno,
+            "lines": end - node.lineno + 1,
+            "async": is_async,
+            "nested": "def" in self._scope,
+        })
+        self._scope.append("def")
+        self.generic_visit(node)
+        self._scope.pop()
+
+    def visit_FunctionDef(self, node):
+        self._visit_def(node, False)
+
+    def visit_AsyncFunctionDef(self, node):
+        self._visit_def(node, True)
+
+    def visit_ClassDef(self, node):
+        methods = sum(isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef)) for n in node.body)
+        self.classes.append({"name": node.name, "line": node.lineno, "methods": methods})
+        self._scope.append("class")
+        self.generic_visit(node)
+        self._scope.pop()
+
+    def _visit_cond(self, node):
+        self._scope.append("cond")
+        self.generic_visit(node)
+        self._scope.pop()
+
+    visit_If = _visit_cond
+    visit_Try = _visit_cond
+    visit_With = _visit_cond
+
+    # -- calls --
+    def visit_Call(self, node):
+        f = node.func
+        if isinstance(f, ast.Name):
+            self.calls[f.id] += 1
+        elif isinstance(f, ast.Attribute):
+            base = f.value
+            if isinstance(base, ast.Name):
+                self.calls[f"{base.id}.{f.attr}"] += 1
+            else:
+                self.calls[f".{f.attr}"] += 1
+        self.generic_visit(node)
+
+
+def analyze_source(data: bytes, tree: Optional[ast.Module] = None) -> Dict[str, Any]:
+    """Per-module facts from source bytes (parsed once)."""
+    facts: Dict[str, Any] = {
+        "size": len(data),
+        "lines": data.count(b"\n") + (1 if data and not data.endswith(b"\n") else 0),
+    }
+    if tree is None:
+        try:
+            tree = ast.parse(data)
+        except (SyntaxError, ValueError):
+            facts.update({"imports": [], "error": "syntax"})
+            return facts
+
+    c = _FactCollector()
+    c.visit(tree)
+    facts.update({
+        "imports": sorted(c.imports),
+        "import_sites": c.imports,
+        "functions": c.functions,
+        "classes": c.classes,
+        "call_count": sum(c.calls.values()),
+        "top_calls": c.calls.most_common(TOP_CALLS),
+        "hotspots": find_hotspots(tree),
+    })
+    return facts
+
+
+# ---------- parallel driver ----------
+
+def _analyze_shard(items: List[Tuple[str, Optional[str]]]) -> List[Tuple[str, str, Optional[Dict[str, Any]]]]:
+    """
+    Worker entry: for each (path, known_sha256) read + hash the file and,
+    if the content changed, analyze it. Returns (path, sha256, facts|None).
+    """
+    out = []
+    for path, known in items:
+        try:
+            data = open(path, "rb").read()
+        except OSError:
+            continue
+        digest = hashlib.sha256(data).hexdigest()
+        out.append((path, digest, None if digest == known else analyze_source(data)))
+    return out
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    # one pool for the process lifetime: spawning workers is the expensive part
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS,
+                                        mp_context=multiprocessing.get_context(START_METHOD))
+        return _pool
+
+
+def analyze_files(items: List[Tuple[str, Optional[str]]]) -> List[Tuple[str, str, Optional[Dict[str, Any]]]]:
+    """
+    Analyze many files. Small batches run inline; large ones are sharded
+    across a process pool (one shard per worker-ish, so pickling overhead
+    stays per-shard rather than per-file).
+    """
+    if len(items) < PARALLEL_THRESHOLD or MAX_WORKERS <= 1:
+        return _analyze_shard(items)
+
+    # largest files first, dealt round-robin, so shards finish together
+    items = sorted(items, key=lambda it: _size(it[0]), reverse=True)
+    n = min(MAX_WORKERS * 4, len(items))
+    shards = [items[i::n] for i in range(n)]
+
+    try:
+        results = []
+        for part in _get_pool().map(_analyze_shard, shards):
+            results.extend(part)
+        return results
+    except Exception:
+        # broken pool (e.g. a worker was killed): fall back to inline
+        shutdown()
+        return _analyze_shard(items)
+
+
+def _size(path: str) -> int:
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
@@ -1,24 +1,105 @@
+from contextlib import asynccontextmanager, contextmanager
 from fastapi import FastAPI, HTTPException, Request, Body
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
-import uuid, os, json, shutil
+import uuid, json
 from pathlib import Path
 from datetime import datetime
 
 from dotenv import load_dotenv
 load_dotenv()
-from brain.tools_engine import list_tools, run_tool
+from brain.tools_engine import list_tools, run_tool, run_tools_batch, resolve_tool_path, tool_pool
+from range_reader import iter_range
 
 from backup_manager import create_backup, list_backups, restore_backup
 from env_manager import capture_environment
+from workspace_manager import provision_workspace, write_text, detach_tree, merge_workspace, MergeConflict
+from patch_engine import apply_batch
+import workspace_lifecycle as lifecycle
+import job_queue
+import profiling
+import deletion_service
+import request_registry
+import chat_store
+from file_locks import request_lock, integrated_lock, LockTimeout
+import tracing
+import startup
+import executors
+from executors import offload
+from tracing import span
 from advisor_engine import generate_advice
 from brain.nlu_engine import detect_intent
+from brain import nlu_engine, llm_client
 from brain.permission_engine import check_internet_access
 from brain.llm_client import chat_with_builder
 from brain.builder_engine import run_builder_pipeline
+from brain import process_manager
+from brain import llm_diagnostics, llm_routing
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup.ensure_dirs(WORKSPACE, BACKUPS, BASE / "integrated")
+    # legacy JSON imports finish before the first request is served
+    startup.run_migration("request_registry", request_registry.migrate_legacy)
+    startup.run_migration("chat_sessions", chat_store.migrate_legacy)
+    # NLU model + LLM SDK clients load in the background; /ready reports when done
+    startup.add_task("nlu_model", nlu_engine.warmup)
+    startup.add_task("llm_clients", llm_client.warmup)
+    startup.begin()
+    # workspace TTL / quota janitor (background thread)
+    lifecycle.start_janitor()
+    # re-queue jobs that were queued/running when the server went down
+    job_queue.resume_pending()
+    # finish deletions interrupted by a restart
+    deletion_service.resume()
+    yield
+    job_queue.shutdown()
+    executors.shutdown()
+    process_manager.shutdown()
+    lifecycle.stop_janitor()
+
 
 # ❌ REMOVE THIS LINE IF YOU HAVE IT BELOW AGAIN
-app = FastAPI(title="Nova Builder-Agent (Starter)")
+app = FastAPI(title="Nova Builder-Agent (Starter)", lifespan=lifespan)
+
+
+@app.exception_handler(executors.PoolSaturated)
+async def pool_saturated(request: Request, exc: executors.PoolSaturated):
+    # an executor queue is full: shed load instead of piling up more waiting work
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    One trace per request: spans opened while handling it (intent, LLM
+    calls, backup, env capture, sandbox, merge, builder stages) are
+    collected under it, latency goes to the /metrics histograms, and the
+    slowest spans are echoed in a Server-Timing header.
+    """
+    t, token = tracing.start_trace(f"{request.method} {request.url.path}")
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Nova-Trace-Id"] = t.id
+        timing = tracing.server_timing(t)
+        if timing:
+            response.headers["Server-Timing"] = timing
+        return response
+    finally:
+        route = request.scope.get("route")
+        tracing.end_trace(t, token, status)
+        # route template, not the raw path, keeps label cardinality bounded
+        tracing.HTTP_DURATION.observe(
+            t.duration_ms / 1000.0,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status,
+        )
+
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,12 +114,8 @@ app.add_middleware(
 # -------------------------
 BASE = Path(__file__).resolve().parent
 WORKSPACE = BASE / "workspace"
-REQUESTS = BASE / "requests"
 BACKUPS = BASE / "backups"
-CHAT_DIR = BASE / "chat_sessions"
-
-for d in (WORKSPACE, REQUESTS, BACKUPS, CHAT_DIR):
-    d.mkdir(parents=True, exist_ok=True)
+# created in the lifespan (startup.ensure_dirs), not at import
 
 
 # -----------------------------------
@@ -65,13 +142,75 @@ class AIChange(BaseModel):
 class AIRequest(BaseModel):
     instruction: str             # high-level instruction
     changes: list[AIChange]      # list of file modifications from AI
+    background: bool = False     # true => return a job id, run in worker pool
 
 
 class BuilderRunRequest(BaseModel):
     instruction: str
     request_id: str | None = None  # allow re-using same build session later
+    background: bool = False       # true => return a job id, run in worker pool
+
+
+def _no_progress(stage: str, message: str = "", **info):
+    pass
+
+
+@contextmanager
+def _request_locked(request_id: str):
+    """
+    Hold the request's advisory lock (a file lock, so it also holds across
+    uvicorn workers): one prepare / apply_patch / run_tests / merge /
+    rollback at a time per request_id. 409 if it stays busy past
+    NOVA_REQUEST_LOCK_TIMEOUT_S.
+    """
+    lock = request_lock(request_id)
+    try:
+        lock.acquire()
+    except LockTimeout:
+        raise HTTPException(status_code=409, detail=f"request {request_id} is busy with another operation")
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+@contextmanager
+def _integrated_locked():
+    """Hold the integrated/ lock for a merge or restore; 409 if it stays busy."""
+    lock = integrated_lock()
+    try:
+        lock.acquire()
+    except LockTimeout:
+        raise HTTPException(status_code=409, detail="integrated/ is busy with another merge or restore")
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+def _enqueue(kind: str, params: dict, request_id: str | None = None):
+    """Submit a background job and answer 202 with where to follow it."""
+    try:
+        job = job_queue.submit(kind, params, request_id=request_id)
+    except job_queue.QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job["job_id"],
+            "kind": kind,
+            "request_id": request_id,
+            "status": job["status"],
+            "deduplicated": job["deduplicated"],
+            "poll": f"/jobs/{job['job_id']}",
+            "events": f"/jobs/{job['job_id']}/events",
+        },
+    )
+
 
 @app.post("/plan")
+@offload("io")
 def plan(req: PlanRequest):
     request_id = uuid.uuid4().hex[:8]
 
@@ -88,8 +227,14 @@ def plan(req: PlanRequest):
         "created": datetime.utcnow().isoformat(),
     }
 
-    with open(REQUESTS / f"{request_id}.plan.json", "w", encoding="utf-8") as f:
-        json.dump(plan_data, f, indent=2)
+    request_registry.record(
+        request_id, "plan",
+        status="planned",
+        kind="plan",
+        intent=plan_data["intent"],
+        path=req.path,
+        data={"plan": plan_data["plan"]},
+    )
 
     return plan_data
 
@@ -98,14 +243,38 @@ def plan(req: PlanRequest):
 # PREPARE WORKSPACE + BACKUP META
 # -----------------------------------
 @app.post("/prepare")
+@offload("io")
 def prepare(body: dict):
     request_id = body.get("request_id") or uuid.uuid4().hex[:8]
 
-    # create workspace for sandbox testing
+    if body.get("background"):
+        return _enqueue("prepare", {**body, "request_id": request_id}, request_id)
+    return _prepare(request_id, body)
+
+
+@job_queue.register("prepare")
+def _prepare_job(params: dict, progress):
+    return _prepare(params["request_id"], params, progress)
+
+
+def _prepare(request_id: str, body: dict, progress=_no_progress) -> dict:
+    with _request_locked(request_id):
+        return _prepare_locked(request_id, body, progress)
+
+
+def _prepare_locked(request_id: str, body: dict, progress) -> dict:
+    # create workspace for sandbox testing, seeded from integrated/
+    # (reflink where possible, so this is cheap even for big projects)
+    progress("workspace", "seeding workspace from integrated/")
     ws = WORKSPACE / request_id
-    ws.mkdir(parents=True, exist_ok=True)
+    provision = provision_workspace(
+        request_id,
+        mode=None if body.get("seed", True) else "none",
+    )
+    lifecycle.record_provision(request_id, provision)
 
     # create a real zip backup of the current integrated/ folder (safe)
+    progress("backup", "zipping integrated/")
     repo_root = BASE / "integrated"
     backup_meta = create_backup(
         request_id=request_id,
@@ -115,6 +284,7 @@ def prepare(body: dict):
     )
 
     # capture environment metadata (pip freeze, python version, node)
+    progress("environment", "capturing pip/python/node metadata")
     backup_dir = Path(backup_meta["zip_path"]).parent
     env_meta = capture_environment(request_id=request_id, dest_dir=backup_dir)
 
@@ -127,20 +297,19 @@ def prepare(body: dict):
         env_meta["requirements_pinned"] = str(req_path)
 
     # save a lightweight request record as well
-    req_record = {
-        "request_id": request_id,
-        "workspace": str(ws),
-        "backup": backup_meta,
-        "env_meta": env_meta,
-        "created": datetime.utcnow().isoformat(),
-    }
-    with open(REQUESTS / f"{request_id}.req.json", "w", encoding="utf-8") as f:
-        json.dump(req_record, f, indent=2)
+    request_registry.record(
+        request_id, "prepare",
+        status="prepared",
+        workspace=str(ws),
+        backup_id=backup_meta.get("backup_id"),
+        data={"provision": provision, "backup": backup_meta, "env_meta": env_meta},
+    )
 
     return {
         "request_id": request_id,
         "status": "prepared",
         "detail": "workspace & zip backup created",
+        "provision": provision,
         "backup": backup_meta,
         "env_meta": env_meta,
     }
@@ -150,6 +319,7 @@ def prepare(body: dict):
 # APPLY PATCH (WRITE CODE INTO WORKSPACE)
 # -----------------------------------
 @app.post("/apply_patch")
+@offload("io")
 def apply_patch(body: dict):
     request_id = body.get("request_id")
     if not request_id:
@@ -161,27 +331,70 @@ def apply_patch(body: dict):
 
     path = body.get("path")
     code = body.get("code", "")
-
-    full_path = ws / path
-    full_path.parent.mkdir(parents=True, exist_ok=True)
-
-    with open(full_path, "w", encoding="utf-8") as f:
-        f.write(code)
+    if not path:
+        raise HTTPException(status_code=400, detail="path required")
+
+    # same code path as the batch API so the workspace hash manifest stays
+    # in sync (writes are temp + replace, safe for hardlinked files)
+    with _request_locked(request_id):
+        res = apply_batch(request_id, [{"op": "write", "path": path, "code": code}])
+        if res["status"] != "applied":
+            raise HTTPException(status_code=400, detail=res["detail"])
+        lifecycle.touch(request_id, res["bytes_delta"], res["disk_bytes_delta"], res["files_delta"])
+        request_registry.record(request_id, "apply_patch", status="patched", info={"paths": [path]})
 
     return {
         "request_id": request_id,
         "status": "applied",
         "detail": f"file {path} written to workspace",
+        "workspace_hash": res["workspace_hash"],
     }
 
 
+@app.post("/apply_patch/batch")
+@offload("io")
+def apply_patch_batch(body: dict):
+    """
+    Apply many file operations in one call, all-or-nothing.
+
+    Body:
+    {
+      "request_id": "...",
+      "operations": [
+        {"op": "write", "path": "a.py", "code": "..."},
+        {"op": "diff", "path": "b.py", "diff": "@@ -1,2 +1,2 @@ ..."},
+        {"op": "delete", "path": "old.py"},
+        {"op": "rename", "path": "x.py", "to": "y.py"}
+      ]
+    }
+    """
+    request_id = body.get("request_id")
+    if not request_id:
+        raise HTTPException(status_code=400, detail="request_id required")
+
+    ws = WORKSPACE / request_id
+    if not ws.exists():
+        raise HTTPException(status_code=404, detail="workspace not found")
+
+    operations = body.get("operations") or []
+    if not isinstance(operations, list) or not operations:
+        raise HTTPException(status_code=400, detail="operations must be a non-empty list")
+
+    with _request_locked(request_id):
+        res = apply_batch(request_id, operations)
+        if res["status"] == "applied":
+            lifecycle.touch(request_id, res["bytes_delta"], res["disk_bytes_delta"], res["files_delta"])
+            request_registry.record(request_id, "apply_patch", status="patched",
+                                    info={"operations": len(operations)})
+    return res
+
+
 # -----------------------------------
 # RUN TESTS (SYNTAX CHECK)
 # -----------------------------------
 @app.post("/run_tests")
+@offload("subprocess")
 def run_tests(body: dict):
-    import subprocess
-
     request_id = body.get("request_id")
     if not request_id:
         raise HTTPException(status_code=400, detail="request_id required")
@@ -189,32 +402,67 @@ def run_tests(body: dict):
     ws = WORKSPACE / request_id
     if not ws.exists():
         raise HTTPException(status_code=404, detail="workspace not found")
+    lifecycle.touch(request_id)
+
+    profile = bool(body.get("profile"))
+    if body.get("background"):
+        return _enqueue("run_tests", {"request_id": request_id, "profile": profile}, request_id)
+    return _run_tests(request_id, profile=profile)
+
+
+@job_queue.register("run_tests")
+def _run_tests_job(params: dict, progress):
+    return _run_tests(params["request_id"], progress, params.get("profile", False))
 
-    script = ["python", str(BASE / "sandbox" / "run_tests.py"), str(ws)]
 
+def _run_tests(request_id: str, progress=_no_progress, profile: bool = False) -> dict:
+    with _request_locked(request_id):
+        return _run_tests_locked(request_id, progress, profile)
+
+
+def _run_tests_locked(request_id: str, progress, profile: bool) -> dict:
+    import subprocess
+
+    ws = WORKSPACE / request_id
+    script = ["python", str(BASE / "sandbox" / "run_tests.py"), str(ws)]
+    run = None
+    if profile:
+        run = profiling.profiled_command(BASE / "sandbox" / "run_tests.py", [str(ws)],
+                                         label=f"run_tests:{request_id}")
+        script = run["cmd"]
+
+    progress("tests", "running sandbox syntax check" + (" (profiled)" if profile else ""))
+    detach_tree(ws)
     try:
-        proc = subprocess.run(
-            script,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
+        with span("sandbox.run", request_id=request_id, profile=profile):
+            proc = subprocess.run(
+                script,
+                capture_output=True,
+                text=True,
+                timeout=30,
+            )
         ok = proc.returncode == 0
         output = proc.stdout + "\n" + proc.stderr
-        return {
+        res = {
             "request_id": request_id,
             "status": "passed" if ok else "failed",
             "detail": output,
         }
+        if run:
+            res["profile"] = profiling.finish(run["id"])
 
     except Exception as e:
-        return {"request_id": request_id, "status": "error", "detail": str(e)}
+        res = {"request_id": request_id, "status": "error", "detail": str(e)}
+
+    request_registry.record(request_id, "run_tests", status=f"tests_{res['status']}")
+    return res
 
 
 # -----------------------------------
 # MERGE (DEMO VERSION)
 # -----------------------------------
 @app.post("/merge")
+@offload("io")
 def merge(body: dict):
     request_id = body.get("request_id")
     if not request_id:
@@ -225,60 +473,141 @@ def merge(body: dict):
 
     if not ws.exists():
         raise HTTPException(status_code=404, detail="workspace not found")
+    lifecycle.touch(request_id)
 
     integrated.mkdir(parents=True, exist_ok=True)
 
-    for root, dirs, files in os.walk(ws):
-        for f in files:
-            src = Path(root) / f
-            rel = src.relative_to(ws)
-            dest = integrated / rel
-            dest.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(src, dest)
+    with _request_locked(request_id), _integrated_locked(), span("merge", request_id=request_id):
+        try:
+            res = merge_workspace(request_id, integrated)
+        except MergeConflict as e:
+            request_registry.record(request_id, "merge", status="merge_conflict",
+                                    info={"conflicts": e.conflicts})
+            raise HTTPException(status_code=409, detail={"message": str(e), "conflicts": e.conflicts})
+    request_registry.record(request_id, "merge", status="merged",
+                            info={"copied": len(res["copied"]), "deleted": len(res["deleted"])})
 
-    return {"request_id": request_id, "status": "merged", "detail": "workspace copied to integrated/"}
+    return {"request_id": request_id, "status": "merged", "detail": "workspace changes merged into integrated/", **res}
 
 
 # -----------------------------------
 # ROLLBACK
 # -----------------------------------
 @app.post("/rollback")
+@offload("io")
 def rollback(body: dict):
     request_id = body.get("request_id")
     if not request_id:
         raise HTTPException(status_code=400, detail="request_id required")
+    with _request_locked(request_id):
+        return _rollback(request_id)
+
 
+def _rollback(request_id: str) -> dict:
     backups = list_backups(request_id)
     if not backups:
         ws = WORKSPACE / request_id
+        deletion = None
         if ws.exists():
-            shutil.rmtree(ws)
+            deletion = deletion_service.schedule(ws, label=f"rollback:{request_id}")
+        lifecycle.forget(request_id)
+        request_registry.record(request_id, "rollback", status="rolled_back", info={"restored": False})
         return {
             "request_id": request_id,
             "status": "rolled_back",
             "detail": "no backup found; workspace removed",
+            "deletion": deletion,
         }
 
     backup_meta = backups[0]
-    restore_res = restore_backup(backup_meta, restore_to=str(BASE / "integrated"))
+    with _integrated_locked():
+        restore_res = restore_backup(backup_meta, restore_to=str(BASE / "integrated"))
 
     ws = WORKSPACE / request_id
+    deletion = None
     if ws.exists():
-        shutil.rmtree(ws)
+        deletion = deletion_service.schedule(ws, label=f"rollback:{request_id}")
+    lifecycle.forget(request_id)
+    request_registry.record(request_id, "rollback", status="rolled_back",
+                            backup_id=backup_meta.get("backup_id"),
+                            info={"restored": restore_res.get("status") == "ok"})
+
+    return {"request_id": request_id, "status": "restored", "detail": restore_res, "deletion": deletion}
 
-    return {"request_id": request_id, "status": "restored", "detail": restore_res}
+
+# -----------------------------------
+# REQUEST REGISTRY
+# -----------------------------------
+@app.get("/requests")
+@offload("io")
+def requests_list(status: str | None = None, kind: str | None = None,
+                  since: str | None = None, until: str | None = None,
+                  limit: int = 50, cursor: str | None = None):
+    """
+    Requests newest first, e.g. /requests?status=planned&limit=50.
+    since/until take an ISO date/time or epoch seconds; pass next_cursor
+    back as `cursor` for the next page.
+    """
+    try:
+        return request_registry.list_requests(status=status, kind=kind, since=since, until=until,
+                                              limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/requests/{request_id}")
+@offload("io")
+def requests_get(request_id: str):
+    rec = request_registry.get(request_id)
+    if rec is None:
+        raise HTTPException(status_code=404, detail="request not found")
+    return rec
+
+
+# -----------------------------------
+# WORKSPACE LIFECYCLE (TTL + QUOTA)
+# -----------------------------------
+@app.get("/workspaces")
+@offload("io")
+def workspaces_list():
+    """Workspaces with size and age, served from the lifecycle index."""
+    items = lifecycle.list_workspaces()
+    return {
+        "workspaces": items,
+        "total_size_bytes": sum(w["size_bytes"] for w in items),
+        "total_disk_bytes": sum(w["disk_bytes"] for w in items),
+        "ttl_hours": lifecycle.TTL_HOURS,
+        "quota_mb": lifecycle.QUOTA_MB,
+    }
+
+
+@app.post("/workspaces/evict")
+@offload("io")
+def workspaces_evict(body: dict = Body(default={})):
+    """
+    Run the TTL + quota eviction now.
+
+    Body (all optional): {"dry_run": true, "ttl_hours": 24, "quota_mb": 512}
+    """
+    return lifecycle.evict(
+        dry_run=bool(body.get("dry_run", False)),
+        ttl_hours=body.get("ttl_hours"),
+        quota_mb=body.get("quota_mb"),
+    )
 
 
 # -----------------------------------
 # BACKUP LIST & MANUAL RESTORE ENDPOINTS
 # -----------------------------------
 @app.get("/backups/{request_id}")
+@offload("io")
 def list_backups_endpoint(request_id: str):
     b = list_backups(request_id)
     return {"request_id": request_id, "backups": b}
 
 
 @app.post("/restore")
+@offload("io")
 def restore_endpoint(body: dict):
     request_id = body.get("request_id")
     backup_id = body.get("backup_id")
@@ -295,7 +624,8 @@ def restore_endpoint(body: dict):
     if not match:
         raise HTTPException(status_code=404, detail="backup not found for this request_id")
 
-    restore_res = restore_backup(match, restore_to=str(BASE / "integrated"))
+    with _integrated_locked():
+        restore_res = restore_backup(match, restore_to=str(BASE / "integrated"))
 
     return {
         "request_id": request_id,
@@ -306,6 +636,7 @@ def restore_endpoint(body: dict):
 
 
 @app.get("/env/{request_id}")
+@offload("io")
 def get_env_metadata(request_id: str):
     d = BACKUPS / request_id
     if not d.exists():
@@ -330,10 +661,27 @@ def get_env_metadata(request_id: str):
     raise HTTPException(status_code=404, detail="env metadata not found")
 
 
+# -----------------------------------
+# DELETIONS (background tree removal)
+# -----------------------------------
+@app.get("/deletions")
+def deletions_list(limit: int = 50):
+    return {"deletions": deletion_service.list_jobs(limit=limit)}
+
+
+@app.get("/deletions/{job_id}")
+def deletions_get(job_id: str):
+    job = deletion_service.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="deletion not found")
+    return job
+
+
 # -----------------------------------
 # ADVISOR ENDPOINT
 # -----------------------------------
 @app.post("/advise")
+@offload("cpu")
 def advise(body: dict):
     query = body.get("query", "")
     request_id = body.get("request_id")
@@ -372,7 +720,7 @@ def tools_catalog():
 
 
 @app.post("/tools/run")
-def tools_run(body: dict):
+async def tools_run(body: dict):
     """
     Run a single tool in SAFE MODE.
 
@@ -390,19 +738,164 @@ def tools_run(body: dict):
     if not tool_name:
         raise HTTPException(status_code=400, detail="tool is required")
 
-    result = run_tool(tool_name, args, confirm=confirm)
-    return result
+    # run_command / run_python_file go to the subprocess pool, everything else to io
+    return await executors.run(tool_pool([body]), run_tool, tool_name, args, confirm=confirm)
+
+
+@app.post("/tools/run_batch")
+async def tools_run_batch(body: dict):
+    """
+    Run several tools in one request.
+
+    Body:
+    {
+      "calls": [ {"tool": "read_file", "args": {...}}, {"tool": "list_dir", "args": {...}} ],
+      "mode": "parallel" | "ordered",   // default parallel
+      "confirm": false,                 // default for calls without their own "confirm"
+      "stop_on_error": false            // ordered mode only
+    }
+    """
+    calls = body.get("calls")
+    if not isinstance(calls, list) or not calls:
+        raise HTTPException(status_code=400, detail="calls must be a non-empty list")
+    mode = body.get("mode", "parallel")
+    if mode not in ("parallel", "ordered"):
+        raise HTTPException(status_code=400, detail="mode must be 'parallel' or 'ordered'")
+
+    res = await executors.run(
+        tool_pool(calls), run_tools_batch,
+        calls,
+        parallel=(mode == "parallel"),
+        confirm=bool(body.get("confirm", False)),
+        stop_on_error=bool(body.get("stop_on_error", False)),
+    )
+    if "error" in res:
+        raise HTTPException(status_code=400, detail=res["error"])
+    return res
+
+
+@app.get("/files/stream")
+def files_stream(path: str, root: str = "integrated",
+                 offset: int | None = None, length: int | None = None,
+                 start_line: int | None = None, end_line: int | None = None,
+                 max_lines: int | None = None, tail: int | None = None):
+    """
+    Stream a file (or a range of it, same arguments as the read_file tool)
+    without loading it into memory. Size/line info is in X-Nova-* headers.
+    """
+    try:
+        full = resolve_tool_path(root, path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not full.is_file():
+        raise HTTPException(status_code=404, detail="file not found")
+
+    args = {k: v for k, v in {
+        "offset": offset, "length": length, "start_line": start_line,
+        "end_line": end_line, "max_lines": max_lines, "tail": tail,
+    }.items() if v is not None}
+    header, chunks = iter_range(full, args)
+    return StreamingResponse(
+        chunks,
+        media_type="text/plain; charset=utf-8",
+        headers={
+            "X-Nova-File-Size": str(header["size"]),
+            "X-Nova-Total-Lines": str(header["total_lines"]),
+            "X-Nova-Range": f"{header['offset']}-{header['end']}",
+        },
+    )
+
+# -----------------------------------
+# PROCESSES (run_command / run_python_file with stream=true)
+# -----------------------------------
+@app.get("/processes")
+def processes_list():
+    return {"processes": process_manager.list_processes()}
+
+
+@app.get("/processes/{proc_id}")
+def processes_get(proc_id: str, after: int = 0):
+    """Process info plus buffered output chunks with seq > after."""
+    res = process_manager.read(proc_id, after)
+    if res is None:
+        raise HTTPException(status_code=404, detail="process not found")
+    return res
+
+
+@app.get("/processes/{proc_id}/stream")
+async def processes_stream(proc_id: str, after: int = 0):
+    """
+    Server-Sent Events: one `output` event per chunk ({seq, stream, data})
+    and a final `exit` event with the process info. Reconnect with
+    ?after=<last seq> to resume.
+    """
+    if process_manager.get(proc_id) is None:
+        raise HTTPException(status_code=404, detail="process not found")
+
+    async def stream():
+        import asyncio
+
+        seen = after
+        while True:
+            res = process_manager.read(proc_id, seen)
+            if res is None:
+                break
+            if res["gap"]:
+                yield f"event: gap\ndata: {json.dumps({'after': seen})}\n\n"
+            for c in res["chunks"]:
+                seen = c["seq"]
+                yield f"event: output\ndata: {json.dumps(c)}\n\n"
+            if res["ended_at"] is not None and not res["chunks"]:
+                info = {k: v for k, v in res.items() if k not in ("chunks", "gap")}
+                yield f"event: exit\ndata: {json.dumps(info)}\n\n"
+                break
+            await asyncio.sleep(0.1)
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+@app.post("/processes/{proc_id}/cancel")
+def processes_cancel(proc_id: str):
+    res = process_manager.cancel(proc_id)
+    if res.get("error") == "process not found":
+        raise HTTPException(status_code=404, detail="process not found")
+    return res
+
+
+@app.post("/processes/{proc_id}/signal")
+def processes_signal(proc_id: str, body: dict):
+    name = body.get("signal")
+    if not name:
+        raise HTTPException(status_code=400, detail="signal required")
+    res = process_manager.send_signal(proc_id, name)
+    if res.get("error") == "process not found":
+        raise HTTPException(status_code=404, detail="process not found")
+    return res
+
 
 # -----------------------------------
 # AI INTERFACE ENDPOINT
 # -----------------------------------
 @app.post("/ai_interface")
+@offload("subprocess")
 def ai_interface(req: AIRequest = Body(...)):
     request_id = uuid.uuid4().hex[:8]
+    if req.background:
+        params = {"request": req.model_dump(), "request_id": request_id}
+        return _enqueue("ai_interface", params, request_id)
+    return _ai_interface(req, request_id)
+
+
+@job_queue.register("ai_interface")
+def _ai_interface_job(params: dict, progress):
+    return _ai_interface(AIRequest(**params["request"]), params["request_id"], progress)
+
 
+def _ai_interface(req: AIRequest, request_id: str, progress=_no_progress) -> dict:
     ws = WORKSPACE / request_id
     ws.mkdir(parents=True, exist_ok=True)
 
+    progress("backup", "zipping integrated/")
     repo_root = BASE / "integrated"
     backup_meta = create_backup(
         request_id=request_id,
@@ -412,14 +905,17 @@ def ai_interface(req: AIRequest = Body(...)):
     )
 
     import subprocess
+    progress("write", f"writing {len(req.changes)} file(s) into workspace")
     for change in req.changes:
-        path = ws / change.path
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(change.code)
+        write_text(ws / change.path, change.code)
+    written = sum(len(c.code.encode("utf-8")) for c in req.changes)
+    lifecycle.touch(request_id, written, written, len(req.changes))
 
+    progress("tests", "running sandbox syntax check")
     script = ["python", str(BASE / "sandbox" / "run_tests.py"), str(ws)]
-    proc = subprocess.run(script, capture_output=True, text=True, timeout=30)
+    detach_tree(ws)
+    with span("sandbox.run", request_id=request_id):
+        proc = subprocess.run(script, capture_output=True, text=True, timeout=30)
     tests_ok = proc.returncode == 0
     test_output = proc.stdout + "\n" + proc.stderr
 
@@ -437,6 +933,7 @@ def ai_interface(req: AIRequest = Body(...)):
     }
 
 @app.post("/builder/run")
+@offload("llm")
 def builder_run(req: BuilderRunRequest):
     """
     High-level Builder entrypoint.
@@ -448,6 +945,11 @@ def builder_run(req: BuilderRunRequest):
       - capture env metadata
       - ask the LLM for a build plan (no code changes yet)
     """
+    if req.background:
+        request_id = req.request_id or uuid.uuid4().hex[:8]
+        params = {"instruction": req.instruction, "request_id": request_id}
+        return _enqueue("builder_run", params, request_id)
+
     try:
         result = run_builder_pipeline(
             instruction=req.instruction,
@@ -457,96 +959,181 @@ def builder_run(req: BuilderRunRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@job_queue.register("builder_run")
+def _builder_run_job(params: dict, progress):
+    return run_builder_pipeline(
+        instruction=params["instruction"],
+        existing_request_id=params["request_id"],
+        progress=progress,
+    )
+
+
 # -----------------------------------
-# LLM DIAGNOSTIC ENDPOINT + FUNCTION
-# -----------------------------------
-import time
-from brain.llm_client import (
-    call_groq,
-    call_deepseek,
-    call_openrouter,
-    call_lmstudio,
-    call_ollama,
-    HAS_GROQ,
-    HAS_DEEPSEEK,
-    HAS_OPENROUTER,
-    HAS_LMSTUDIO,
-    HAS_OLLAMA,
-    GROQ_MODEL_FAST,
-    GROQ_MODEL_SMART,
-    DEEPSEEK_MODEL_CHAT,
-    DEEPSEEK_MODEL_REASON,
-    OPENROUTER_MODEL,
-    LMSTUDIO_MODEL,
-    OLLAMA_MODEL_FAST,
-    OLLAMA_MODEL_SMART,
-)
+# JOBS (BACKGROUND PIPELINE STEPS)
+# -----------------------------------
+@app.get("/jobs")
+def jobs_list(status: str | None = None, request_id: str | None = None, limit: int = 50):
+    return {"jobs": job_queue.list_jobs(status=status, request_id=request_id, limit=limit)}
 
-TEST_MESSAGE = [{"role": "user", "content": "Diagnostic test"}]
 
-def test_provider(name, func, *args):
-    try:
-        start = time.perf_counter()
-        func(*args, TEST_MESSAGE)
-        end = time.perf_counter()
-        return {"status": "PASS", "latency_ms": int((end - start) * 1000)}
-    except Exception as e:
-        return {"status": "FAIL", "error": str(e)}
+@app.get("/jobs/{job_id}")
+@offload("io")
+def jobs_get(job_id: str):
+    job = job_queue.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+
+@app.get("/jobs/{job_id}/events")
+async def jobs_events(job_id: str):
+    """
+    Server-Sent Events stream of job state. Sends an event each time the
+    job changes and a final `done` event when it finishes.
+    """
+    if not job_queue.get_job(job_id):
+        raise HTTPException(status_code=404, detail="job not found")
+
+    async def stream():
+        import asyncio
+
+        seen = -1
+        while True:
+            job = job_queue.get_job(job_id)
+            if job is None:
+                break
+            if job["version"] != seen:
+                seen = job["version"]
+                event = "done" if job["status"] in job_queue.TERMINAL else "progress"
+                yield f"event: {event}\ndata: {json.dumps(job, default=str)}\n\n"
+                if event == "done":
+                    break
+            await asyncio.sleep(0.25)
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+# -----------------------------------
+# PROFILES (run_python_file / run_tests with profile=true)
+# -----------------------------------
+@app.get("/profiles")
+@offload("io")
+def profiles_list(limit: int = 50):
+    return {"profiles": profiling.list_profiles(limit=limit)}
+
+
+@app.get("/profiles/{run_id}")
+@offload("io")
+def profiles_get(run_id: str):
+    report = profiling.load_profile(run_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="profile not found")
+    return report
+
+
+@app.get("/profiles/{run_id}/collapsed")
+@offload("io")
+def profiles_collapsed(run_id: str):
+    """Collapsed stacks, ready for flamegraph.pl / speedscope."""
+    text = profiling.collapsed_text(run_id)
+    if text is None:
+        raise HTTPException(status_code=404, detail="profile not found")
+    return PlainTextResponse(text)
+
+
+# -----------------------------------
+# LIVENESS / READINESS
+# -----------------------------------
+@app.get("/live")
+async def live():
+    """The process is up and serving (never waits on warmup)."""
+    return startup.liveness()
+
+
+@app.get("/ready")
+async def ready():
+    """200 once background warmup finished; 503 with the reason otherwise."""
+    problems = []
+    if not llm_client.HAS_ANY_PROVIDER:
+        problems.append("no LLM provider configured in .env")
+    state = startup.readiness(problems)
+    state["nlu"] = nlu_engine.status()
+    state["llm_providers"] = llm_client.configured_providers()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+
+# -----------------------------------
+# METRICS + TRACES
+# -----------------------------------
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition (request + span latency histograms, executor queues)."""
+    return PlainTextResponse(tracing.render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/traces")
+def traces_list(limit: int = 50, min_ms: float = 0):
+    """Recent request traces, newest first (min_ms filters out fast ones)."""
+    return {"traces": tracing.list_traces(limit=limit, min_ms=min_ms)}
+
+
+@app.get("/traces/{trace_id}")
+def traces_get(trace_id: str):
+    t = tracing.get_trace(trace_id)
+    if t is None:
+        raise HTTPException(status_code=404, detail="trace not found")
+    return t
+
+
+# -----------------------------------
+# LLM DIAGNOSTICS (see brain/llm_diagnostics.py)
+# -----------------------------------
+def _diag_deadline(deadline_s: float | None) -> float | None:
+    if deadline_s is not None and not 0 < deadline_s <= 120:
+        raise HTTPException(status_code=400, detail="deadline_s must be in (0, 120]")
+    return deadline_s
+
 
 @app.post("/diagnose_llm")
-def diagnose_llm():
-    results = {}
+async def diagnose_llm(force: bool = False, deadline_s: float | None = None):
+    """
+    Probe every provider concurrently (1-token requests) within a global
+    deadline. The last report is reused for NOVA_DIAG_CACHE_S seconds
+    unless ?force=true.
+    """
+    deadline_s = _diag_deadline(deadline_s)
+    # the probes run on the llm pool; this only waits on them
+    return await executors.run("io", llm_diagnostics.run, force, deadline_s)
 
-    # Primary: Groq
-    if HAS_GROQ:
-        results["groq_fast"] = test_provider("groq_fast", call_groq, GROQ_MODEL_FAST)
-        results["groq_smart"] = test_provider("groq_smart", call_groq, GROQ_MODEL_SMART)
-    else:
-        results["groq_fast"] = {"status": "DISABLED"}
-        results["groq_smart"] = {"status": "DISABLED"}
 
-    # Secondary: DeepSeek
-    if HAS_DEEPSEEK:
-        results["deepseek_chat"] = test_provider("deepseek_chat", call_deepseek, DEEPSEEK_MODEL_CHAT)
-        results["deepseek_reason"] = test_provider("deepseek_reason", call_deepseek, DEEPSEEK_MODEL_REASON)
-    else:
-        results["deepseek_chat"] = {"status": "DISABLED"}
-        results["deepseek_reason"] = {"status": "DISABLED"}
+@app.get("/diagnose_llm/stream")
+def diagnose_llm_stream(force: bool = False, deadline_s: float | None = None):
+    """
+    Server-Sent Events: one `probe` event per provider as its result lands,
+    then a `report` event with the whole (cached or fresh) report.
+    """
+    deadline_s = _diag_deadline(deadline_s)
 
-    # Third: OpenRouter
-    if HAS_OPENROUTER:
-        results["openrouter"] = test_provider("openrouter", call_openrouter, OPENROUTER_MODEL)
-    else:
-        results["openrouter"] = {"status": "DISABLED"}
+    def events():
+        for event, data in llm_diagnostics.stream(force=force, deadline_s=deadline_s):
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-    # Local: LM Studio
-    if HAS_LMSTUDIO:
-        results["lmstudio"] = test_provider("lmstudio", call_lmstudio, LMSTUDIO_MODEL)
-    else:
-        results["lmstudio"] = {"status": "DISABLED"}
+    return StreamingResponse(events(), media_type="text/event-stream")
 
-    # Local: Ollama
-    if HAS_OLLAMA:
-        results["ollama_fast"] = test_provider("ollama_fast", call_ollama, OLLAMA_MODEL_FAST)
-        results["ollama_smart"] = test_provider("ollama_smart", call_ollama, OLLAMA_MODEL_SMART)
-    else:
-        results["ollama_fast"] = {"status": "DISABLED"}
-        results["ollama_smart"] = {"status": "DISABLED"}
 
-    return {"providers": results}
+@app.get("/llm/routing")
+async def llm_routing_stats():
+    """Decayed latency / error stats and 429 backoffs the chat router orders providers by."""
+    return {"adaptive": llm_client.ADAPTIVE_ROUTING, **llm_routing.snapshot()}
 
 
 async def run_llm_diagnostics():
     """Call the same logic as REST endpoint but usable inside chat."""
-    return diagnose_llm()
+    return await executors.run("io", llm_diagnostics.run)
 
 # -----------------------------------
 # CHAT ENDPOINTS (FINAL MERGED VERSION)
 # -----------------------------------
-def _session_file(session_id: str):
-    return CHAT_DIR / f"{session_id}.json"
-
-
 @app.post("/chat")
 async def chat(req: Request):
     data = await req.json()
@@ -555,25 +1142,17 @@ async def chat(req: Request):
     message = data.get("message", "")
     request_id = data.get("request_id")
 
-    sf = _session_file(session_id)
-
-    # Load session history
-    if sf.exists():
-        history = json.load(open(sf, "r", encoding="utf-8"))
-    else:
-        history = []
+    # Blocking work goes to the executor pools (see executors.py); the
+    # event loop only awaits it.
+    # Load the recent part of the session (rows in nova.db, see chat_store.py)
+    history = await executors.run("io", chat_store.history, session_id, limit=chat_store.CONTEXT_MESSAGES)
 
     # Append user message
-    history.append(
-        {
-            "role": role,
-            "message": message,
-            "ts": datetime.utcnow().isoformat(),
-        }
-    )
+    history.append(await executors.run("io", chat_store.append, session_id, role, message))
 
     # Run NLU
-    analysis = detect_intent(message)
+    with span("nlu.detect_intent"):
+        analysis = await executors.run("cpu", detect_intent, message)
     intent = analysis.get("intent")
     needs_internet = analysis.get("needs_internet")
     deep_research = analysis.get("deep_research")
@@ -588,15 +1167,7 @@ async def chat(req: Request):
         reply = f"📊 **LLM Diagnostic Report**\n```\n{formatted}\n```"
 
         # Store reply
-        history.append(
-            {
-                "role": "agent",
-                "message": reply,
-                "ts": datetime.utcnow().isoformat(),
-            }
-        )
-        with open(sf, "w", encoding="utf-8") as f:
-            json.dump(history, f, indent=2)
+        await executors.run("io", chat_store.append, session_id, "agent", reply)
 
         return {"session_id": session_id, "reply": reply}
 
@@ -629,25 +1200,8 @@ async def chat(req: Request):
         "research_performance",
         "safety",
     ):
-
-        env_meta = None
-
-        if request_id:
-            d = BACKUPS / request_id
-            env_file = d / f"environment_{request_id}.meta.json"
-            if env_file.exists():
-                try:
-                    env_meta = json.load(open(env_file, "r", encoding="utf-8"))
-                except Exception:
-                    env_meta = None
-
-        project_root = BASE / "integrated"
-
-        advice = generate_advice(
-            query=message,
-            project_root=project_root,
-            env_meta=env_meta,
-        )
+        # env metadata read + import scan of integrated/
+        advice = await executors.run("cpu", _chat_advice, message, request_id)
 
         suggestions = advice.get("suggestions", [])
 
@@ -668,29 +1222,39 @@ async def chat(req: Request):
     # LLM BRAIN (Nova Builder+Agent)
     # ------------------------------
     else:
-        reply = chat_with_builder(message, intent, history)
+        reply = await executors.run("llm", chat_with_builder, message, intent, history)
 
     # Append agent message
-    history.append(
-        {
-            "role": "agent",
-            "message": reply,
-            "ts": datetime.utcnow().isoformat(),
-        }
-    )
-
-    # Save session
-    with open(sf, "w", encoding="utf-8") as f:
-        json.dump(history, f, indent=2)
+    await executors.run("io", chat_store.append, session_id, "agent", reply)
 
     return {"session_id": session_id, "reply": reply}
 
+
+def _chat_advice(message: str, request_id: str | None) -> dict:
+    env_meta = None
+
+    if request_id:
+        d = BACKUPS / request_id
+        env_file = d / f"environment_{request_id}.meta.json"
+        if env_file.exists():
+            try:
+                env_meta = json.load(open(env_file, "r", encoding="utf-8"))
+            except Exception:
+                env_meta = None
+
+    project_root = BASE / "integrated"
+
+    return generate_advice(
+        query=message,
+        project_root=project_root,
+        env_meta=env_meta,
+    )
+
+
 @app.get("/chat/{session_id}")
+@offload("io")
 def get_chat(session_id: str):
-    sf = _session_file(session_id)
-    if not sf.exists():
-        return {"session_id": session_id, "history": []}
     return {
         "session_id": session_id,
-        "history": json.load(open(sf, "r", encoding="utf-8")),
+        "history": chat_store.history(session_id),
     }
\ No newline at end of file
@@ -8,9 +8,10 @@ import hashlib
 from pathlib import Path
 from datetime import datetime
 
+from tracing import traced
+
 BASE = Path(__file__).resolve().parent
 BACKUP_ROOT = BASE / "backups"
-BACKUP_ROOT.mkdir(parents=True, exist_ok=True)
 
 def _ensure_dir(p: Path):
     p.mkdir(parents=True, exist_ok=True)
@@ -23,6 +24,7 @@ def _sha256_of_file(path: Path, block_size: int = 65536) -> str:
             h.update(chunk)
     return h.hexdigest()
 
+@traced("backup.create")
 def create_backup(request_id: str, targets: list, repo_root: str | Path = None, note: str = "") -> dict:
     repo_root = Path(repo_root) if repo_root else BASE
     repo_root = repo_root.expanduser().resolve()
@@ -0,0 +1,73 @@
+# benchmarks/bench_app.py
+import uuid
+from datetime import datetime
+
+from harness import bench, scratch, synth_tree, rmtree, patched, nova_app, Skip
+
+
+def _client(app_module):
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError as e:
+        raise Skip(f"fastapi TestClient unavailable: {e}")
+    return TestClient(app_module.app)
+
+
+@bench("chat.session_growth", params=[10, 100, 1_000, 5_000], quick=[10, 1_000])
+def chat_session_growth(turns):
+    """
+    One /chat round trip in a session that already holds `turns` messages.
+    The LLM is the local mock server, so this is NLU + history I/O + routing.
+    """
+    app_module, llm = nova_app()
+    client = _client(app_module)
+    history = [
+        {"role": "user" if i % 2 == 0 else "agent",
+         "message": f"message {i} " + "lorem ipsum " * 20,
+         "ts": datetime.utcnow().isoformat()}
+        for i in range(turns)
+    ]
+    session = ["bench"]
+
+    def reseed():
+        # every sample gets a fresh session with the same history length
+        session[0] = f"bench_{turns}_{uuid.uuid4().hex[:8]}"
+        app_module.chat_store.append_many(session[0], history)
+
+    def run():
+        r = client.post("/chat", json={"session_id": session[0], "message": "tell me a joke"})
+        assert r.status_code == 200, r.text
+    yield reseed, run
+
+
+@bench("merge", params=[100, 1_000, 10_000], quick=[100, 1_000], repeat=3, unit="files")
+def merge(n):
+    """
+    /merge of a workspace with `n` files into integrated/, where a tenth of
+    the files changed since the last merge (the rest are skipped by content).
+    """
+    app_module, _ = nova_app()
+    work = scratch()
+    ws_root = work / "workspace"
+    ws = synth_tree(ws_root / "bench", n)
+    changed = sorted(ws.rglob("*.py"))[::10]
+    gen = [0]
+    try:
+        # keep the bench out of the real integrated/ and workspace index
+        with patched(app_module, BASE=work, WORKSPACE=ws_root), \
+             patched(app_module.lifecycle, touch=lambda *a, **k: None):
+            # the undecorated handler: the merge itself, without the executor hop
+            merge_handler = app_module.merge.__wrapped__
+            merge_handler({"request_id": "bench"})   # first merge copies everything
+
+            def edit():
+                gen[0] += 1
+                for p in changed:
+                    p.write_text(p.read_text(encoding="utf-8") + f"# edit {gen[0]}\n", encoding="utf-8")
+
+            def run():
+                merge_handler({"request_id": "bench"})
+                return n
+            yield edit, run
+    finally:
+        rmtree(work)
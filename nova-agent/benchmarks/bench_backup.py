@@ -0,0 +1,40 @@
+# benchmarks/bench_backup.py
+from harness import bench, scratch, synth_tree, rmtree, patched
+
+SIZES = [1_000, 10_000, 100_000]
+
+
+@bench("backup.create", params=SIZES, quick=[1_000], repeat=3, warmup=0, unit="files")
+def create(n):
+    import backup_manager
+
+    work = scratch()
+    tree = synth_tree(work / "repo", n)
+    try:
+        with patched(backup_manager, BACKUP_ROOT=work / "backups"):
+            def run():
+                backup_manager.create_backup("bench", [], repo_root=tree)
+                return n
+            yield run
+    finally:
+        rmtree(work)
+
+
+@bench("backup.restore", params=SIZES, quick=[1_000], repeat=3, warmup=0, unit="files")
+def restore(n):
+    import backup_manager
+
+    work = scratch()
+    tree = synth_tree(work / "repo", n)
+    try:
+        with patched(backup_manager, BACKUP_ROOT=work / "backups"):
+            meta = backup_manager.create_backup("bench", [], repo_root=tree)
+            target = work / "restored"
+
+            def run():
+                res = backup_manager.restore_backup(meta, restore_to=target)
+                assert res["status"] == "ok", res
+                return n
+            yield run
+    finally:
+        rmtree(work)
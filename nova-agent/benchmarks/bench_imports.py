@@ -0,0 +1,44 @@
+# benchmarks/bench_imports.py
+from harness import bench, scratch, synth_tree, rmtree
+
+SIZES = [100, 1_000, 10_000]
+
+
+def _reset(root):
+    import import_index
+    import_index.invalidate(root)
+    import_index._index_path(root).unlink(missing_ok=True)
+
+
+@bench("imports.scan_cold", params=SIZES, quick=[100, 1_000], repeat=3, unit="files")
+def scan_cold(n):
+    """scan_imports with no index on disk: every file is read and parsed."""
+    from advisor_engine import scan_imports
+
+    work = scratch()
+    root = synth_tree(work / "proj", n).resolve()
+
+    def run():
+        _reset(root)
+        scan_imports(root)
+        return n
+    try:
+        yield run
+    finally:
+        _reset(root)
+        rmtree(work)
+
+
+@bench("imports.scan_warm", params=SIZES, quick=[100, 1_000], unit="files")
+def scan_warm(n):
+    """scan_imports on an unchanged tree: one stat pass against the index."""
+    from advisor_engine import scan_imports
+
+    work = scratch()
+    root = synth_tree(work / "proj", n).resolve()
+    scan_imports(root)
+    try:
+        yield lambda: (scan_imports(root), n)[1]
+    finally:
+        _reset(root)
+        rmtree(work)
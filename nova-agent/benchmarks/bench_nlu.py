@@ -0,0 +1,30 @@
+# benchmarks/bench_nlu.py
+from harness import bench, Skip
+
+MESSAGES = [
+    "run tests on the workspace", "syntax check my code please", "merge it",
+    "apply changes and commit work", "the system is slow, optimize it", "speed up the build",
+    "missing module error when importing requests", "check requirements problem",
+    "take a backup before you touch anything", "rollback the last change",
+    "search online for fastapi streaming", "google it", "what should we add next",
+    "any new features you would suggest", "explain how the pipeline works", "hi",
+    "Traceback (most recent call last): ValueError in app.py line 12",
+    "refactor the patch engine into smaller functions", "lag ho raha hai", "kuch aur add kar",
+]
+
+
+@bench("nlu.detect_intent", params=[1, 8], unit="msgs")
+def detect_intent_throughput(copies):
+    """Intent detection over a fixed corpus; param = how many times the corpus is repeated."""
+    try:
+        from brain.nlu_engine import detect_intent
+    except Exception as e:   # model / torch not installed
+        raise Skip(f"brain.nlu_engine unavailable: {e}")
+    corpus = MESSAGES * copies
+
+    def run():
+        for m in corpus:
+            detect_intent(m)
+        return len(corpus)
+
+    yield run
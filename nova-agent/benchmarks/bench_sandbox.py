@@ -0,0 +1,23 @@
+# benchmarks/bench_sandbox.py
+import sys
+import subprocess
+
+from harness import bench, scratch, synth_tree, rmtree, NOVA
+
+RUNNER = NOVA / "sandbox" / "run_tests.py"
+
+
+@bench("sandbox.syntax_check", params=[100, 1_000, 5_000], quick=[100], repeat=3, unit="files")
+def syntax_check(n):
+    """The sandbox runner as /run_tests starts it: a fresh interpreter compiling every file."""
+    work = scratch()
+    ws = synth_tree(work / "ws", n)
+
+    def run():
+        r = subprocess.run([sys.executable, str(RUNNER), str(ws)], capture_output=True, text=True)
+        assert r.returncode == 0, r.stdout + r.stderr
+        return n
+    try:
+        yield run
+    finally:
+        rmtree(work)
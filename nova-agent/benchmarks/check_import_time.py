@@ -0,0 +1,88 @@
+# benchmarks/check_import_time.py
+"""
+Fail when `import app` gets slow again.
+
+    python benchmarks/check_import_time.py [--budget-ms 1500] [--runs 3] [--module app]
+
+Runs `python -X importtime -c "import app"` in a fresh interpreter (best
+of --runs, since the first run also warms the OS file cache), with no LLM
+provider configured so import-time provider checks would surface too.
+Exits 1 if the import takes longer than the budget, or if any module
+that has to stay lazy (torch, sentence-transformers, the Groq SDK) was
+imported at startup. Prints the slowest imports either way.
+"""
+import os
+import sys
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+NOVA = Path(__file__).resolve().parent.parent
+
+BUDGET_MS = float(os.getenv("NOVA_IMPORT_BUDGET_MS", "1500"))
+
+# loaded on first use / by the lifespan warmup, never by `import app`
+MUST_BE_LAZY = ("torch", "sentence_transformers", "transformers", "groq")
+
+
+def measure(module: str) -> Tuple[Dict[str, Tuple[int, int]], str]:
+    """{module: (self_us, cumulative_us)} from -X importtime, plus the child's stderr on failure."""
+    env = {**os.environ, "GROQ_API_KEY": "", "DEEPSEEK_API_KEY": "", "OPENROUTER_API_KEY": "",
+           "LMSTUDIO_ENABLED": "false", "OLLAMA_ENABLED": "false"}
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                       cwd=str(NOVA), env=env, capture_output=True, text=True)
+    if r.returncode != 0:
+        return {}, r.stderr
+    out: Dict[str, Tuple[int, int]] = {}
+    for line in r.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+            out[name.strip()] = (int(self_us), int(cum_us))
+        except ValueError:
+            continue
+    return out, ""
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--module", default="app")
+    ap.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--top", type=int, default=15)
+    args = ap.parse_args(argv)
+
+    best = None
+    for _ in range(max(1, args.runs)):
+        times, err = measure(args.module)
+        if err:
+            print(f"import {args.module} failed:\n{err[-4000:]}")
+            return 1
+        total = times.get(args.module, (0, 0))[1]
+        if best is None or total < best[0]:
+            best = (total, times)
+    total_us, times = best
+
+    slow: List[Tuple[str, Tuple[int, int]]] = sorted(times.items(), key=lambda kv: kv[1][1], reverse=True)
+    print(f"slowest imports (cumulative ms) for `import {args.module}`:")
+    for name, (self_us, cum_us) in slow[:args.top]:
+        print(f"  {cum_us / 1000:>9.1f}  (self {self_us / 1000:>7.1f})  {name}")
+
+    failures = []
+    eager = sorted({n.split(".")[0] for n in times} & set(MUST_BE_LAZY))
+    if eager:
+        failures.append(f"imported at startup but must stay lazy: {', '.join(eager)}")
+    total_ms = total_us / 1000
+    if total_ms > args.budget_ms:
+        failures.append(f"import {args.module} took {total_ms:.0f} ms, budget {args.budget_ms:.0f} ms")
+
+    print(f"\nimport {args.module}: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms, best of {args.runs})")
+    for f in failures:
+        print(f"FAIL: {f}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+# benchmarks/compare.py
+"""
+Compare two benchmark result files (median times):
+
+    python benchmarks/compare.py baseline.json candidate.json [--threshold 0.10]
+
+Exits 1 when any bench got slower by more than the threshold.
+"""
+import sys
+import argparse
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+
+DEFAULT_THRESHOLD = 0.10
+
+
+def _key(r: Dict[str, Any]) -> Tuple[str, str]:
+    return r["name"], repr(r.get("param"))
+
+
+def diff(base: Dict[str, Any], cand: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    old = {_key(r): r for r in base.get("results", []) if "median_ms" in r}
+    rows = []
+    for r in cand.get("results", []):
+        if "median_ms" not in r:
+            continue
+        b = old.get(_key(r))
+        if b is None:
+            continue
+        ratio = r["median_ms"] / b["median_ms"] if b["median_ms"] else float("inf")
+        rows.append({
+            "name": r["name"],
+            "param": r.get("param"),
+            "base_ms": b["median_ms"],
+            "new_ms": r["median_ms"],
+            "ratio": round(ratio, 3),
+            "status": "slower" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else "same",
+        })
+    return rows
+
+
+def report(base: Dict[str, Any], cand: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """Print the comparison table; return the regressions."""
+    if base.get("machine") != cand.get("machine"):
+        print("warning: results come from different machines / interpreters")
+    print(f"baseline {base.get('commit')} ({base.get('timestamp')})  ->  {cand.get('commit')} ({cand.get('timestamp')})")
+    rows = diff(base, cand, threshold)
+    for row in rows:
+        label = row["name"] + (f"[{row['param']}]" if row["param"] is not None else "")
+        print(f"{label:<40} {row['base_ms']:>10.2f} -> {row['new_ms']:>10.2f} ms  x{row['ratio']:<6} {row['status']}")
+    slower = [r for r in rows if r["status"] == "slower"]
+    print(f"\n{len(rows)} compared, {len(slower)} slower than {threshold:.0%}")
+    return slower
+
+
+def main(argv=None) -> int:
+    import harness
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("baseline", type=Path)
+    ap.add_argument("candidate", type=Path)
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = ap.parse_args(argv)
+    slower = report(harness.load_results(args.baseline), harness.load_results(args.candidate), args.threshold)
+    return 1 if slower else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
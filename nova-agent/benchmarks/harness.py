@@ -0,0 +1,265 @@
+# benchmarks/harness.py
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import statistics
+import subprocess
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable
+
+BENCH_DIR = Path(__file__).resolve().parent
+NOVA = BENCH_DIR.parent
+RESULTS = BENCH_DIR / "results"
+
+# benches import the server modules directly (backup_manager, brain.*, app)
+if str(NOVA) not in sys.path:
+    sys.path.insert(0, str(NOVA))
+
+SCHEMA = 1
+
+
+class Skip(Exception):
+    """Raised from a bench's setup when it cannot run here (missing model, package...)."""
+
+
+# ---------- registry ----------
+
+_benches: List[Dict[str, Any]] = []
+
+
+def bench(name: str, params: Optional[List[Any]] = None, quick: Optional[List[Any]] = None,
+          repeat: Optional[int] = None, warmup: int = 1, unit: str = ""):
+    """
+    Register a benchmark. The decorated function is a generator taking one
+    param: code before `yield` is setup, the yielded callable is what gets
+    timed, code after (or in a finally) is teardown:
+
+        @bench("backup.create", params=[1_000, 10_000], quick=[1_000])
+        def create(n):
+            root = synth_tree(n)
+            yield lambda: create_backup(...)
+            shutil.rmtree(root)
+
+    If the timed callable returns an int it is taken as the number of items
+    processed, and the result gets `<unit>/s` throughput. Yield a pair
+    (prepare, timed) to run an untimed prepare() before every sample.
+    """
+    def deco(fn):
+        _benches.append({
+            "name": name,
+            "fn": fn,
+            "params": list(params) if params else [None],
+            "quick": list(quick) if quick else None,
+            "repeat": repeat,
+            "warmup": warmup,
+            "unit": unit,
+        })
+        return fn
+    return deco
+
+
+def registered() -> List[Dict[str, Any]]:
+    return list(_benches)
+
+
+# ---------- running ----------
+
+def _stats(samples: List[float]) -> Dict[str, float]:
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "min_ms": round(ms[0], 3),
+        "median_ms": round(statistics.median(ms), 3),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "stdev_ms": round(statistics.stdev(ms), 3) if len(ms) > 1 else 0.0,
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+def run_one(b: Dict[str, Any], param: Any, repeat: int) -> Dict[str, Any]:
+    res: Dict[str, Any] = {"name": b["name"], "param": param}
+    gen = b["fn"](param)
+    try:
+        try:
+            timed = next(gen)
+        except Skip as e:
+            return {**res, "skipped": str(e)}
+
+        prepare = None
+        if isinstance(timed, tuple):
+            prepare, timed = timed
+
+        for _ in range(b["warmup"]):
+            if prepare:
+                prepare()
+            timed()
+        samples, items = [], None
+        for _ in range(b["repeat"] or repeat):
+            if prepare:
+                prepare()
+            t0 = time.perf_counter()
+            out = timed()
+            samples.append(time.perf_counter() - t0)
+            if isinstance(out, int) and not isinstance(out, bool):
+                items = out
+        res.update(_stats(samples))
+        res["runs"] = len(samples)
+        if items:
+            res["items"] = items
+            res["unit"] = b["unit"] or "items"
+            res["per_s"] = round(items / statistics.median(samples), 1)
+        return res
+    except Exception as e:
+        return {**res, "error": f"{type(e).__name__}: {e}"}
+    finally:
+        gen.close()   # runs the bench's teardown
+
+
+def run_all(selected: List[Dict[str, Any]], quick: bool, repeat: int,
+            log: Callable[[str], None] = print) -> List[Dict[str, Any]]:
+    out = []
+    for b in selected:
+        params = b["quick"] if quick and b["quick"] else b["params"]
+        for p in params:
+            r = run_one(b, p, repeat)
+            out.append(r)
+            log(format_result(r))
+    return out
+
+
+def format_result(r: Dict[str, Any]) -> str:
+    label = r["name"] + (f"[{r['param']}]" if r["param"] is not None else "")
+    if "skipped" in r:
+        return f"{label:<40} skipped: {r['skipped']}"
+    if "error" in r:
+        return f"{label:<40} ERROR: {r['error']}"
+    line = f"{label:<40} median {r['median_ms']:>10.2f} ms  (min {r['min_ms']:.2f}, ±{r['stdev_ms']:.2f}, n={r['runs']})"
+    if "per_s" in r:
+        line += f"  {r['per_s']:,.1f} {r['unit']}/s"
+    return line
+
+
+# ---------- results ----------
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=NOVA,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def machine_info() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def save_results(results: List[Dict[str, Any]], quick: bool, out: Optional[Path] = None) -> Path:
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    commit = _git_commit()
+    doc = {
+        "schema": SCHEMA,
+        "timestamp": stamp,
+        "commit": commit,
+        "quick": quick,
+        "machine": machine_info(),
+        "results": results,
+    }
+    if out is None:
+        RESULTS.mkdir(parents=True, exist_ok=True)
+        out = RESULTS / f"{stamp}_{commit or 'nogit'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    return out
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    return json.load(open(path, "r", encoding="utf-8"))
+
+
+# ---------- fixtures ----------
+
+def scratch(prefix: str = "nova_bench_") -> Path:
+    return Path(tempfile.mkdtemp(prefix=prefix))
+
+
+def synth_tree(root: Path, n_files: int, per_dir: int = 100, size: int = 512) -> Path:
+    """
+    n_files small Python modules spread over directories of `per_dir`
+    files (two levels deep), each importing a couple of stdlib modules and
+    a sibling, so import scanning has real edges to find.
+    """
+    stdlib = ["os", "sys", "json", "re", "time", "math", "typing", "pathlib", "itertools", "hashlib"]
+    pad = "# " + "x" * 70 + "\n"
+    for i in range(n_files):
+        d = root / f"pkg{i // (per_dir * 10)}" / f"mod{(i // per_dir) % 10}"
+        if i % per_dir == 0:
+            d.mkdir(parents=True, exist_ok=True)
+        body = (
+            f"import {stdlib[i % 10]}\n"
+            f"from {stdlib[(i * 7) % 10]} import *\n"
+            f"from . import m{max(i - 1, 0) % per_dir}\n\n"
+            f"def f{i}(x):\n    return x + {i}\n\n"
+        )
+        body += pad * max(0, (size - len(body)) // len(pad))
+        (d / f"m{i % per_dir}.py").write_text(body, encoding="utf-8")
+    return root
+
+
+def rmtree(path: Path):
+    shutil.rmtree(path, ignore_errors=True)
+
+
+@contextmanager
+def patched(obj, **attrs):
+    """Temporarily point module globals elsewhere (e.g. BACKUP_ROOT at a scratch dir)."""
+    old = {k: getattr(obj, k) for k in attrs}
+    for k, v in attrs.items():
+        setattr(obj, k, v)
+    try:
+        yield obj
+    finally:
+        for k, v in old.items():
+            setattr(obj, k, v)
+
+
+# ---------- the app, wired to the mock LLM ----------
+
+_app_state: Dict[str, Any] = {}
+
+
+def nova_app():
+    """
+    Import app.py with LM Studio pointed at a local mock LLM server
+    (benchmarks/mock_llm_server.py) and every other provider off, so /chat
+    never leaves the machine. The environment has to be set before
+    brain.llm_client (and state_db) is first imported. Returns (app module, mock server).
+    """
+    if "app" in _app_state:
+        return _app_state["app"], _app_state["llm"]
+    if "brain.llm_client" in sys.modules:
+        raise RuntimeError("brain.llm_client was imported before nova_app(); provider env not applied")
+
+    import mock_llm_server
+
+    server = mock_llm_server.start()
+    os.environ.update(mock_llm_server.provider_env(server.url, providers=("lmstudio",)))
+    # chat history and the request registry go to a throwaway database
+    os.environ["NOVA_DB"] = str(scratch() / "nova.db")
+    try:
+        import app as app_module
+    except ImportError as e:
+        raise Skip(f"app import failed: {e}")
+    _app_state.update(app=app_module, llm=server)
+    return app_module, server
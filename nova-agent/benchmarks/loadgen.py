@@ -0,0 +1,217 @@
+# benchmarks/loadgen.py
+"""
+Drive /chat with concurrent clients and report latency percentiles.
+
+    # against a server you started yourself
+    python benchmarks/loadgen.py --url http://127.0.0.1:8000 -c 16 -n 400
+
+    # self-contained: start the mock LLM, spawn uvicorn wired to it, drive it
+    python benchmarks/loadgen.py --spawn -c 32 -d 30 --providers groq,deepseek \\
+        --latency lognormal:400,0.5 --error-rate 0.05 --rate-limit 20
+
+Every client keeps its own chat session (history grows as in real use)
+unless --fresh-sessions is given. Replies starting with "LLM error:" are
+HTTP 200 but counted as llm_errors. --out writes the report as JSON.
+"""
+import os
+import sys
+import json
+import math
+import time
+import socket
+import argparse
+import threading
+import subprocess
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import httpx
+
+import mock_llm_server
+
+NOVA = Path(__file__).resolve().parent.parent
+
+
+def percentile(sorted_ms: List[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_ms:
+        return 0.0
+    k = max(0, min(len(sorted_ms) - 1, math.ceil(p / 100.0 * len(sorted_ms)) - 1))
+    return sorted_ms[k]
+
+
+def summarize(samples: List[Dict[str, Any]], wall_s: float) -> Dict[str, Any]:
+    ms = sorted(s["ms"] for s in samples)
+    statuses: Dict[str, int] = {}
+    for s in samples:
+        statuses[str(s["status"])] = statuses.get(str(s["status"]), 0) + 1
+    return {
+        "requests": len(samples),
+        "ok": sum(1 for s in samples if s["status"] == 200 and not s["llm_error"]),
+        "llm_errors": sum(1 for s in samples if s["llm_error"]),
+        "http_errors": sum(1 for s in samples if s["status"] != 200),
+        "statuses": statuses,
+        "wall_s": round(wall_s, 2),
+        "throughput_rps": round(len(samples) / wall_s, 2) if wall_s else 0.0,
+        "latency_ms": {
+            "min": round(ms[0], 1) if ms else 0.0,
+            "p50": round(percentile(ms, 50), 1),
+            "p90": round(percentile(ms, 90), 1),
+            "p95": round(percentile(ms, 95), 1),
+            "p99": round(percentile(ms, 99), 1),
+            "max": round(ms[-1], 1) if ms else 0.0,
+        },
+    }
+
+
+def drive(url: str, concurrency: int, total: Optional[int], duration: Optional[float],
+          message: str, fresh_sessions: bool, timeout: float) -> Dict[str, Any]:
+    samples: List[Dict[str, Any]] = []
+    lock = threading.Lock()
+    issued = [0]
+    deadline = time.monotonic() + duration if duration else None
+
+    def take() -> bool:
+        with lock:
+            if total is not None and issued[0] >= total:
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            issued[0] += 1
+            return True
+
+    def worker(n: int):
+        session = f"load{n:03d}"
+        with httpx.Client(base_url=url, timeout=timeout) as client:
+            i = 0
+            while take():
+                i += 1
+                body = {"message": message}
+                if not fresh_sessions:
+                    body["session_id"] = session
+                t0 = time.perf_counter()
+                try:
+                    r = client.post("/chat", json=body)
+                    status = r.status_code
+                    reply = r.json().get("reply", "") if status == 200 else ""
+                except (httpx.HTTPError, ValueError) as e:
+                    status, reply = type(e).__name__, ""
+                rec = {
+                    "ms": (time.perf_counter() - t0) * 1000,
+                    "status": status,
+                    "llm_error": status == 200 and str(reply).startswith("LLM error:"),
+                }
+                with lock:
+                    samples.append(rec)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return summarize(samples, time.perf_counter() - t0)
+
+
+# ---------- --spawn ----------
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_nova(env_extra: Dict[str, str], workers: int, wait_s: float = 120.0):
+    port = _free_port()
+    env = {**os.environ, **env_extra}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=str(NOVA), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + wait_s
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"nova exited during startup:\n{proc.stderr.read().decode(errors='replace')[-4000:]}")
+        try:
+            # /ready: warmup (NLU model, SDK clients) done, so it isn't in the numbers
+            if httpx.get(f"{url}/ready", timeout=2).status_code == 200:
+                return proc, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    proc.kill()
+    raise RuntimeError(f"nova did not become ready within {wait_s:.0f}s")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", help="running Nova server (omit with --spawn)")
+    ap.add_argument("--spawn", action="store_true", help="start mock LLM + uvicorn app:app for the run")
+    ap.add_argument("-c", "--concurrency", type=int, default=8)
+    ap.add_argument("-n", "--requests", type=int, help="total requests (default 200 unless -d)")
+    ap.add_argument("-d", "--duration", type=float, help="run for this many seconds instead of -n")
+    ap.add_argument("--message", default="explain what the builder pipeline does")
+    ap.add_argument("--fresh-sessions", action="store_true", help="new session for every request")
+    ap.add_argument("--timeout", type=float, default=180.0)
+    ap.add_argument("--out", type=Path, help="write the report as JSON")
+    g = ap.add_argument_group("--spawn options")
+    g.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    g.add_argument("--providers", default="lmstudio", help="providers routed to the mock, comma separated")
+    g.add_argument("--latency", default="lognormal:200,0.5")
+    g.add_argument("--tokens-per-s", type=float, default=0.0)
+    g.add_argument("--reply-tokens", type=int, default=32)
+    g.add_argument("--error-rate", type=float, default=0.0)
+    g.add_argument("--rate-limit", type=float, default=0.0)
+    g.add_argument("--burst", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    if bool(args.url) == bool(args.spawn):
+        ap.error("give either --url or --spawn")
+    total = args.requests if args.requests or args.duration else 200
+
+    mock, proc, url = None, None, args.url
+    try:
+        if args.spawn:
+            mock = mock_llm_server.start(
+                latency=args.latency, tokens_per_s=args.tokens_per_s, reply_tokens=args.reply_tokens,
+                error_rate=args.error_rate, rate_limit=args.rate_limit, burst=args.burst,
+            )
+            env = mock_llm_server.provider_env(mock.url, [p.strip() for p in args.providers.split(",") if p.strip()])
+            proc, url = spawn_nova(env, args.workers)
+            print(f"mock LLM {mock.url}, nova {url} (workers={args.workers})")
+
+        report = drive(url.rstrip("/"), max(1, args.concurrency), total, args.duration,
+                       args.message, args.fresh_sessions, args.timeout)
+        report["concurrency"] = args.concurrency
+        if mock is not None:
+            report["mock_llm"] = mock.stats()
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        mock_llm_server.stop(mock)
+
+    lat = report["latency_ms"]
+    print(f"{report['requests']} requests in {report['wall_s']}s ({report['throughput_rps']} req/s), "
+          f"concurrency {args.concurrency}")
+    print(f"ok {report['ok']}  llm_errors {report['llm_errors']}  http_errors {report['http_errors']}  "
+          f"statuses {report['statuses']}")
+    print(f"latency ms  p50 {lat['p50']}  p90 {lat['p90']}  p95 {lat['p95']}  p99 {lat['p99']}  "
+          f"(min {lat['min']}, max {lat['max']})")
+    if "mock_llm" in report:
+        m = report["mock_llm"]
+        print(f"mock LLM: {m['requests']} calls, {m['rate_limited']} rate limited, {m['error']} injected errors")
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
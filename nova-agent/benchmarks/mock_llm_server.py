@@ -0,0 +1,361 @@
+# benchmarks/mock_llm_server.py
+"""
+OpenAI- and Ollama-compatible mock LLM server for load and latency tests.
+
+    python benchmarks/mock_llm_server.py --port 8900 \\
+        --latency lognormal:300,0.6 --tokens-per-s 40 --reply-tokens 120 \\
+        --error-rate 0.02 --rate-limit 20 --burst 5
+
+Serves POST .../chat/completions (Groq, DeepSeek, OpenRouter, LM Studio;
+`"stream": true` gives SSE chunks) and POST /api/chat (Ollama; streams
+NDJSON unless `"stream": false`, like the real thing). Point Nova at it:
+
+    GROQ_BASE_URL=http://127.0.0.1:8900          (the SDK adds /openai/v1)
+    DEEPSEEK_BASE_URL / OPENROUTER_BASE_URL / LMSTUDIO_BASE_URL=http://127.0.0.1:8900/v1
+    OLLAMA_BASE_URL=http://127.0.0.1:8900
+
+Latency is time to first token; the rest of the reply follows at
+--tokens-per-s (also for non-streamed replies, which are sent when done).
+Distributions: fixed:MS, uniform:LO,HI, normal:MEAN,SD, exp:MEAN,
+lognormal:MEDIAN,SIGMA (all in ms). GET/POST /_mock/config reads/changes
+the settings at runtime, GET /_mock/stats returns counters.
+"""
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional
+
+WORDS = ("nova builds patches runs tests merges workspaces and explains each step "
+         "with small safe edits so the code keeps working").split()
+
+DEFAULTS: Dict[str, Any] = {
+    "latency": "fixed:0",
+    "tokens_per_s": 0.0,      # 0 = the whole reply at once
+    "reply_tokens": 8,
+    "error_rate": 0.0,        # fraction of requests answered with --error-status
+    "error_status": 500,
+    "rate_limit": 0.0,        # requests/s over all clients; 0 = unlimited
+    "burst": 1,
+    "retry_after_s": 1.0,
+    "seed": None,
+}
+
+
+def parse_latency(spec: str):
+    """'lognormal:300,0.6' -> callable returning a delay in seconds."""
+    kind, _, args = spec.partition(":")
+    try:
+        a = [float(x) for x in args.split(",") if x.strip()]
+    except ValueError:
+        raise ValueError(f"bad latency spec: {spec!r}")
+    kinds = {
+        "fixed": (1, lambda r: a[0]),
+        "uniform": (2, lambda r: r.uniform(a[0], a[1])),
+        "normal": (2, lambda r: r.gauss(a[0], a[1])),
+        "exp": (1, lambda r: r.expovariate(1.0 / a[0]) if a[0] > 0 else 0.0),
+        "lognormal": (2, lambda r: r.lognormvariate(math.log(a[0]), a[1]) if a[0] > 0 else 0.0),
+    }
+    if kind not in kinds or len(a) != kinds[kind][0]:
+        raise ValueError(f"bad latency spec: {spec!r} (fixed:MS, uniform:LO,HI, normal:MEAN,SD, "
+                         "exp:MEAN, lognormal:MEDIAN,SIGMA)")
+    fn = kinds[kind][1]
+    return lambda r: max(0.0, fn(r)) / 1000.0
+
+
+class _Limiter:
+    """Token bucket shared by every client of the server."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        if self.rate <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.at) * self.rate)
+            self.at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):   # keep bench / loadgen output clean
+        pass
+
+    # ---------- plumbing ----------
+
+    def _send(self, code: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_stream(self, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+    def _body(self) -> Optional[Dict[str, Any]]:
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return None
+
+    # ---------- routes ----------
+
+    def do_GET(self):
+        srv: MockLLMServer = self.server
+        if self.path == "/_mock/stats":
+            return self._send(200, srv.stats())
+        if self.path == "/_mock/config":
+            return self._send(200, srv.config)
+        if self.path.endswith("/models"):
+            return self._send(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+        if self.path == "/api/tags":
+            return self._send(200, {"models": [{"name": "mock"}]})
+        self._send(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        srv: MockLLMServer = self.server
+        req = self._body()
+        if req is None:
+            return self._send(400, {"error": {"message": "invalid json"}})
+        if self.path == "/_mock/config":
+            try:
+                srv.configure(**req)
+            except (TypeError, ValueError) as e:
+                return self._send(400, {"error": str(e)})
+            return self._send(200, srv.config)
+
+        openai = self.path.endswith("/chat/completions")
+        if not openai and self.path != "/api/chat":
+            return self._send(404, {"error": f"unknown path {self.path}"})
+
+        verdict = srv.admit()
+        if verdict == "rate_limited":
+            return self._send(429, {"error": {"message": "rate limit exceeded (mock)", "type": "rate_limit"}},
+                              {"Retry-After": f"{srv.config['retry_after_s']:g}"})
+        if verdict == "error":
+            code = int(srv.config["error_status"])
+            return self._send(code, {"error": {"message": f"injected error {code} (mock)", "type": "server_error"}})
+
+        model = req.get("model", "mock")
+        stream = req.get("stream", not openai)   # Ollama streams by default
+        tokens = srv.reply_tokens()
+        # honour the request's cap (OpenAI max_tokens / Ollama options.num_predict)
+        limit = req.get("max_tokens") or (req.get("options") or {}).get("num_predict")
+        if limit:
+            tokens = tokens[:max(1, int(limit))]
+        time.sleep(srv.first_token_delay())
+        gap = 1.0 / srv.config["tokens_per_s"] if srv.config["tokens_per_s"] > 0 else 0.0
+
+        try:
+            if not stream:
+                time.sleep(gap * max(0, len(tokens) - 1))
+                text = "".join(tokens)
+                if openai:
+                    self._send(200, _openai_reply(srv.next_id(), model, text, len(tokens)))
+                else:
+                    self._send(200, {"model": model, "done": True, "eval_count": len(tokens),
+                                     "message": {"role": "assistant", "content": text}})
+            elif openai:
+                rid = srv.next_id()
+                self._start_stream("text/event-stream")
+                for i, tok in enumerate(tokens):
+                    if i:
+                        time.sleep(gap)
+                    chunk = {"id": rid, "object": "chat.completion.chunk", "model": model,
+                             "choices": [{"index": 0, "delta": {"content": tok}, "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                end = {"id": rid, "object": "chat.completion.chunk", "model": model,
+                       "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+                self.wfile.write(f"data: {json.dumps(end)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+            else:
+                self._start_stream("application/x-ndjson")
+                for i, tok in enumerate(tokens):
+                    if i:
+                        time.sleep(gap)
+                    line = {"model": model, "done": False, "message": {"role": "assistant", "content": tok}}
+                    self.wfile.write((json.dumps(line) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write((json.dumps({"model": model, "done": True, "eval_count": len(tokens),
+                                              "message": {"role": "assistant", "content": ""}}) + "\n").encode("utf-8"))
+        except (BrokenPipeError, ConnectionResetError):
+            srv.count("client_gone")
+            return
+        srv.count("ok")
+
+
+def _openai_reply(rid: str, model: str, text: str, n_tokens: int) -> Dict[str, Any]:
+    return {
+        "id": rid,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": text}}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": n_tokens, "total_tokens": n_tokens},
+    }
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, **config):
+        super().__init__(addr, _Handler)
+        self._lock = threading.Lock()
+        self._counts = {"requests": 0, "ok": 0, "rate_limited": 0, "error": 0, "client_gone": 0}
+        self._ids = 0
+        self.config: Dict[str, Any] = {}
+        self.configure(**{**DEFAULTS, **config})
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def configure(self, **changes):
+        unknown = set(changes) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"unknown settings: {sorted(unknown)}")
+        cfg = {**(self.config or DEFAULTS), **changes}
+        latency = parse_latency(cfg["latency"])
+        with self._lock:
+            self.config = cfg
+            self._latency = latency
+            self._rng = random.Random(cfg["seed"])
+            self._limiter = _Limiter(float(cfg["rate_limit"]), int(cfg["burst"]))
+
+    def admit(self) -> str:
+        with self._lock:
+            self._counts["requests"] += 1
+            limiter = self._limiter
+            fail = self._rng.random() < self.config["error_rate"]
+        if not limiter.allow():
+            self.count("rate_limited")
+            return "rate_limited"
+        if fail:
+            self.count("error")
+            return "error"
+        return "ok"
+
+    def first_token_delay(self) -> float:
+        with self._lock:
+            return self._latency(self._rng)
+
+    def reply_tokens(self):
+        n = max(1, int(self.config["reply_tokens"]))
+        return [("" if i == 0 else " ") + WORDS[i % len(WORDS)] for i in range(n)]
+
+    def next_id(self) -> str:
+        with self._lock:
+            self._ids += 1
+            return f"mock-{self._ids}"
+
+    def count(self, key: str):
+        with self._lock:
+            self._counts[key] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._counts, "config": dict(self.config)}
+
+
+def start(port: int = 0, host: str = "127.0.0.1", **config) -> MockLLMServer:
+    """Run the mock on a background thread (port 0 = pick a free one)."""
+    server = MockLLMServer((host, port), **config)
+    threading.Thread(target=server.serve_forever, daemon=True, name="mock-llm").start()
+    return server
+
+
+def stop(server: Optional[MockLLMServer]):
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+
+def provider_env(url: str, providers=("lmstudio",)) -> Dict[str, str]:
+    """
+    Environment for brain/llm_client.py that routes the given providers to
+    the mock and disables the rest. Values that are set (even to "") are
+    never overridden by load_dotenv, so a developer .env can't leak in.
+    """
+    env = {
+        "GROQ_API_KEY": "", "DEEPSEEK_API_KEY": "", "OPENROUTER_API_KEY": "",
+        "LMSTUDIO_ENABLED": "false", "OLLAMA_ENABLED": "false",
+        "GROQ_BASE_URL": url,
+        "DEEPSEEK_BASE_URL": f"{url}/v1",
+        "OPENROUTER_BASE_URL": f"{url}/v1",
+        "LMSTUDIO_BASE_URL": f"{url}/v1",
+        "OLLAMA_BASE_URL": url,
+    }
+    for p in providers:
+        if p in ("groq", "deepseek", "openrouter"):
+            env[f"{p.upper()}_API_KEY"] = "mock"
+        elif p in ("lmstudio", "ollama"):
+            env[f"{p.upper()}_ENABLED"] = "true"
+        else:
+            raise ValueError(f"unknown provider: {p}")
+    return env
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8900)
+    ap.add_argument("--latency", default=DEFAULTS["latency"], help="time-to-first-token distribution (ms)")
+    ap.add_argument("--tokens-per-s", type=float, default=DEFAULTS["tokens_per_s"])
+    ap.add_argument("--reply-tokens", type=int, default=DEFAULTS["reply_tokens"])
+    ap.add_argument("--error-rate", type=float, default=DEFAULTS["error_rate"])
+    ap.add_argument("--error-status", type=int, default=DEFAULTS["error_status"])
+    ap.add_argument("--rate-limit", type=float, default=DEFAULTS["rate_limit"], help="requests/s before 429s")
+    ap.add_argument("--burst", type=int, default=DEFAULTS["burst"])
+    ap.add_argument("--retry-after", type=float, default=DEFAULTS["retry_after_s"], help="Retry-After on 429 (s)")
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args(argv)
+
+    try:
+        server = MockLLMServer(
+            (args.host, args.port),
+            latency=args.latency, tokens_per_s=args.tokens_per_s, reply_tokens=args.reply_tokens,
+            error_rate=args.error_rate, error_status=args.error_status, rate_limit=args.rate_limit,
+            burst=args.burst, retry_after_s=args.retry_after, seed=args.seed,
+        )
+    except ValueError as e:
+        ap.error(str(e))
+    print(f"mock LLM server on {server.url}  config={json.dumps(server.config)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
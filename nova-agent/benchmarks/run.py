@@ -0,0 +1,67 @@
+# benchmarks/run.py
+"""
+Run Nova's benchmark suite and store the results as JSON.
+
+    python benchmarks/run.py                    # everything, full sizes
+    python benchmarks/run.py --quick            # small sizes only (CI / laptops)
+    python benchmarks/run.py -k backup -k merge # name filters (substring)
+    python benchmarks/run.py --compare benchmarks/results/<older>.json
+
+Benchmarks live in benchmarks/bench_*.py and register with @bench (see
+harness.py). Results go to benchmarks/results/<timestamp>_<commit>.json
+unless --out is given; compare two runs with compare.py.
+"""
+import sys
+import argparse
+import importlib
+from pathlib import Path
+
+import harness
+import compare
+
+
+def discover():
+    for p in sorted(harness.BENCH_DIR.glob("bench_*.py")):
+        importlib.import_module(p.stem)
+    return harness.registered()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-k", dest="filters", action="append", default=[], help="run benches whose name contains this")
+    ap.add_argument("--quick", action="store_true", help="only the small parameter sizes")
+    ap.add_argument("--repeat", type=int, default=5, help="timed samples per bench (default 5)")
+    ap.add_argument("--out", type=Path, help="results file (default benchmarks/results/...)")
+    ap.add_argument("--compare", type=Path, help="baseline results file to compare against")
+    ap.add_argument("--threshold", type=float, default=compare.DEFAULT_THRESHOLD,
+                    help="regression threshold for --compare, as a fraction (default 0.10)")
+    ap.add_argument("--list", action="store_true", help="list benches and exit")
+    args = ap.parse_args(argv)
+
+    benches = discover()
+    if args.filters:
+        benches = [b for b in benches if any(f in b["name"] for f in args.filters)]
+    if args.list:
+        for b in benches:
+            print(f"{b['name']:<28} params={b['params']}" + (f" quick={b['quick']}" if b["quick"] else ""))
+        return 0
+    if not benches:
+        print("no benchmarks selected")
+        return 2
+
+    results = harness.run_all(benches, quick=args.quick, repeat=max(1, args.repeat))
+    out = harness.save_results(results, quick=args.quick, out=args.out)
+    print(f"\nresults: {out}")
+
+    failed = [r for r in results if "error" in r]
+    if args.compare:
+        print()
+        regressions = compare.report(harness.load_results(args.compare), harness.load_results(out),
+                                     args.threshold)
+        if regressions:
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,39 +1,43 @@
 # brain/builder_engine.py
 
-import json
 import uuid
-from datetime import datetime
 from pathlib import Path
 
 from backup_manager import create_backup
 from env_manager import capture_environment
+from workspace_manager import provision_workspace
+from workspace_lifecycle import record_provision
+import request_registry
 from .llm_client import chat_with_builder
+from .pipeline import Stage, PipelineError, run_stages
 
 # Base paths (same style as app.py)
 BASE = Path(__file__).resolve().parent.parent
 WORKSPACE = BASE / "workspace"
-REQUESTS = BASE / "requests"
 BACKUPS = BASE / "backups"
 INTEGRATED = BASE / "integrated"
 
-for d in (WORKSPACE, REQUESTS, BACKUPS):
-    d.mkdir(parents=True, exist_ok=True)
-
 
 def run_builder_pipeline(
     instruction: str,
     existing_request_id: str | None = None,
+    progress=None,
 ) -> dict:
     """
     First version of the Builder workflow.
 
     For now it:
       - creates or reuses a request_id
-      - creates a workspace folder
+      - creates a workspace folder seeded from integrated/
       - creates a zip backup of integrated/
       - captures environment metadata
       - asks the LLM for a build plan / strategy
 
+    These run as a small DAG (see brain/pipeline.py): the LLM plan needs
+    none of the other steps, and workspace / backup / env capture don't
+    depend on each other, so all four overlap. The record is written last
+    and carries per-stage timings.
+
     Later we will extend this to:
       - fetch relevant files
       - ask LLM for concrete file patches
@@ -41,58 +45,98 @@ def run_builder_pipeline(
       - run tests
       - auto-fix loop
       - ask for merge approval
+
+    `progress(stage, message)` is called as each step starts when given
+    (background jobs use it to report where the build is).
     """
     instruction = (instruction or "").strip()
     if not instruction:
         raise ValueError("instruction is required")
 
     request_id = existing_request_id or uuid.uuid4().hex[:8]
-
-    # 1) Workspace
+    progress = progress or (lambda stage, message="", **info: None)
     ws = WORKSPACE / request_id
-    ws.mkdir(parents=True, exist_ok=True)
+    # same folder create_backup() writes into, known up front so env
+    # capture doesn't have to wait for the zip
+    backup_dir = BACKUPS / request_id
+
+    # 1) Workspace (cheap copy-on-write seed of integrated/)
+    def stage_workspace(done):
+        progress("workspace", "seeding workspace from integrated/")
+        provision = provision_workspace(request_id, source=INTEGRATED)
+        record_provision(request_id, provision)
+        return provision
 
     # 2) Backup integrated/ before changes
-    backup_meta = create_backup(
-        request_id=request_id,
-        targets=[],
-        repo_root=INTEGRATED,
-        note=f"auto-build backup for: {instruction}",
-    )
+    def stage_backup(done):
+        progress("backup", "zipping integrated/")
+        return create_backup(
+            request_id=request_id,
+            targets=[],
+            repo_root=INTEGRATED,
+            note=f"auto-build backup for: {instruction}",
+        )
 
     # 3) Capture environment metadata
-    backup_dir = Path(backup_meta["zip_path"]).parent
-    env_meta = capture_environment(
-        request_id=request_id,
-        dest_dir=backup_dir,
-    )
-
-    # 4) Save a lightweight builder record
-    record = {
-        "request_id": request_id,
-        "instruction": instruction,
-        "workspace": str(ws),
-        "backup": backup_meta,
-        "env_meta": env_meta,
-        "created": datetime.utcnow().isoformat(),
-        "status": "planned",
+    def stage_environment(done):
+        progress("environment", "capturing pip/python/node metadata")
+        return capture_environment(
+            request_id=request_id,
+            dest_dir=backup_dir,
+        )
+
+    # 4) Ask LLM for a build plan / strategy (no code yet)
+    #    We treat this as a builder_planning intent.
+    def stage_plan(done):
+        progress("plan", "asking the LLM for a build plan")
+        return chat_with_builder(
+            user_text=instruction,
+            intent="builder_plan",
+            history=[],
+        )
+
+    try:
+        run = run_stages([
+            Stage("workspace", stage_workspace),
+            Stage("backup", stage_backup),
+            Stage("environment", stage_environment),
+            Stage("plan", stage_plan),
+        ])
+    except PipelineError as e:
+        # keep what finished (and how long it took) next to the failure
+        request_registry.record(
+            request_id, "builder",
+            status="failed",
+            kind="builder",
+            instruction=instruction,
+            workspace=str(ws),
+            data={"error": str(e), "failed_stage": e.stage, "timings": {"stages": e.timings}},
+            info={"failed_stage": e.stage, "error": str(e.error)},
+        )
+        raise
+    results = run["results"]
+    provision = results["workspace"]
+    backup_meta = results["backup"]
+    env_meta = results["environment"]
+    plan_text = results["plan"]
+
+    # 5) Save a lightweight builder record (with stage timings)
+    timings = {
+        "stages": run["timings"],
+        "total_ms": run["total_ms"],
+        "sum_of_stages_ms": sum(t["duration_ms"] for t in run["timings"].values()),
     }
-    (REQUESTS / f"{request_id}.builder.json").write_text(
-        json.dumps(record, indent=2),
-        encoding="utf-8",
+    request_registry.record(
+        request_id, "builder",
+        status="planned",
+        kind="builder",
+        instruction=instruction,
+        workspace=str(ws),
+        backup_id=backup_meta.get("backup_id"),
+        data={"provision": provision, "backup": backup_meta, "env_meta": env_meta, "timings": timings},
+        info={"total_ms": run["total_ms"]},
     )
 
-    # 5) Ask LLM for a build plan / strategy (no code yet)
-    #    We treat this as a builder_planning intent.
-    history: list[dict] = []
-    intent = "builder_plan"
-
-    plan_text = chat_with_builder(
-        text=instruction,
-        intent=intent,
-        history=history,
-   )
-
     return {
         "request_id": request_id,
         "instruction": instruction,
@@ -100,4 +144,6 @@ def run_builder_pipeline(
         "backup": backup_meta,
         "env_meta": env_meta,
         "workspace": str(ws),
-    }
\ No newline at end of file
+        "provision": provision,
+        "timings": timings,
+    }
@@ -1,12 +1,16 @@
 # brain/llm_client.py
 import os
+import time
 import logging
+import threading
 from typing import List, Dict, Any, Optional
 
 import httpx
-from groq import Groq
 from dotenv import load_dotenv
 
+from tracing import span, traced
+from . import llm_routing
+
 # --------------------------------------------------
 # LOAD .env FIRST
 # --------------------------------------------------
@@ -27,15 +31,18 @@ log.setLevel(logging.INFO)
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_MODEL_FAST = os.getenv("GROQ_MODEL_FAST", "llama-3.1-8b-instant")
 GROQ_MODEL_SMART = os.getenv("GROQ_MODEL_SMART", "llama-3.3-70b-versatile")  # Updated model
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None  # None = SDK default (api.groq.com)
 
 # ---- DeepSeek (SECONDARY) ----
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
 DEEPSEEK_MODEL_CHAT = os.getenv("DEEPSEEK_MODEL", "deepseek-chat")
 DEEPSEEK_MODEL_REASON = os.getenv("DEEPSEEK_REASON_MODEL", "deepseek-reasoner")
+DEEPSEEK_BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com/v1")
 
 # ---- OpenRouter (THIRD) ----
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "deepseek/deepseek-chat")
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
 
 # ---- LM Studio (LOCAL TIER-4) ----
 LMSTUDIO_ENABLED = os.getenv("LMSTUDIO_ENABLED", "false").lower() == "true"
@@ -52,6 +59,8 @@ OLLAMA_MODEL_SMART = os.getenv("OLLAMA_MODEL_SMART", "llama3.1:8b")
 # ---- Behavior Flags ----
 FORCE_LOCAL_FOR_HEAVY = os.getenv("FORCE_LOCAL_FOR_HEAVY", "false").lower() == "true"
 TIER3_LLM_OVERRIDE = os.getenv("TIER3_LLM_OVERRIDE", "").strip().lower()
+# order providers within each tier by measured latency / errors (brain/llm_routing.py)
+ADAPTIVE_ROUTING = os.getenv("NOVA_ADAPTIVE_ROUTING", "true").lower() == "true"
 
 # ---- Provider Availability ----
 HAS_GROQ = bool(GROQ_API_KEY)
@@ -60,11 +69,37 @@ HAS_OPENROUTER = bool(OPENROUTER_API_KEY)
 HAS_LMSTUDIO = LMSTUDIO_ENABLED
 HAS_OLLAMA = OLLAMA_ENABLED
 
-if not (HAS_GROQ or HAS_DEEPSEEK or HAS_OPENROUTER or HAS_LMSTUDIO or HAS_OLLAMA):
-    raise ValueError("❌ No LLM provider configured in .env")
+HAS_ANY_PROVIDER = HAS_GROQ or HAS_DEEPSEEK or HAS_OPENROUTER or HAS_LMSTUDIO or HAS_OLLAMA
+
+# not fatal at import: the server still starts (and /ready says why chat can't work)
+if not HAS_ANY_PROVIDER:
+    log.warning("❌ No LLM provider configured in .env")
+
+# Groq client, built on first use (the SDK import is the slow part)
+groq_client = None
+_groq_lock = threading.Lock()
+
+
+def get_groq_client():
+    global groq_client
+    if groq_client is None and HAS_GROQ:
+        with _groq_lock:
+            if groq_client is None:
+                from groq import Groq
+                groq_client = Groq(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL)
+    return groq_client
 
-# Groq client
-groq_client: Optional[Groq] = Groq(api_key=GROQ_API_KEY) if HAS_GROQ else None
+
+def warmup() -> Dict[str, Any]:
+    """Build provider clients ahead of the first chat (app lifespan)."""
+    get_groq_client()
+    return {"providers": configured_providers(), "groq_client": groq_client is not None}
+
+
+def configured_providers() -> List[str]:
+    flags = [("groq", HAS_GROQ), ("deepseek", HAS_DEEPSEEK), ("openrouter", HAS_OPENROUTER),
+             ("lmstudio", HAS_LMSTUDIO), ("ollama", HAS_OLLAMA)]
+    return [name for name, on in flags if on]
 
 # --------------------------------------------------
 # ROLE NORMALIZATION
@@ -97,53 +132,73 @@ def is_heavy_code(user_text: str, intent: Optional[str]) -> bool:
 # --------------------------------------------------
 # PROVIDER CALLS
 # --------------------------------------------------
-def call_groq(model: str, messages: List[Dict[str, str]]) -> str:
-    if not groq_client:
+# max_tokens caps the generation (diagnostic probes send 1); timeout
+# overrides the provider default in seconds.
+def _openai_payload(model: str, messages: List[Dict[str, str]], max_tokens: Optional[int]) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {"model": model, "messages": messages}
+    if max_tokens is not None:
+        payload["max_tokens"] = max_tokens
+    return payload
+
+
+def call_groq(model: str, messages: List[Dict[str, str]],
+              max_tokens: Optional[int] = None, timeout: Optional[float] = None) -> str:
+    client = get_groq_client()
+    if not client:
         raise RuntimeError("Groq client not loaded")
 
     log.info(f"[LLM] Groq → {model}")
 
-    resp = groq_client.chat.completions.create(
+    extra: Dict[str, Any] = {}
+    if max_tokens is not None:
+        extra["max_tokens"] = max_tokens
+    if timeout is not None:
+        extra["timeout"] = timeout
+    resp = client.chat.completions.create(
         model=model,
         messages=messages,
         temperature=0.3,
+        **extra,
     )
     return resp.choices[0].message.content
 
 
-def call_deepseek(model: str, messages: List[Dict[str, str]]) -> str:
-    url = "https://api.deepseek.com/v1/chat/completions"
+def call_deepseek(model: str, messages: List[Dict[str, str]],
+                  max_tokens: Optional[int] = None, timeout: Optional[float] = None) -> str:
+    url = f"{DEEPSEEK_BASE_URL.rstrip('/')}/chat/completions"
     headers = {
         "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
         "Content-Type": "application/json",
     }
-    payload = {"model": model, "messages": messages, "stream": False}
+    payload = {**_openai_payload(model, messages, max_tokens), "stream": False}
 
     log.info(f"[LLM] DeepSeek → {model}")
-    r = httpx.post(url, headers=headers, json=payload, timeout=60)
+    r = httpx.post(url, headers=headers, json=payload, timeout=timeout or 60)
     r.raise_for_status()
 
     return r.json()["choices"][0]["message"]["content"]
 
 
-def call_openrouter(model: str, messages: List[Dict[str, str]]) -> str:
-    url = "https://openrouter.ai/api/v1/chat/completions"
+def call_openrouter(model: str, messages: List[Dict[str, str]],
+                    max_tokens: Optional[int] = None, timeout: Optional[float] = None) -> str:
+    url = f"{OPENROUTER_BASE_URL.rstrip('/')}/chat/completions"
     headers = {
         "Authorization": f"Bearer {OPENROUTER_API_KEY}",
         "Content-Type": "application/json",
         "HTTP-Referer": "https://nova.local",
         "X-Title": "Nova Builder+Agent",
     }
-    payload = {"model": model, "messages": messages}
+    payload = _openai_payload(model, messages, max_tokens)
 
     log.info(f"[LLM] OpenRouter → {model}")
-    r = httpx.post(url, headers=headers, json=payload, timeout=60)
+    r = httpx.post(url, headers=headers, json=payload, timeout=timeout or 60)
     r.raise_for_status()
 
     return r.json()["choices"][0]["message"]["content"]
 
 
-def call_lmstudio(model: str, messages: List[Dict[str, str]]) -> str:
+def call_lmstudio(model: str, messages: List[Dict[str, str]],
+                  max_tokens: Optional[int] = None, timeout: Optional[float] = None) -> str:
     base = LMSTUDIO_BASE_URL.rstrip("/")
     url = f"{base}/chat/completions"
 
@@ -151,26 +206,50 @@ def call_lmstudio(model: str, messages: List[Dict[str, str]]) -> str:
     if LMSTUDIO_API_KEY:
         headers["Authorization"] = f"Bearer {LMSTUDIO_API_KEY}"
 
-    payload = {"model": model, "messages": messages}
+    payload = _openai_payload(model, messages, max_tokens)
 
     log.info(f"[LLM] LMStudio → {model}")
-    r = httpx.post(url, headers=headers, json=payload, timeout=120)
+    r = httpx.post(url, headers=headers, json=payload, timeout=timeout or 120)
     r.raise_for_status()
 
     return r.json()["choices"][0]["message"]["content"]
 
 
-def call_ollama(model: str, messages: List[Dict[str, str]]) -> str:
+def call_ollama(model: str, messages: List[Dict[str, str]],
+                max_tokens: Optional[int] = None, timeout: Optional[float] = None) -> str:
     url = f"{OLLAMA_BASE_URL.rstrip('/')}/api/chat"
-    payload = {"model": model, "messages": messages}
+    # /api/chat streams NDJSON unless told otherwise
+    payload: Dict[str, Any] = {"model": model, "messages": messages, "stream": False}
+    if max_tokens is not None:
+        payload["options"] = {"num_predict": max_tokens}
 
     log.info(f"[LLM] Ollama → {model}")
-    r = httpx.post(url, json=payload, timeout=120)
+    r = httpx.post(url, json=payload, timeout=timeout or 120)
     r.raise_for_status()
 
     data = r.json()
     return data.get("message", {}).get("content") or data["choices"][0]["message"]["content"]
 
+def _model_for(provider: str, variant: str) -> str:
+    if provider == "groq":
+        return GROQ_MODEL_SMART if variant == "smart" else GROQ_MODEL_FAST
+    if provider == "deepseek":
+        return DEEPSEEK_MODEL_REASON if variant == "reason" else DEEPSEEK_MODEL_CHAT
+    if provider == "openrouter":
+        return OPENROUTER_MODEL
+    if provider == "lmstudio":
+        return LMSTUDIO_MODEL
+    return OLLAMA_MODEL_SMART if variant == "smart" else OLLAMA_MODEL_FAST
+
+
+PROVIDER_CALLS = {
+    "groq": call_groq,
+    "deepseek": call_deepseek,
+    "openrouter": call_openrouter,
+    "lmstudio": call_lmstudio,
+    "ollama": call_ollama,
+}
+
 # --------------------------------------------------
 # BUILD MESSAGES
 # --------------------------------------------------
@@ -197,6 +276,17 @@ def build_messages(user_text: str, history: List[Dict[str, Any]]) -> List[Dict[s
 # --------------------------------------------------
 # MAIN ROUTER
 # --------------------------------------------------
+def _describe(candidate, sc: Optional[Dict[str, Any]]) -> str:
+    name = f"{candidate[0]}/{candidate[1]}"
+    if not sc:
+        return name
+    out = f"{name}(score={sc['score']}s lat={sc['latency_s']}s err={sc['error_rate']:.0%} n={sc['calls']}"
+    if sc["backoff_s"]:
+        out += f" backoff={sc['backoff_s']}s"
+    return out + ")"
+
+
+@traced("llm.chat")
 def chat_with_builder(user_text: str, intent: Optional[str], history: List[Dict[str, Any]]) -> str:
     messages = build_messages(user_text, history)
     heavy = is_heavy_code(user_text, intent)
@@ -224,6 +314,14 @@ def chat_with_builder(user_text: str, intent: Optional[str], history: List[Dict[
     if HAS_OPENROUTER:
         remote.append(("openrouter", "smart"))
 
+    # Within each tier, fastest expected answer first (rate-limited providers last)
+    if ADAPTIVE_ROUTING:
+        remote, remote_scores = llm_routing.order(remote, _model_for)
+        local, local_scores = llm_routing.order(local, _model_for)
+        scores = {**remote_scores, **local_scores}
+    else:
+        scores = {}
+
     # Routing logic
     candidates = []
 
@@ -237,30 +335,25 @@ def chat_with_builder(user_text: str, intent: Optional[str], history: List[Dict[
         provider = TIER3_LLM_OVERRIDE
         candidates.sort(key=lambda x: 0 if x[0] == provider else 1)
 
+    if scores:
+        log.info("[ROUTER] order: " + " > ".join(_describe(c, scores.get(f"{c[0]}/{c[1]}")) for c in candidates))
+
     # Run pipeline
     last_error = None
+    if not candidates:
+        last_error = "no LLM provider configured in .env"
 
     for provider, variant in candidates:
+        model = _model_for(provider, variant)
+        t0 = time.perf_counter()
         try:
-            if provider == "groq":
-                model = GROQ_MODEL_SMART if variant == "smart" else GROQ_MODEL_FAST
-                return call_groq(model, messages)
-
-            elif provider == "deepseek":
-                model = DEEPSEEK_MODEL_REASON if variant == "reason" else DEEPSEEK_MODEL_CHAT
-                return call_deepseek(model, messages)
-
-            elif provider == "openrouter":
-                return call_openrouter(OPENROUTER_MODEL, messages)
-
-            elif provider == "lmstudio":
-                return call_lmstudio(LMSTUDIO_MODEL, messages)
-
-            elif provider == "ollama":
-                m = OLLAMA_MODEL_SMART if variant == "smart" else OLLAMA_MODEL_FAST
-                return call_ollama(m, messages)
+            with span("llm.call", provider=provider, variant=variant):
+                reply = PROVIDER_CALLS[provider](model, messages)
+            llm_routing.record_success(provider, model, time.perf_counter() - t0)
+            return reply
 
         except Exception as e:
+            llm_routing.record_failure(provider, model, time.perf_counter() - t0, e)
             last_error = e
             log.error(f"[LLM ROUTER] Provider {provider}/{variant} failed: {e}")
 
@@ -0,0 +1,179 @@
+# brain/llm_diagnostics.py
+import os
+import time
+import threading
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import executors
+from tracing import span
+from . import llm_client as llm
+
+# the whole diagnosis finishes within this many seconds; slower probes report TIMEOUT
+DEADLINE_S = float(os.getenv("NOVA_DIAG_DEADLINE_S", "15"))
+# a report younger than this is served from cache (force=true re-probes)
+CACHE_S = float(os.getenv("NOVA_DIAG_CACHE_S", "60"))
+# tokens a probe asks for: enough to see connect + first token, not a full answer
+PROBE_MAX_TOKENS = int(os.getenv("NOVA_DIAG_MAX_TOKENS", "1"))
+
+TEST_MESSAGE = [{"role": "user", "content": "Diagnostic test"}]
+
+_run_lock = threading.Lock()   # guards _last / _current, never held while streaming
+_last: Optional[Dict[str, Any]] = None
+_current: Optional["_Diagnosis"] = None   # the diagnosis in flight, shared by its callers
+
+
+def _probes() -> List[Tuple[str, bool, Any, str]]:
+    """(name, enabled, call, model) in the order the report lists them."""
+    return [
+        ("groq_fast", llm.HAS_GROQ, llm.call_groq, llm.GROQ_MODEL_FAST),
+        ("groq_smart", llm.HAS_GROQ, llm.call_groq, llm.GROQ_MODEL_SMART),
+        ("deepseek_chat", llm.HAS_DEEPSEEK, llm.call_deepseek, llm.DEEPSEEK_MODEL_CHAT),
+        ("deepseek_reason", llm.HAS_DEEPSEEK, llm.call_deepseek, llm.DEEPSEEK_MODEL_REASON),
+        ("openrouter", llm.HAS_OPENROUTER, llm.call_openrouter, llm.OPENROUTER_MODEL),
+        ("lmstudio", llm.HAS_LMSTUDIO, llm.call_lmstudio, llm.LMSTUDIO_MODEL),
+        ("ollama_fast", llm.HAS_OLLAMA, llm.call_ollama, llm.OLLAMA_MODEL_FAST),
+        ("ollama_smart", llm.HAS_OLLAMA, llm.call_ollama, llm.OLLAMA_MODEL_SMART),
+    ]
+
+
+def _probe(name: str, call, model: str, timeout: float) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        with span("llm.probe", provider=name.split("_")[0], model=model):
+            call(model, TEST_MESSAGE, max_tokens=PROBE_MAX_TOKENS, timeout=timeout)
+        return {"status": "PASS", "model": model, "latency_ms": int((time.perf_counter() - start) * 1000)}
+    except Exception as e:
+        return {"status": "FAIL", "model": model, "error": str(e),
+                "latency_ms": int((time.perf_counter() - start) * 1000)}
+
+
+def _probe_all(deadline_s: float) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Start every enabled probe at once on the llm executor pool and yield
+    (name, result) as each one lands. Whatever is still running at the
+    deadline is reported as TIMEOUT (its thread ends at its own timeout).
+    """
+    end = time.monotonic() + deadline_s
+    pending = {}
+    for name, enabled, call, model in _probes():
+        if not enabled:
+            yield name, {"status": "DISABLED"}
+            continue
+        try:
+            pending[executors.submit("llm", _probe, name, call, model, deadline_s)] = name
+        except executors.PoolSaturated as e:
+            yield name, {"status": "FAIL", "model": model, "error": str(e)}
+
+    while pending:
+        left = end - time.monotonic()
+        if left <= 0:
+            break
+        done, _ = wait(pending, timeout=left, return_when=FIRST_COMPLETED)
+        for fut in done:
+            yield pending.pop(fut), fut.result()
+
+    for fut, name in pending.items():
+        fut.cancel()
+        yield name, {"status": "TIMEOUT", "error": f"no answer within the {deadline_s:g}s deadline"}
+
+
+def _fresh() -> Optional[Dict[str, Any]]:
+    if _last is not None and time.time() - _last["finished_at"] < CACHE_S:
+        return {**_last, "cached": True, "age_s": round(time.time() - _last["finished_at"], 1)}
+    return None
+
+
+class _Diagnosis:
+    """
+    One probe run on its own thread. Its events are kept in a list that
+    any number of callers follow at their own pace, so a slow or gone
+    client never holds up the probes or anyone else.
+    """
+
+    def __init__(self, deadline_s: float):
+        self.deadline_s = deadline_s
+        self.events: List[Tuple[str, Dict[str, Any]]] = []
+        self.done = False
+        self._cond = threading.Condition()
+        ctx = contextvars.copy_context()   # probe spans nest under the caller's trace
+        threading.Thread(target=ctx.run, args=(self._run,), daemon=True, name="nova-diagnose").start()
+
+    def _emit(self, event: str, data: Dict[str, Any]):
+        with self._cond:
+            self.events.append((event, data))
+            self._cond.notify_all()
+
+    def _run(self):
+        global _last, _current
+        started = time.time()
+        results: Dict[str, Dict[str, Any]] = {}
+        try:
+            for name, res in _probe_all(self.deadline_s):
+                results[name] = res
+                self._emit("probe", {"provider": name, **res})
+        finally:
+            order = [p[0] for p in _probes()]
+            report = {
+                "providers": {name: results[name] for name in order if name in results},
+                "started_at": started,
+                "finished_at": time.time(),
+                "duration_ms": int((time.time() - started) * 1000),
+                "deadline_s": self.deadline_s,
+                "max_tokens": PROBE_MAX_TOKENS,
+            }
+            with _run_lock:
+                _last = report
+                if _current is self:
+                    _current = None
+            self._emit("report", {**report, "cached": False, "age_s": 0.0})
+            with self._cond:
+                self.done = True
+                self._cond.notify_all()
+
+    def follow(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Every event from the first, waiting for new ones until the report."""
+        i = 0
+        while True:
+            with self._cond:
+                while i >= len(self.events) and not self.done:
+                    self._cond.wait()
+                batch = self.events[i:]
+                finished = self.done
+            i += len(batch)
+            yield from batch
+            if finished and i >= len(self.events):
+                return
+
+
+def stream(force: bool = False, deadline_s: Optional[float] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    ("probe", {"provider", **result}) per provider as results land, then
+    ("report", full report). A fresh cached report is replayed instead of
+    probing again unless `force`; a diagnosis already in flight is joined
+    and shared rather than started twice.
+    """
+    global _current
+    with _run_lock:
+        report = None if force else _fresh()
+        if report is None:
+            if _current is None:
+                _current = _Diagnosis(DEADLINE_S if deadline_s is None else deadline_s)
+            diagnosis = _current
+
+    if report is not None:
+        for name, res in report["providers"].items():
+            yield "probe", {"provider": name, **res}
+        yield "report", report
+        return
+    yield from diagnosis.follow()
+
+
+def run(force: bool = False, deadline_s: Optional[float] = None) -> Dict[str, Any]:
+    """The full report ({"providers": {name: result}, timings, cached, age_s})."""
+    report: Dict[str, Any] = {}
+    for event, data in stream(force=force, deadline_s=deadline_s):
+        if event == "report":
+            report = data
+    return report
@@ -0,0 +1,157 @@
+# brain/llm_routing.py
+import os
+import time
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+log = logging.getLogger("nova.llm")
+
+# observations lose half their weight every HALF_LIFE_S seconds, so the
+# router follows providers that speed up or slow down over the day
+HALF_LIFE_S = float(os.getenv("NOVA_ROUTER_HALF_LIFE_S", "600"))
+# what an unmeasured provider is assumed to take (weight of one observation).
+# 0 is optimistic on purpose: new or long-idle providers get tried, and so
+# measured, instead of staying behind whichever one answered first
+PRIOR_LATENCY_S = float(os.getenv("NOVA_ROUTER_PRIOR_LATENCY_S", "0"))
+# extra time a failed attempt costs before the next candidate answers
+ERROR_PENALTY_S = float(os.getenv("NOVA_ROUTER_ERROR_PENALTY_S", "10"))
+# 429 without Retry-After: back off BACKOFF_BASE_S, doubling per repeat, up to BACKOFF_MAX_S
+BACKOFF_BASE_S = float(os.getenv("NOVA_ROUTER_BACKOFF_BASE_S", "5"))
+BACKOFF_MAX_S = float(os.getenv("NOVA_ROUTER_BACKOFF_MAX_S", "300"))
+
+Candidate = Tuple[str, str]   # (provider, variant)
+
+_lock = threading.Lock()
+# (provider, model) -> decayed latency / error stats
+_stats: Dict[Tuple[str, str], Dict[str, float]] = {}
+# provider -> {"until": epoch, "strikes": n}; rate limits are per account, not per model
+_backoff: Dict[str, Dict[str, float]] = {}
+
+
+# ---------- stats ----------
+
+def _decay(s: Dict[str, float], now: float):
+    f = 0.5 ** (max(0.0, now - s["at"]) / HALF_LIFE_S) if HALF_LIFE_S > 0 else 1.0
+    s["weight"] *= f
+    s["at"] = now
+
+
+def _observe(provider: str, model: str, latency_s: float, error: bool):
+    now = time.time()
+    with _lock:
+        s = _stats.get((provider, model))
+        if s is None:
+            s = _stats[(provider, model)] = {"weight": 0.0, "latency": 0.0, "errors": 0.0,
+                                             "calls": 0, "at": now}
+        _decay(s, now)
+        w = s["weight"]
+        # a failure's latency says little about a successful answer
+        if not error:
+            ok_w = w * (1 - s["errors"])
+            s["latency"] = (s["latency"] * ok_w + latency_s) / (ok_w + 1)
+        s["errors"] = (s["errors"] * w + (1.0 if error else 0.0)) / (w + 1)
+        s["weight"] = w + 1
+        s["calls"] += 1
+
+
+def _retry_after(exc: BaseException) -> Tuple[Optional[int], Optional[float]]:
+    """HTTP status and Retry-After seconds of a provider error (httpx or SDK), if any."""
+    resp = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(resp, "status_code", None)
+    value = resp.headers.get("retry-after") if resp is not None and hasattr(resp, "headers") else None
+    if not value:
+        return status, None
+    try:
+        return status, max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return status, max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return status, None
+
+
+def record_success(provider: str, model: str, latency_s: float):
+    _observe(provider, model, latency_s, error=False)
+    with _lock:
+        _backoff.pop(provider, None)
+
+
+def record_failure(provider: str, model: str, latency_s: float, exc: BaseException):
+    """Count the error; on 429 also keep the provider back for Retry-After (or an exponential backoff)."""
+    status, retry_after = _retry_after(exc)
+    _observe(provider, model, latency_s, error=True)
+    if status != 429:
+        return
+    with _lock:
+        b = _backoff.setdefault(provider, {"until": 0.0, "strikes": 0})
+        b["strikes"] += 1
+        wait = retry_after if retry_after is not None else min(
+            BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** (b["strikes"] - 1))
+        b["until"] = time.time() + wait
+    log.warning(f"[LLM ROUTER] {provider} rate limited (429); backing off {wait:.1f}s")
+
+
+# ---------- scoring ----------
+
+def _estimate(provider: str, model: str, now: float) -> Dict[str, Any]:
+    with _lock:
+        s = dict(_stats.get((provider, model)) or {"weight": 0.0, "latency": 0.0, "errors": 0.0,
+                                                   "calls": 0, "at": now})
+        b = _backoff.get(provider)
+        backoff_s = max(0.0, b["until"] - now) if b else 0.0
+    _decay(s, now)
+    w = s["weight"]
+    ok_w = w * (1 - s["errors"])
+    latency = (s["latency"] * ok_w + PRIOR_LATENCY_S) / (ok_w + 1)
+    errors = s["errors"] * w / (w + 1)
+    return {
+        "latency_s": round(latency, 3),
+        "error_rate": round(errors, 3),
+        # expected time to an answer from this candidate
+        "score": round(latency + errors * ERROR_PENALTY_S, 3),
+        "backoff_s": round(backoff_s, 1),
+        "calls": s["calls"],
+    }
+
+
+def order(tier: List[Candidate], model_of) -> Tuple[List[Candidate], Dict[str, Dict[str, Any]]]:
+    """
+    Reorder one tier by expected time-to-answer. Providers are ranked by
+    the score of their preferred variant, and a provider's variants keep
+    their rule-based order (reason before chat for heavy work). Providers
+    backing off after a 429 go last, soonest-available first. Ties keep
+    the static order, so with no data yet nothing changes.
+    """
+    now = time.time()
+    scores = {f"{p}/{v}": _estimate(p, model_of(p, v), now) for p, v in tier}
+    rank: Dict[str, Tuple[int, float, float]] = {}
+    for p, v in tier:
+        if p not in rank:
+            sc = scores[f"{p}/{v}"]
+            rank[p] = (1, sc["backoff_s"], sc["score"]) if sc["backoff_s"] > 0 else (0, 0.0, sc["score"])
+    pos = {c: i for i, c in enumerate(tier)}
+    return sorted(tier, key=lambda c: (rank[c[0]], pos[c])), scores
+
+
+def snapshot() -> Dict[str, Any]:
+    now = time.time()
+    with _lock:
+        keys = list(_stats)
+        providers = set(_backoff)
+    out = {f"{p}/{m}": _estimate(p, m, now) for p, m in keys}
+    return {
+        "models": out,
+        "backoff": {p: _estimate(p, "", now)["backoff_s"] for p in sorted(providers)},
+        "half_life_s": HALF_LIFE_S,
+        "prior_latency_s": PRIOR_LATENCY_S,
+        "error_penalty_s": ERROR_PENALTY_S,
+    }
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _backoff.clear()
@@ -1,96 +1,134 @@
 # brain/nlu_engine.py
 
-from sentence_transformers import SentenceTransformer, util
 from typing import Dict, Any
-import torch
+import os
+import time
+import logging
+import threading
+
+from .nlu_engine_basic import INTENT_EXAMPLES, extra_flags
 from .nlu_engine_basic import parse_user_message as fallback_engine
 
-# Load model ONCE
-model = SentenceTransformer("all-MiniLM-L6-v2")
-
-# --- define semantic intent categories ---
-INTENT_EXAMPLES = {
-    "research": [
-        "research this", "search online", "google it", "find info",
-        "internet search", "net pe dekh", "check on web", "look up"
-    ],
-    "advise": [
-        "suggest something", "what should we add", "improve system",
-        "kuch aur add kar", "any new features", "how to improve"
-    ],
-    "dependencies": [
-        "missing module", "dependency issue", "packages check",
-        "requirements problem", "import error"
-    ],
-    "performance": [
-        "system slow", "optimize", "speed up", "lag ho raha",
-        "performance improve"
-    ],
-    "run_tests": [
-        "run tests", "execute test", "syntax check", "validate code"
-    ],
-    "merge": [
-        "apply changes", "merge it", "final kar", "commit work"
-    ],
-    "safety": [
-        "backup", "rollback", "restore", "safe rakhna"
-    ],
-    "chat": [
-        "talk", "chat", "explain", "help me understand"
-    ]
-}
-
-# Convert to embeddings
-INTENT_EMBED = {
-    intent: model.encode(examples, convert_to_tensor=True)
-    for intent, examples in INTENT_EXAMPLES.items()
-}
+log = logging.getLogger("nova.nlu")
+if not log.handlers:
+    import sys
+    h = logging.StreamHandler(sys.stdout)
+    h.setFormatter(logging.Formatter("[%(levelname)s] [NLU] %(message)s"))
+    log.addHandler(h)
+log.setLevel(logging.INFO)
+
+MODEL_NAME = os.getenv("NOVA_NLU_MODEL", "all-MiniLM-L6-v2")
+MIN_CONFIDENCE = 0.35
+
+# --------------------------------------------------
+# SEMANTIC MODEL (LOADED ON FIRST USE / BY WARMUP)
+# --------------------------------------------------
+# sentence-transformers pulls in torch, which takes seconds to import, so
+# nothing heavy happens at import time: the app lifespan calls warmup()
+# in the background, and until it finishes detect_intent() answers with
+# the rule-based engine instead of waiting.
+
+_lock = threading.Lock()
+_state: Dict[str, Any] = {"status": "cold", "model": MODEL_NAME, "load_ms": None, "error": None}
+_sem_model = None
+_cos_sim = None
+INTENT_EMBED: Dict[str, Any] = {}
+
+
+def _load():
+    global _sem_model, _cos_sim, INTENT_EMBED
+    with _lock:
+        if _state["status"] in ("ready", "failed"):
+            return
+        _state["status"] = "loading"
+        t0 = time.perf_counter()
+        try:
+            from sentence_transformers import SentenceTransformer, util
+
+            model = SentenceTransformer(MODEL_NAME)
+            embed = {
+                intent: model.encode(examples, convert_to_tensor=True)
+                for intent, examples in INTENT_EXAMPLES.items()
+            }
+        except Exception as e:
+            log.error(f"Failed to load semantic NLU model, falling back to basic NLU only: {e}")
+            _state.update(status="failed", error=str(e))
+            return
+        _sem_model, _cos_sim, INTENT_EMBED = model, util.cos_sim, embed
+        _state.update(status="ready", load_ms=int((time.perf_counter() - t0) * 1000))
+        log.info(f"Loaded SentenceTransformer: {MODEL_NAME} ({_state['load_ms']} ms)")
+
+
+def warmup() -> Dict[str, Any]:
+    """
+    Load the model and intent embeddings now (blocking); returns status().
+    Raises RuntimeError if it can't be loaded (detect_intent keeps working
+    on the basic engine).
+    """
+    _load()
+    if _state["status"] == "failed":
+        raise RuntimeError(f"semantic NLU unavailable: {_state['error']}")
+    return status()
 
 
-def detect_intent(text: str) -> Dict[str, Any]:
+def status() -> Dict[str, Any]:
+    return dict(_state)
 
+
+# --------------------------------------------------
+# MAIN FUNCTION
+# --------------------------------------------------
+def detect_intent(text: str) -> Dict[str, Any]:
     """
     Hybrid NLU:
-      1. Semantic intent detection using embeddings
-      2. Rule engine fallback if confidence is too low
+      1. Try semantic intent clustering (SentenceTransformer).
+      2. If model not loaded or low confidence → fall back to basic engine.
     """
 
     q = (text or "").strip()
     if not q:
-        return {"intent": "chat", "needs_internet": False, "deep_research": False}
+        return {
+            "intent": "chat",
+            "confidence": 0.0,
+            "needs_internet": False,
+            "deep_research": False,
+        }
+
+    # never used (no lifespan, e.g. scripts): load inline once
+    if _state["status"] == "cold":
+        _load()
+
+    # 1) Model loading in the background, or unavailable → basic engine
+    if _state["status"] != "ready":
+        return fallback_engine(q)
 
-    # Semantic embedding
-    q_emb = model.encode([q], convert_to_tensor=True)
+    # 2) Semantic scoring
+    q_emb = _sem_model.encode([q], convert_to_tensor=True)
 
     best_intent = None
-    best_score = -1
+    best_score = -1.0
 
-    # Compare with each intent cluster
     for intent, emb_list in INTENT_EMBED.items():
-        score = util.cos_sim(q_emb, emb_list).max().item()
-
+        score = float(_cos_sim(q_emb, emb_list).max().item())
         if score > best_score:
             best_score = score
             best_intent = intent
 
-    # If low confidence, fallback to basic engine
-    if best_score < 0.35:   # threshold tuned for beginners
-        return fallback_engine(q)
-
-    # --- extra flags ---
-    text_low = q.lower()
+    # 3) If very low confidence → use basic rule engine
+    if best_score < MIN_CONFIDENCE:
+        base = fallback_engine(q)
+        base["confidence"] = float(best_score)
+        return base
 
-    needs_internet = any(w in text_low for w in [
-        "research", "google", "search", "internet", "online", "net"
-    ])
-
-    deep_research = any(w in text_low for w in [
-        "until you find", "jab tak", "keep searching", "deep research"
-    ])
-
-    return {
-        "intent": best_intent,
+    # 4) Extra flags
+    result = {
+        "intent": best_intent or "chat",
         "confidence": float(best_score),
-        "needs_internet": needs_internet,
-        "deep_research": deep_research
+        **extra_flags(q.lower()),
     }
+
+    log.info(
+        f"NLU → intent={result['intent']} conf={result['confidence']:.3f} "
+        f"net={result['needs_internet']} deep={result['deep_research']}"
+    )
+    return result
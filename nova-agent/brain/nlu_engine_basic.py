@@ -1,28 +1,12 @@
-# brain/nlu_engine.py
+# brain/nlu_engine_basic.py
+"""
+Rule-based intent parser: phrase and word matching against the intent
+examples, no model and no heavy imports. nlu_engine.py uses it while the
+semantic model is not loaded (or failed to load) and for low-confidence
+queries.
+"""
 
-from typing import Dict, Any
-import logging
-
-from sentence_transformers import SentenceTransformer, util
-from .nlu_engine_basic import parse_user_message as fallback_engine
-
-log = logging.getLogger("nova.nlu")
-if not log.handlers:
-    import sys
-    h = logging.StreamHandler(sys.stdout)
-    h.setFormatter(logging.Formatter("[%(levelname)s] [NLU] %(message)s"))
-    log.addHandler(h)
-log.setLevel(logging.INFO)
-
-# --------------------------------------------------
-# TRY TO LOAD SEMANTIC MODEL
-# --------------------------------------------------
-try:
-    _SEM_MODEL: SentenceTransformer | None = SentenceTransformer("all-MiniLM-L6-v2")
-    log.info("Loaded SentenceTransformer: all-MiniLM-L6-v2")
-except Exception as e:
-    log.error(f"Failed to load semantic NLU model, falling back to basic NLU only: {e}")
-    _SEM_MODEL = None
+from typing import Dict, Any, Set
 
 # --------------------------------------------------
 # INTENT EXAMPLES (CLUSTERS)
@@ -113,17 +97,6 @@ INTENT_EXAMPLES: dict[str, list[str]] = {
     ],
 }
 
-# --------------------------------------------------
-# PRECOMPUTE CLUSTER EMBEDDINGS (IF MODEL AVAILABLE)
-# --------------------------------------------------
-if _SEM_MODEL is not None:
-    INTENT_EMBED = {
-        intent: _SEM_MODEL.encode(examples, convert_to_tensor=True)
-        for intent, examples in INTENT_EXAMPLES.items()
-    }
-else:
-    INTENT_EMBED: dict[str, Any] = {}
-
 # intents where we treat as "code-heavy"
 CODE_INTENTS = {
     "code",
@@ -139,78 +112,46 @@ CODE_INTENTS = {
     "run_tests",
 }
 
-# --------------------------------------------------
-# MAIN FUNCTION
-# --------------------------------------------------
-def detect_intent(text: str) -> Dict[str, Any]:
-    """
-    Hybrid NLU:
-      1. Try semantic intent clustering (SentenceTransformer).
-      2. If model not loaded or low confidence → fall back to basic engine.
-    """
-
-    q = (text or "").strip()
-    if not q:
-        return {
-            "intent": "chat",
-            "confidence": 0.0,
-            "needs_internet": False,
-            "deep_research": False,
-        }
-
-    # 1) If semantic model is missing, just use your old engine
-    if _SEM_MODEL is None or not INTENT_EMBED:
-        base = fallback_engine(q)
-        # make sure keys exist
-        base.setdefault("intent", "chat")
-        base.setdefault("confidence", 0.0)
-        base.setdefault("needs_internet", False)
-        base.setdefault("deep_research", False)
-        return base
-
-    # 2) Semantic scoring
-    q_emb = _SEM_MODEL.encode([q], convert_to_tensor=True)
-
-    best_intent = None
-    best_score = -1.0
+INTERNET_WORDS = ["research", "google", "search", "internet", "online", "web", "net pe"]
+DEEP_RESEARCH_WORDS = ["until you find", "jab tak", "keep searching", "deep research"]
 
-    for intent, emb_list in INTENT_EMBED.items():
-        score = float(util.cos_sim(q_emb, emb_list).max().item())
-        if score > best_score:
-            best_score = score
-            best_intent = intent
+# below this nothing matched well enough: plain chat
+MIN_SCORE = 0.25
 
-    # 3) If very low confidence → use basic rule engine
-    if best_score < 0.35:
-        base = fallback_engine(q)
-        base.setdefault("intent", "chat")
-        base.setdefault("confidence", float(best_score))
-        base.setdefault("needs_internet", False)
-        base.setdefault("deep_research", False)
-        return base
 
-    # 4) Extra flags
-    text_low = q.lower()
+def _words(text: str) -> Set[str]:
+    return {w.strip(".,!?:;'\"()") for w in text.split()} - {""}
 
-    needs_internet = any(
-        w in text_low
-        for w in ["research", "google", "search", "internet", "online", "web", "net pe"]
-    )
 
-    deep_research = any(
-        w in text_low
-        for w in ["until you find", "jab tak", "keep searching", "deep research"]
-    )
-
-    result = {
-        "intent": best_intent or "chat",
-        "confidence": float(best_score),
-        "needs_internet": needs_internet,
-        "deep_research": deep_research,
+def extra_flags(text_low: str) -> Dict[str, bool]:
+    return {
+        "needs_internet": any(w in text_low for w in INTERNET_WORDS),
+        "deep_research": any(w in text_low for w in DEEP_RESEARCH_WORDS),
     }
 
-    log.info(
-        f"NLU → intent={result['intent']} conf={result['confidence']:.3f} "
-        f"net={result['needs_internet']} deep={result['deep_research']}"
-    )
-    return result
\ No newline at end of file
+
+def parse_user_message(text: str) -> Dict[str, Any]:
+    """
+    Score every intent by its best example: a phrase found verbatim scores
+    0.6-1.0 (longer phrases relative to the message score higher), else
+    the share of the example's words present in the message, up to 0.5.
+    """
+    q = (text or "").strip().lower()
+    if not q:
+        return {"intent": "chat", "confidence": 0.0, "needs_internet": False, "deep_research": False}
+
+    words = _words(q)
+    best_intent, best_score = "chat", 0.0
+    for intent, examples in INTENT_EXAMPLES.items():
+        for ex in examples:
+            if ex in q:
+                score = 0.6 + 0.4 * min(1.0, len(ex) / len(q))
+            else:
+                ex_words = _words(ex)
+                score = 0.5 * len(ex_words & words) / len(ex_words) if ex_words else 0.0
+            if score > best_score:
+                best_intent, best_score = intent, score
+
+    if best_score < MIN_SCORE:
+        best_intent = "chat"
+    return {"intent": best_intent, "confidence": round(best_score, 3), **extra_flags(q)}
@@ -0,0 +1,98 @@
+# brain/pipeline.py
+
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+from tracing import span
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[[Dict[str, Any]], Any]   # receives results of finished stages
+    deps: List[str] = field(default_factory=list)
+
+
+class PipelineError(Exception):
+    def __init__(self, stage: str, error: Exception, timings: Dict[str, Any]):
+        super().__init__(f"stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+        self.timings = timings
+
+
+def run_stages(stages: List[Stage], max_workers: int = 4) -> Dict[str, Any]:
+    """
+    Run a small DAG of stages. A stage starts as soon as all of its deps
+    have finished, so independent stages overlap and the wall time is the
+    longest dependency chain instead of the sum of all stages.
+
+    Returns {"results": {name: value}, "timings": {...}, "total_ms": int}.
+    Raises PipelineError for the first stage that fails (stages depending
+    on it are not started).
+    """
+    by_name = {s.name: s for s in stages}
+    for s in stages:
+        for d in s.deps:
+            if d not in by_name:
+                raise ValueError(f"stage '{s.name}' depends on unknown stage '{d}'")
+
+    results: Dict[str, Any] = {}
+    timings: Dict[str, Dict[str, Any]] = {}
+    pending = dict(by_name)
+    running = {}
+    t0 = time.perf_counter()
+
+    def _ms(t: float) -> int:
+        return int((t - t0) * 1000)
+
+    def _call(stage: Stage, done: Dict[str, Any]):
+        start = time.perf_counter()
+        try:
+            with span(f"stage.{stage.name}"):
+                return stage.func(done)
+        finally:
+            end = time.perf_counter()
+            timings[stage.name] = {
+                "start_ms": _ms(start),
+                "end_ms": _ms(end),
+                "duration_ms": int((end - start) * 1000),
+                "deps": stage.deps,
+            }
+
+    # not a `with` block: on failure we must not wait for stages still running
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nova-stage")
+    try:
+        while pending or running:
+            ready = [s for s in pending.values() if all(d in results for d in s.deps)]
+            for s in ready:
+                del pending[s.name]
+                # copy the caller's context so stage spans join its trace
+                ctx = contextvars.copy_context()
+                running[pool.submit(ctx.run, _call, s, dict(results))] = s.name
+
+            if not running:
+                # remaining stages wait on something that will never finish
+                raise ValueError(f"dependency cycle between stages: {sorted(pending)}")
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name = running.pop(fut)
+                try:
+                    results[name] = fut.result()
+                except Exception as e:
+                    # stages still running keep writing timings: hand out a snapshot
+                    raise PipelineError(name, e, dict(timings)) from e
+    except BaseException:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+    return {
+        "results": results,
+        "timings": timings,
+        "total_ms": _ms(time.perf_counter()),
+    }
@@ -0,0 +1,275 @@
+# brain/process_manager.py
+
+import os
+import time
+import uuid
+import signal
+import codecs
+import threading
+import subprocess
+from collections import deque
+from typing import Any, Dict, List, Optional, Union
+
+# output kept per process (oldest chunks are dropped first)
+BUFFER_BYTES = int(os.getenv("NOVA_PROC_BUFFER_BYTES", str(1024 * 1024)))
+MAX_RUNNING = int(os.getenv("NOVA_PROC_MAX", "16"))
+KEEP_FINISHED = int(os.getenv("NOVA_PROC_KEEP", "50"))
+KILL_GRACE_S = float(os.getenv("NOVA_PROC_KILL_GRACE_S", "5"))
+READ_CHUNK = 64 * 1024
+
+SIGNALS = {
+    name: getattr(signal, name)
+    for name in ("SIGINT", "SIGTERM", "SIGKILL", "SIGHUP", "SIGUSR1", "SIGUSR2", "SIGSTOP", "SIGCONT")
+    if hasattr(signal, name)
+}
+
+
+class TooManyProcesses(Exception):
+    """Raised by start() when MAX_RUNNING processes are already running."""
+
+
+class _Proc:
+    def __init__(self, proc_id: str, cmd, cwd: str, label: str, timeout: Optional[float]):
+        self.id = proc_id
+        self.cmd = cmd
+        self.cwd = cwd
+        self.label = label
+        self.timeout = timeout
+        self.popen: Optional[subprocess.Popen] = None
+        self.status = "starting"   # running | exited | killed | timeout | error
+        self.returncode: Optional[int] = None
+        self.started_at = time.time()
+        self.ended_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.signals: List[str] = []
+
+        self.lock = threading.Lock()
+        self.chunks: deque = deque()   # {"seq", "stream", "data", "t"}
+        self.buffered = 0
+        self.dropped = 0
+        self.seq = 0
+        self.total = {"stdout": 0, "stderr": 0}
+        self.done = threading.Event()
+
+    def append(self, stream: str, data: str):
+        if not data:
+            return
+        with self.lock:
+            self.seq += 1
+            self.chunks.append({"seq": self.seq, "stream": stream, "data": data, "t": time.time()})
+            self.buffered += len(data)
+            self.total[stream] += len(data)
+            while self.buffered > BUFFER_BYTES and len(self.chunks) > 1:
+                old = self.chunks.popleft()
+                self.buffered -= len(old["data"])
+                self.dropped += len(old["data"])
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "label": self.label,
+            "cmd": self.cmd,
+            "cwd": self.cwd,
+            "pid": self.popen.pid if self.popen else None,
+            "status": self.status,
+            "returncode": self.returncode,
+            "started_at": self.started_at,
+            "ended_at": self.ended_at,
+            "duration_ms": int(((self.ended_at or time.time()) - self.started_at) * 1000),
+            "output_chars": dict(self.total),
+            "dropped_chars": self.dropped,
+            "last_seq": self.seq,
+            "signals": list(self.signals),
+            "error": self.error,
+        }
+
+
+_procs: Dict[str, _Proc] = {}
+_lock = threading.Lock()
+
+
+# ---------- threads ----------
+
+def _reader(p: _Proc, pipe, stream: str):
+    dec = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    try:
+        while True:
+            chunk = pipe.read1(READ_CHUNK)
+            if not chunk:
+                break
+            p.append(stream, dec.decode(chunk))
+        p.append(stream, dec.decode(b"", final=True))
+    except (OSError, ValueError):
+        pass
+    finally:
+        try:
+            pipe.close()
+        except OSError:
+            pass
+
+
+def _watch(p: _Proc, readers: List[threading.Thread]):
+    try:
+        rc = p.popen.wait(timeout=p.timeout)
+    except subprocess.TimeoutExpired:
+        p.status = "timeout"
+        _send(p, SIGNALS.get("SIGKILL", signal.SIGTERM))
+        rc = p.popen.wait()
+    for t in readers:
+        t.join()
+    p.returncode = rc
+    p.ended_at = time.time()
+    if p.status == "running":
+        p.status = "killed" if p.signals and rc is not None and rc < 0 else "exited"
+    p.done.set()
+    _prune()
+
+
+def _prune():
+    with _lock:
+        finished = sorted((p for p in _procs.values() if p.done.is_set()), key=lambda p: p.ended_at or 0)
+        for p in finished[:max(0, len(finished) - KEEP_FINISHED)]:
+            del _procs[p.id]
+
+
+# ---------- public API ----------
+
+def start(cmd: Union[str, List[str]], cwd: str, timeout: Optional[float] = None,
+          label: str = "", env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Start a process in the background and return its info immediately.
+    stdout/stderr are read by two threads into a bounded buffer; follow it
+    with read(id, after_seq) or the /processes/{id}/stream endpoint.
+    """
+    with _lock:
+        running = sum(1 for p in _procs.values() if not p.done.is_set())
+        if running >= MAX_RUNNING:
+            raise TooManyProcesses(f"{running} processes already running (NOVA_PROC_MAX={MAX_RUNNING})")
+        p = _Proc(uuid.uuid4().hex[:10], cmd, cwd, label, timeout)
+        _procs[p.id] = p
+
+    try:
+        p.popen = subprocess.Popen(
+            cmd,
+            shell=isinstance(cmd, str),
+            cwd=cwd,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            # own process group, so a signal reaches the whole tree (shell + children)
+            start_new_session=(os.name == "posix"),
+        )
+    except Exception as e:
+        p.status = "error"
+        p.error = str(e)
+        p.ended_at = time.time()
+        p.done.set()
+        return p.info()
+
+    p.status = "running"
+    readers = [
+        threading.Thread(target=_reader, args=(p, p.popen.stdout, "stdout"), daemon=True),
+        threading.Thread(target=_reader, args=(p, p.popen.stderr, "stderr"), daemon=True),
+    ]
+    for t in readers:
+        t.start()
+    threading.Thread(target=_watch, args=(p, readers), daemon=True, name=f"nova-proc-{p.id}").start()
+    return p.info()
+
+
+def get(proc_id: str) -> Optional[Dict[str, Any]]:
+    p = _procs.get(proc_id)
+    return p.info() if p else None
+
+
+def list_processes() -> List[Dict[str, Any]]:
+    with _lock:
+        procs = list(_procs.values())
+    return [p.info() for p in sorted(procs, key=lambda p: p.started_at, reverse=True)]
+
+
+def read(proc_id: str, after: int = 0) -> Optional[Dict[str, Any]]:
+    """Buffered chunks with seq > after, plus the process info."""
+    p = _procs.get(proc_id)
+    if p is None:
+        return None
+    # info first: if it says the process ended, the chunks taken below
+    # already include all of its output
+    info = p.info()
+    with p.lock:
+        chunks = [c for c in p.chunks if c["seq"] > after]
+        first = p.chunks[0]["seq"] if p.chunks else p.seq + 1
+    return {
+        **info,
+        "chunks": chunks,
+        # the caller missed output that has already left the ring buffer
+        "gap": after + 1 < first and after < p.seq,
+    }
+
+
+def wait(proc_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Block until the process ends, then return info + stdout/stderr joined
+    from the buffer (`output_truncated` when older output was dropped).
+    """
+    p = _procs.get(proc_id)
+    if p is None:
+        return None
+    p.done.wait(timeout)
+    with p.lock:
+        out = "".join(c["data"] for c in p.chunks if c["stream"] == "stdout")
+        err = "".join(c["data"] for c in p.chunks if c["stream"] == "stderr")
+    return {**p.info(), "stdout": out, "stderr": err, "output_truncated": p.dropped > 0}
+
+
+def _send(p: _Proc, sig: int):
+    if p.popen is None or p.popen.poll() is not None:
+        return
+    try:
+        if os.name == "posix":
+            os.killpg(p.popen.pid, sig)
+        else:
+            p.popen.send_signal(sig)
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+
+def send_signal(proc_id: str, name: str) -> Dict[str, Any]:
+    p = _procs.get(proc_id)
+    if p is None:
+        return {"ok": False, "error": "process not found"}
+    name = name.upper()
+    if not name.startswith("SIG"):
+        name = "SIG" + name
+    if name not in SIGNALS:
+        return {"ok": False, "error": f"unsupported signal: {name}", "allowed": sorted(SIGNALS)}
+    if p.done.is_set():
+        return {"ok": False, "error": "process already finished", "process": p.info()}
+    p.signals.append(name)
+    _send(p, SIGNALS[name])
+    return {"ok": True, "process": p.info()}
+
+
+def cancel(proc_id: str) -> Dict[str, Any]:
+    """SIGTERM the process group, then SIGKILL it if it is still alive after KILL_GRACE_S."""
+    res = send_signal(proc_id, "SIGTERM")
+    if not res.get("ok"):
+        return res
+    p = _procs[proc_id]
+
+    def _escalate():
+        if not p.done.wait(KILL_GRACE_S) and "SIGKILL" in SIGNALS:
+            p.signals.append("SIGKILL")
+            _send(p, SIGNALS["SIGKILL"])
+
+    threading.Thread(target=_escalate, daemon=True).start()
+    return res
+
+
+def shutdown():
+    """Kill everything still running (app shutdown)."""
+    with _lock:
+        procs = [p for p in _procs.values() if not p.done.is_set()]
+    for p in procs:
+        _send(p, SIGNALS.get("SIGKILL", signal.SIGTERM))
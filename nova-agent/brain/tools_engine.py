@@ -1,15 +1,26 @@
 # brain/tools_engine.py
 
-import os
-import subprocess
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Callable
+from typing import Any, Dict, Callable, List, Optional
+
+from workspace_manager import write_text, detach_tree
+import profiling
+import executors
+from range_reader import read_range
+import code_search
+import deletion_service
+from dir_listing import list_entries
+
+from . import process_manager
 
 BASE = Path(__file__).resolve().parent.parent  # repo root
 INTEGRATED_ROOT = BASE / "integrated"
 WORKSPACE_ROOT = BASE / "workspace"
 
+MAX_BATCH = 50
+
 
 # ---------- helpers ----------
 
@@ -46,6 +57,11 @@ def _safe_join(root: Path, rel_path: str) -> Path:
     return full
 
 
+def resolve_tool_path(root: str, rel_path: str) -> Path:
+    """Path resolution shared with endpoints that serve files directly."""
+    return _safe_join(_normalize_root(root), rel_path)
+
+
 # ---------- tool definitions ----------
 
 @dataclass
@@ -54,28 +70,35 @@ class ToolSpec:
     description: str
     dangerous: bool   # if True => requires explicit user confirmation
     func: Callable[[Dict[str, Any]], Dict[str, Any]]
+    pool: str = "io"  # executor pool the call runs on (see executors.py)
 
 
 # ---- Filesystem tools ----
 
 def tool_read_file(args: Dict[str, Any]) -> Dict[str, Any]:
     """
-    args: { "path": "relative/path", "root": "integrated|workspace|base" }
+    args: {
+      "path": "relative/path",
+      "root": "integrated|workspace|base",
+      // optional, pick one:
+      "offset": bytes, "length": bytes,
+      "start_line": n, "end_line": m (1-based, inclusive) or "max_lines": k,
+      "tail": n (last n lines)
+    }
+    Large files are read through mmap and capped per response (see
+    range_reader.py); use next_offset or /files/stream for the rest.
     """
     root = _normalize_root(args.get("root", "integrated"))
     path = _safe_join(root, args.get("path", ""))
 
     if not path.exists():
         return {"ok": False, "error": f"file not found: {path}"}
+    if not path.is_file():
+        return {"ok": False, "error": f"not a file: {path}", "path": str(path)}
 
     try:
-        text = path.read_text(encoding="utf-8", errors="replace")
-        return {
-            "ok": True,
-            "path": str(path),
-            "size": path.stat().st_size,
-            "content": text,
-        }
+        res = read_range(path, args)
+        return {"ok": True, "path": str(path), **res}
     except Exception as e:
         return {"ok": False, "error": str(e), "path": str(path)}
 
@@ -99,8 +122,8 @@ def tool_write_file(args: Dict[str, Any]) -> Dict[str, Any]:
         return {"ok": False, "error": f"file already exists: {path}"}
 
     try:
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(args.get("content", ""), encoding="utf-8")
+        # temp + replace: never writes through a hardlinked workspace file
+        write_text(path, args.get("content", ""))
         return {"ok": True, "path": str(path), "bytes_written": len(args.get("content", ""))}
     except Exception as e:
         return {"ok": False, "error": str(e), "path": str(path)}
@@ -115,15 +138,15 @@ def tool_delete_path(args: Dict[str, Any]) -> Dict[str, Any]:
     root = _normalize_root(args.get("root", "integrated"))
     path = _safe_join(root, args.get("path", ""))
 
+    if path == root.resolve():
+        return {"ok": False, "error": "refusing to delete the root folder itself", "path": str(path)}
+
     try:
         if path.is_dir():
-            # only delete non-root and non-empty is allowed here
-            for child in path.rglob("*"):
-                if child.is_file():
-                    child.unlink()
-            path.rmdir()
-            kind = "dir"
-        elif path.is_file():
+            # renamed into .trash/ now, removed by a background thread
+            job = deletion_service.schedule(path, label=f"delete_path:{args.get('path')}")
+            return {"ok": True, "path": str(path), "kind": "dir", "deletion": job}
+        elif path.is_file() or path.is_symlink():
             path.unlink()
             kind = "file"
         else:
@@ -136,7 +159,15 @@ def tool_delete_path(args: Dict[str, Any]) -> Dict[str, Any]:
 
 def tool_list_dir(args: Dict[str, Any]) -> Dict[str, Any]:
     """
-    args: { "path": "relative/path" (optional), "root": "integrated|workspace|base" }
+    args: {
+      "path": "relative/path" (optional),
+      "root": "integrated|workspace|base",
+      "recursive": true|false (default false),
+      "depth": levels to descend (default 1, or 10 when recursive),
+      "glob": "*.py" (matches names; patterns with "/" match relative paths),
+      "limit": page size (default 500),
+      "cursor": next_cursor from the previous page
+    }
     """
     root = _normalize_root(args.get("root", "integrated"))
     rel = args.get("path", "") or "."
@@ -144,22 +175,120 @@ def tool_list_dir(args: Dict[str, Any]) -> Dict[str, Any]:
 
     if not path.exists():
         return {"ok": False, "error": f"path not found: {path}"}
+    if not path.is_dir():
+        return {"ok": False, "error": f"not a directory: {path}", "path": str(path)}
 
+    depth = args.get("depth") or (10 if args.get("recursive") else 1)
     try:
-        entries = []
-        for c in path.iterdir():
-            entries.append({
-                "name": c.name,
-                "is_dir": c.is_dir(),
-                "size": c.stat().st_size if c.is_file() else None,
-            })
-        return {"ok": True, "path": str(path), "entries": entries}
+        page = list_entries(
+            path,
+            depth=depth,
+            pattern=args.get("glob"),
+            cursor=args.get("cursor"),
+            limit=args.get("limit") or 500,
+        )
+        return {"ok": True, "path": str(path), **page}
     except Exception as e:
         return {"ok": False, "error": str(e), "path": str(path)}
 
 
+def tool_search_code(args: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    args: {
+      "query": "text or regex",
+      "regex": true|false (default false),
+      "case_sensitive": true|false (default false),
+      "root": "integrated|workspace|all" (default all),
+      "request_id": "..." (required for root=workspace; with root=all
+                    the request's workspace is searched too),
+      "path_glob": "brain/*.py" (optional),
+      "context": lines before/after (default 2),
+      "max_results": n (default 100)
+    }
+    Backed by an incrementally maintained trigram index (code_search.py).
+    """
+    query = args.get("query") or ""
+    if not query:
+        return {"ok": False, "error": "query is required"}
+
+    r = (args.get("root") or "all").lower()
+    if r not in ("all", "integrated", "workspace"):
+        return {"ok": False, "error": "root must be integrated, workspace or all"}
+    request_id = args.get("request_id")
+    if r == "workspace" and not request_id:
+        return {"ok": False, "error": "request_id is required to search a workspace"}
+
+    roots = {}
+    if r in ("all", "integrated"):
+        roots["integrated"] = INTEGRATED_ROOT
+    if r in ("all", "workspace") and request_id:
+        # one request's workspace, never every workspace at once
+        ws = WORKSPACE_ROOT / str(request_id)
+        if ws.resolve().parent != WORKSPACE_ROOT.resolve():
+            return {"ok": False, "error": "invalid request_id"}
+        if not ws.is_dir():
+            return {"ok": False, "error": f"workspace not found: {request_id}"}
+        roots["workspace"] = ws
+
+    try:
+        res = code_search.search(
+            roots,
+            query,
+            regex=bool(args.get("regex", False)),
+            case_sensitive=bool(args.get("case_sensitive", False)),
+            path_glob=args.get("path_glob"),
+            context=args.get("context", 2),
+            max_results=args.get("max_results", 100),
+        )
+        return {"ok": True, **res}
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+
+
 # ---- Process / command tools ----
 
+def _run_process(cmd, cwd: Path, timeout: int, label: str, stream: bool) -> Dict[str, Any]:
+    """
+    Run through the process manager. stream=True returns at once with the
+    process id (follow /processes/{id}/stream); otherwise wait and return
+    the classic {ok, returncode, stdout, stderr} shape, with output capped
+    by the manager's ring buffer.
+    """
+    if Path(cwd).resolve().is_relative_to(WORKSPACE_ROOT.resolve()):
+        # hardlinked workspace files would take the process's writes into integrated/
+        detach_tree(cwd)
+    try:
+        info = process_manager.start(cmd, cwd=str(cwd), timeout=timeout, label=label)
+    except process_manager.TooManyProcesses as e:
+        return {"ok": False, "error": str(e)}
+    if info["status"] == "error":
+        return {"ok": False, "error": info["error"]}
+
+    if stream:
+        return {
+            "ok": True,
+            "streaming": True,
+            "process": info,
+            "stream_url": f"/processes/{info['id']}/stream",
+        }
+
+    res = process_manager.wait(info["id"])
+    out = {
+        "ok": res["returncode"] == 0 and res["status"] == "exited",
+        "returncode": res["returncode"],
+        "stdout": res["stdout"],
+        "stderr": res["stderr"],
+        "process_id": res["id"],
+        "duration_ms": res["duration_ms"],
+    }
+    if res["output_truncated"]:
+        out["output_truncated"] = True
+        out["dropped_chars"] = res["dropped_chars"]
+    if res["status"] == "timeout":
+        out["error"] = f"timed out after {timeout} seconds"
+    return out
+
+
 def tool_run_command(args: Dict[str, Any]) -> Dict[str, Any]:
     """
     Dangerous: can execute arbitrary commands (SAFE MODE => must confirm).
@@ -167,40 +296,21 @@ def tool_run_command(args: Dict[str, Any]) -> Dict[str, Any]:
     args: {
       "cmd": "string or list",
       "cwd_root": "integrated|workspace|base",
-      "timeout": seconds (optional, default 60)
+      "timeout": seconds (optional, default 60),
+      "stream": true|false (return immediately; follow /processes/{id}/stream)
     }
     """
     cmd = args.get("cmd")
     if not cmd:
         return {"ok": False, "error": "cmd is required"}
 
-    if isinstance(cmd, str):
-        shell = True
-    elif isinstance(cmd, list):
-        shell = False
-    else:
+    if not isinstance(cmd, (str, list)):
         return {"ok": False, "error": "cmd must be string or list"}
 
     cwd_root = _normalize_root(args.get("cwd_root", "integrated"))
     timeout = int(args.get("timeout", 60))
 
-    try:
-        proc = subprocess.run(
-            cmd,
-            shell=shell,
-            cwd=str(cwd_root),
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-        )
-        return {
-            "ok": proc.returncode == 0,
-            "returncode": proc.returncode,
-            "stdout": proc.stdout,
-            "stderr": proc.stderr,
-        }
-    except Exception as e:
-        return {"ok": False, "error": str(e)}
+    return _run_process(cmd, cwd_root, timeout, label="run_command", stream=bool(args.get("stream")))
 
 
 def tool_run_python_file(args: Dict[str, Any]) -> Dict[str, Any]:
@@ -208,7 +318,9 @@ def tool_run_python_file(args: Dict[str, Any]) -> Dict[str, Any]:
     args: {
       "path": "relative/path/to/script.py",
       "root": "integrated|workspace|base",
-      "timeout": seconds (default 60)
+      "timeout": seconds (default 60),
+      "profile": true|false (run under the sampling profiler, see profiling.py),
+      "stream": true|false (return immediately; follow /processes/{id}/stream)
     }
     """
     root = _normalize_root(args.get("root", "integrated"))
@@ -218,22 +330,21 @@ def tool_run_python_file(args: Dict[str, Any]) -> Dict[str, Any]:
     if not path.exists():
         return {"ok": False, "error": f"script not found: {path}"}
 
-    try:
-        proc = subprocess.run(
-            ["python", str(path)],
-            cwd=str(root),
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-        )
-        return {
-            "ok": proc.returncode == 0,
-            "returncode": proc.returncode,
-            "stdout": proc.stdout,
-            "stderr": proc.stderr,
-        }
-    except Exception as e:
-        return {"ok": False, "error": str(e)}
+    cmd = ["python", str(path)]
+    run = None
+    if args.get("profile"):
+        run = profiling.profiled_command(path, label=f"run_python_file:{args.get('path')}")
+        cmd = run["cmd"]
+
+    res = _run_process(cmd, root, timeout, label=f"run_python_file:{args.get('path')}",
+                       stream=bool(args.get("stream")))
+    if run:
+        if res.get("streaming"):
+            # the report appears under /profiles/<id> when the script exits
+            res["profile_id"] = run["id"]
+        elif "returncode" in res:
+            res["profile"] = profiling.finish(run["id"])
+    return res
 
 
 # ---------- registry + public API ----------
@@ -241,16 +352,22 @@ def tool_run_python_file(args: Dict[str, Any]) -> Dict[str, Any]:
 TOOLS: Dict[str, ToolSpec] = {
     "read_file": ToolSpec(
         name="read_file",
-        description="Read a text file from the project (integrated/workspace).",
+        description="Read a text file (or a byte/line range, or its tail) from the project.",
         dangerous=False,
         func=tool_read_file,
     ),
     "list_dir": ToolSpec(
         name="list_dir",
-        description="List files and folders inside a directory.",
+        description="List files and folders inside a directory (optionally recursive, filtered, paginated).",
         dangerous=False,
         func=tool_list_dir,
     ),
+    "search_code": ToolSpec(
+        name="search_code",
+        description="Search code in integrated/ and a request's workspace (text or regex) and return matches with context lines.",
+        dangerous=False,
+        func=tool_search_code,
+    ),
     "write_file": ToolSpec(
         name="write_file",
         description="Create or overwrite a file with new content.",
@@ -268,12 +385,14 @@ TOOLS: Dict[str, ToolSpec] = {
         description="Run a shell/terminal command in the project root.",
         dangerous=True,
         func=tool_run_command,
+        pool="subprocess",
     ),
     "run_python_file": ToolSpec(
         name="run_python_file",
         description="Execute a Python script file in the project.",
         dangerous=True,
         func=tool_run_python_file,
+        pool="subprocess",
     ),
 }
 
@@ -319,4 +438,102 @@ def run_tool(tool_name: str, args: Dict[str, Any], confirm: bool = False) -> Dic
         result.setdefault("tool", tool_name)
         return result
     except Exception as e:
-        return {"ok": False, "error": str(e), "tool": tool_name}
\ No newline at end of file
+        return {"ok": False, "error": str(e), "tool": tool_name}
+
+def tool_pool(calls: List[Any]) -> str:
+    """
+    Executor pool for a request running `calls` ([{"tool": ...}, ...]):
+    "subprocess" if any of them may wait on a child process for its whole
+    timeout, so that never ties up the io pool's file / SQLite work.
+    """
+    for call in calls:
+        spec = TOOLS.get(call.get("tool")) if isinstance(call, dict) else None
+        if spec is not None and spec.pool != "io":
+            return spec.pool
+    return "io"
+
+
+# ---------- batches ----------
+
+
+def run_tools_batch(calls: List[Dict[str, Any]], parallel: bool = True,
+                    confirm: bool = False, stop_on_error: bool = False) -> Dict[str, Any]:
+    """
+    Run several tool calls in one go; results come back in input order
+    with per-call timings.
+
+    calls: [{ "tool": "read_file", "args": {...}, "confirm": bool, "id": optional }]
+
+    parallel=True: non-dangerous tools run concurrently on the "tool"
+    executor pool (executors.py); dangerous tools still go through
+    run_tool's confirm gate and act as barriers: each one waits for every earlier call, runs alone, and only
+    then are later calls started, so reads see the writes listed before
+    them and never race one.
+    parallel=False: everything runs in order; stop_on_error skips the rest
+    after the first failed call.
+    A malformed entry gets an error result of its own; the others still run.
+    """
+    if len(calls) > MAX_BATCH:
+        return {"ok": False, "error": f"too many calls in one batch (max {MAX_BATCH})"}
+
+    t0 = time.perf_counter()
+    results: List[Dict[str, Any]] = [None] * len(calls)
+
+    def _invalid(call: Any) -> Optional[str]:
+        if not isinstance(call, dict):
+            return "call must be an object like {\"tool\": ..., \"args\": {...}}"
+        if not isinstance(call.get("tool"), str) or not call["tool"]:
+            return "tool is required"
+        if not isinstance(call.get("args") or {}, dict):
+            return "args must be an object"
+        return None
+
+    def _one(i: int, call: Dict[str, Any]):
+        error = _invalid(call)
+        if error:
+            results[i] = {"ok": False, "error": error,
+                          "tool": call.get("tool") if isinstance(call, dict) else None}
+            return results[i]
+        start = time.perf_counter()
+        res = run_tool(call.get("tool", ""), call.get("args") or {},
+                       confirm=bool(call.get("confirm", confirm)))
+        end = time.perf_counter()
+        res.setdefault("tool", call.get("tool"))
+        res["timing"] = {
+            "start_ms": int((start - t0) * 1000),
+            "duration_ms": int((end - start) * 1000),
+        }
+        if "id" in call:
+            res["id"] = call["id"]
+        results[i] = res
+        return res
+
+    if parallel:
+        futures = []
+        for i, call in enumerate(calls):
+            spec = TOOLS.get(call.get("tool")) if not _invalid(call) else None
+            if spec is None or not spec.dangerous:
+                futures.append(executors.submit("tool", _one, i, call))
+                continue
+            for f in futures:
+                f.result()
+            futures = []
+            _one(i, call)
+        for f in futures:
+            f.result()
+    else:
+        for i, call in enumerate(calls):
+            if not _one(i, call).get("ok") and stop_on_error:
+                for j in range(i + 1, len(calls)):
+                    results[j] = {"ok": False, "skipped": True,
+                                  "tool": calls[j].get("tool") if isinstance(calls[j], dict) else None,
+                                  "error": "skipped after an earlier failure"}
+                break
+
+    return {
+        "ok": all(r.get("ok") for r in results),
+        "parallel": parallel,
+        "results": results,
+        "needs_confirmation": [i for i, r in enumerate(results) if r.get("needs_confirmation")],
+        "total_ms": int((time.perf_counter() - t0) * 1000),
+    }
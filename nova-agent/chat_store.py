@@ -0,0 +1,126 @@
+# chat_store.py
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable
+
+import state_db
+from state_db import connect
+from file_locks import FileLock, LOCK_DIR
+
+log = logging.getLogger("nova.chat")
+
+BASE = Path(__file__).resolve().parent
+LEGACY_DIR = BASE / "chat_sessions"
+
+# what /chat loads per turn; the LLM prompt only uses the last 10 of these
+CONTEXT_MESSAGES = 20
+
+# Messages are appended as rows (one INSERT per message), so concurrent
+# turns from several workers never rewrite each other's session, and a
+# turn costs the same whether the session has 10 or 10k messages.
+state_db.register_schema("""
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    role       TEXT NOT NULL,
+    message    TEXT NOT NULL,
+    ts         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chat_session ON chat_messages (session_id, id);
+""")
+
+
+def append(session_id: str, role: str, message: str, ts: Optional[str] = None) -> Dict[str, Any]:
+    entry = {"role": role, "message": message, "ts": ts or datetime.utcnow().isoformat()}
+    connect().execute(
+        "INSERT INTO chat_messages (session_id, role, message, ts) VALUES (?, ?, ?, ?)",
+        (session_id, entry["role"], entry["message"], entry["ts"]),
+    )
+    return entry
+
+
+def _row(e: Dict[str, Any]):
+    return (e.get("role", "user"), e.get("message") or "", e.get("ts") or datetime.utcnow().isoformat())
+
+
+def append_many(session_id: str, entries: Iterable[Dict[str, Any]]):
+    with state_db.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO chat_messages (session_id, role, message, ts) VALUES (?, ?, ?, ?)",
+            [(session_id, *_row(e)) for e in entries],
+        )
+
+
+def history(session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Messages oldest first; with `limit`, only the last `limit` of them."""
+    conn = connect()
+    if limit is None:
+        rows = conn.execute(
+            "SELECT role, message, ts FROM chat_messages WHERE session_id = ? ORDER BY id",
+            (session_id,),
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT role, message, ts FROM chat_messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+            (session_id, int(limit)),
+        ).fetchall()[::-1]
+    return [{"role": r["role"], "message": r["message"], "ts": r["ts"]} for r in rows]
+
+
+# ---------- legacy chat_sessions/*.json ----------
+
+def _import_session(session_id: str, entries: List[Dict[str, Any]]) -> int:
+    """
+    Merge one legacy history into the table: entries not already stored
+    go in ahead of the session's existing rows (they predate the
+    database), so nothing is lost if the session was written to first.
+    """
+    with state_db.transaction() as conn:
+        existing = [tuple(r) for r in conn.execute(
+            "SELECT role, message, ts FROM chat_messages WHERE session_id = ? ORDER BY id", (session_id,))]
+        seen = set(existing)
+        legacy = [r for r in map(_row, entries) if r not in seen]
+        if not legacy:
+            return 0
+        if existing:
+            conn.execute("DELETE FROM chat_messages WHERE session_id = ?", (session_id,))
+        conn.executemany(
+            "INSERT INTO chat_messages (session_id, role, message, ts) VALUES (?, ?, ?, ?)",
+            [(session_id, *r) for r in legacy + existing],
+        )
+        return len(legacy)
+
+
+def migrate_legacy(directory: Path = LEGACY_DIR) -> Dict[str, Any]:
+    """
+    Import the old one-file-per-session JSON histories once (files stay
+    where they are). Runs at startup before serving; messages a session
+    already has are not imported twice.
+    """
+    with FileLock(LOCK_DIR / "chat_migrate.lock"):
+        conn = connect()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'chat_import'").fetchone():
+            return {"imported": 0, "skipped": True}
+
+        stats = {"imported": 0, "messages": 0, "errors": []}
+        if directory.exists():
+            for f in sorted(directory.glob("*.json")):
+                try:
+                    entries = json.load(open(f, "r", encoding="utf-8"))
+                    if not isinstance(entries, list):
+                        raise ValueError("not a list of messages")
+                except (OSError, ValueError) as e:
+                    stats["errors"].append(f"{f.name}: {e}")
+                    continue
+                n = _import_session(f.stem, [e for e in entries if isinstance(e, dict)])
+                if n:
+                    stats["imported"] += 1
+                    stats["messages"] += n
+
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('chat_import', ?)",
+                     (json.dumps({"imported": stats["imported"], "messages": stats["messages"]}),))
+        if stats["errors"]:
+            log.warning(f"[CHAT] {len(stats['errors'])} session files not imported: {stats['errors'][:5]}")
+        return {**stats, "skipped": False}
@@ -0,0 +1,283 @@
+# code_search.py
+import os
+import re
+import time
+import fnmatch
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set
+
+try:
+    import re._parser as sre_parse      # 3.11+
+    from re._constants import LITERAL, SUBPATTERN, MAX_REPEAT, MIN_REPEAT
+except ImportError:  # pragma: no cover
+    import sre_parse
+    from sre_constants import LITERAL, SUBPATTERN, MAX_REPEAT, MIN_REPEAT
+
+from workspace_manager import SKIP_DIRS
+
+MAX_FILE_BYTES = int(os.getenv("NOVA_SEARCH_MAX_FILE_BYTES", str(2 * 1024 * 1024)))
+MAX_RESULTS = 200
+
+
+# ---------- trigram index ----------
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _read_text(path: str, size: int) -> Optional[str]:
+    """File content as text, or None for binary / oversized files."""
+    if size > MAX_FILE_BYTES:
+        return None
+    try:
+        data = open(path, "rb").read()
+    except OSError:
+        return None
+    if b"\0" in data[:8192]:
+        return None
+    return data.decode("utf-8", errors="replace")
+
+
+class TrigramIndex:
+    """
+    Inverted index trigram -> file ids for one root folder. Trigrams are
+    taken from the lower-cased text so the same index serves both
+    case-sensitive and case-insensitive queries (as a superset filter).
+
+    refresh() is one stat pass; only files whose mtime/size changed are
+    re-read, and their old postings are removed first. The walk and the
+    reads run without the lock; only swapping the results in takes it,
+    so searches are not held up behind a large reindex.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.lock = threading.Lock()
+        self.files: Dict[str, Dict[str, Any]] = {}     # rel -> {id, mtime_ns, size, grams}
+        self.paths: Dict[int, str] = {}                 # id -> rel
+        self.postings: Dict[str, Set[int]] = {}
+        self._next_id = 0
+
+    def _walk(self):
+        stack = [self.root]
+        while stack:
+            d = stack.pop()
+            try:
+                it = os.scandir(d)
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS and not entry.name.startswith("."):
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+
+    def _remove(self, rel: str):
+        cur = self.files.pop(rel)
+        for g in cur["grams"]:
+            ids = self.postings.get(g)
+            if ids is not None:
+                ids.discard(cur["id"])
+                if not ids:
+                    del self.postings[g]
+        del self.paths[cur["id"]]
+
+    def refresh(self) -> Dict[str, int]:
+        with self.lock:
+            known = {rel: (f["mtime_ns"], f["size"]) for rel, f in self.files.items()}
+
+        stats = {"files": 0, "reindexed": 0, "removed": 0}
+        seen = set()
+        changed = []
+        if self.root.exists():
+            for entry in self._walk():
+                rel = os.path.relpath(entry.path, self.root).replace(os.sep, "/")
+                st = entry.stat(follow_symlinks=False)
+                seen.add(rel)
+                stats["files"] += 1
+                if known.get(rel) == (st.st_mtime_ns, st.st_size):
+                    continue
+                text = _read_text(entry.path, st.st_size)
+                grams = frozenset(_trigrams(text.lower())) if text is not None else frozenset()
+                changed.append((rel, st.st_mtime_ns, st.st_size, grams, text is not None))
+
+        with self.lock:
+            for rel, mtime_ns, size, grams, is_text in changed:
+                cur = self.files.get(rel)
+                if cur and cur["mtime_ns"] == mtime_ns and cur["size"] == size:
+                    continue  # a concurrent refresh got there first
+                if cur:
+                    self._remove(rel)
+                fid = self._next_id
+                self._next_id += 1
+                self.files[rel] = {"id": fid, "mtime_ns": mtime_ns, "size": size,
+                                   "grams": grams, "text": is_text}
+                self.paths[fid] = rel
+                for g in grams:
+                    self.postings.setdefault(g, set()).add(fid)
+                stats["reindexed"] += 1
+
+            for rel in set(known) - seen:
+                cur = self.files.get(rel)
+                # only if nothing re-added it in the meantime
+                if cur and (cur["mtime_ns"], cur["size"]) == known[rel]:
+                    self._remove(rel)
+                    stats["removed"] += 1
+        return stats
+
+    def candidates(self, literals: List[str]) -> List[str]:
+        """Files containing every trigram of every required literal."""
+        grams = set()
+        for lit in literals:
+            grams |= _trigrams(lit.lower())
+        if not grams:
+            return sorted(rel for rel, f in self.files.items() if f["text"])
+
+        ids = None
+        # rarest first keeps the running intersection small
+        for g in sorted(grams, key=lambda g: len(self.postings.get(g, ()))):
+            posting = self.postings.get(g)
+            if not posting:
+                return []
+            ids = set(posting) if ids is None else ids & posting
+            if not ids:
+                return []
+        return sorted(self.paths[i] for i in ids)
+
+
+_indexes: Dict[str, TrigramIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(root: Path) -> TrigramIndex:
+    key = str(Path(root).resolve())
+    with _indexes_lock:
+        idx = _indexes.get(key)
+        if idx is None:
+            idx = _indexes[key] = TrigramIndex(Path(key))
+        return idx
+
+
+# ---------- query planning ----------
+
+def required_literals(pattern: str, flags: int = 0) -> List[str]:
+    """
+    Literal strings that every match of `pattern` must contain, taken from
+    runs of plain characters in the top-level sequence (and in groups /
+    repeats that must occur at least once). Alternations, classes and
+    optional parts end a run. Only runs of 3+ characters are useful.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except (re.error, TypeError):
+        return []
+
+    out: List[str] = []
+
+    def walk(seq):
+        run = []
+        for op, av in seq:
+            if op is LITERAL:
+                run.append(chr(av))
+                continue
+            if run:
+                out.append("".join(run))
+                run = []
+            if op is SUBPATTERN:
+                walk(av[-1])
+            elif op in (MAX_REPEAT, MIN_REPEAT) and av[0] >= 1:
+                walk(av[2])
+        if run:
+            out.append("".join(run))
+
+    walk(parsed)
+    return [s for s in out if len(s) >= 3]
+
+
+# ---------- search ----------
+
+def search(roots: Dict[str, Path], query: str, regex: bool = False,
+           case_sensitive: bool = False, path_glob: Optional[str] = None,
+           context: int = 2, max_results: int = 100) -> Dict[str, Any]:
+    """
+    Search every text file under `roots` ({name: folder}); returns matches
+    with `context` lines before/after. Files that cannot contain a match
+    (missing a required trigram) are never opened.
+    """
+    t0 = time.perf_counter()
+    flags = 0 if case_sensitive else re.IGNORECASE
+    pattern = query if regex else re.escape(query)
+    rx = re.compile(pattern, flags | re.MULTILINE)
+    literals = required_literals(pattern, flags)
+    max_results = max(1, min(int(max_results), MAX_RESULTS))
+    context = max(0, min(int(context), 10))
+
+    matches: List[Dict[str, Any]] = []
+    stats = {"indexed_files": 0, "reindexed": 0, "candidates": 0, "files_scanned": 0}
+    truncated = False
+
+    for root_name, root in roots.items():
+        idx = get_index(root)
+        s = idx.refresh()
+        with idx.lock:
+            cands = idx.candidates(literals)
+        stats["indexed_files"] += s["files"]
+        stats["reindexed"] += s["reindexed"]
+
+        for rel in cands:
+            if path_glob and not fnmatch.fnmatch(rel, path_glob):
+                continue
+            stats["candidates"] += 1
+            full = idx.root / rel
+            try:
+                text = _read_text(str(full), full.stat().st_size)
+            except OSError:
+                text = None
+            if text is None:
+                continue
+            stats["files_scanned"] += 1
+
+            lines = None
+            pos, line_no, last_line = 0, 0, -1
+            for m in rx.finditer(text):
+                if lines is None:
+                    # split on "\n" only, like the line count below; splitlines()
+                    # also breaks on \x0c, \x1c, \u2028... and would shift lines
+                    lines = [ln[:-1] if ln.endswith("\r") else ln for ln in text.split("\n")]
+                    if text.endswith("\n"):
+                        lines.pop()
+                line_no += text.count("\n", pos, m.start())
+                pos = m.start()
+                if line_no == last_line:
+                    continue  # one hit per line is enough
+                last_line = line_no
+                col = m.start() - (text.rfind("\n", 0, m.start()) + 1)
+                matches.append({
+                    "root": root_name,
+                    "path": rel,
+                    "line": line_no + 1,
+                    "col": col + 1,
+                    "text": lines[line_no] if line_no < len(lines) else "",
+                    "before": lines[max(0, line_no - context):line_no],
+                    "after": lines[line_no + 1:line_no + 1 + context],
+                })
+                if len(matches) >= max_results:
+                    truncated = True
+                    break
+            if truncated:
+                break
+        if truncated:
+            break
+
+    return {
+        "query": query,
+        "regex": regex,
+        "literals": literals,
+        "matches": matches,
+        "truncated": truncated,
+        **stats,
+        "took_ms": int((time.perf_counter() - t0) * 1000),
+    }
@@ -0,0 +1,251 @@
+# deletion_service.py
+import os
+import stat
+import time
+import uuid
+import queue
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from file_locks import FileLock, LOCK_DIR, pid_alive
+
+BASE = Path(__file__).resolve().parent
+TRASH = BASE / ".trash"
+
+KEEP_JOBS = int(os.getenv("NOVA_DELETE_KEEP", "100"))
+
+# fd-relative unlink/rmdir/open (POSIX); elsewhere we fall back to paths
+_FD_OK = (
+    os.unlink in os.supports_dir_fd
+    and os.rmdir in os.supports_dir_fd
+    and os.open in os.supports_dir_fd
+    and os.scandir in os.supports_fd
+)
+_DIR_FLAGS = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0) | getattr(os, "O_NOFOLLOW", 0)
+
+_jobs: Dict[str, Dict[str, Any]] = {}
+_lock = threading.Lock()
+_queue: "queue.Queue[str]" = queue.Queue()
+_worker: Optional[threading.Thread] = None
+
+
+# ---------- removal ----------
+
+def _count(job: Dict[str, Any], st: os.stat_result, is_dir: bool):
+    if is_dir:
+        job["dirs"] += 1
+    else:
+        job["files"] += 1
+        # hardlinked files (provisioned workspaces) free nothing until the last link goes
+        if st.st_nlink <= 1:
+            job["bytes_reclaimed"] += st.st_size
+
+
+def _rm_fd(dir_fd: int, job: Dict[str, Any]):
+    """Empty the directory open at dir_fd, entry by entry, relative to the fd."""
+    with os.scandir(dir_fd) as it:
+        entries = list(it)
+    for e in entries:
+        try:
+            st = e.stat(follow_symlinks=False)
+            if stat.S_ISDIR(st.st_mode):
+                fd = os.open(e.name, _DIR_FLAGS, dir_fd=dir_fd)
+                try:
+                    _rm_fd(fd, job)
+                finally:
+                    os.close(fd)
+                os.rmdir(e.name, dir_fd=dir_fd)
+                _count(job, st, True)
+            else:
+                os.unlink(e.name, dir_fd=dir_fd)
+                _count(job, st, False)
+        except OSError as err:
+            job["errors"].append(f"{e.name}: {err}")
+
+
+def _rm_paths(path: str, job: Dict[str, Any]):
+    with os.scandir(path) as it:
+        entries = list(it)
+    for e in entries:
+        try:
+            st = e.stat(follow_symlinks=False)
+            if stat.S_ISDIR(st.st_mode):
+                _rm_paths(e.path, job)
+                os.rmdir(e.path)
+                _count(job, st, True)
+            else:
+                os.unlink(e.path)
+                _count(job, st, False)
+        except OSError as err:
+            job["errors"].append(f"{e.path}: {err}")
+
+
+def _remove_tree(target: str, job: Dict[str, Any]):
+    st = os.lstat(target)
+    if not stat.S_ISDIR(st.st_mode):
+        os.unlink(target)
+        _count(job, st, False)
+        return
+    if _FD_OK:
+        fd = os.open(target, _DIR_FLAGS)
+        try:
+            _rm_fd(fd, job)
+        finally:
+            os.close(fd)
+    else:
+        _rm_paths(target, job)
+    os.rmdir(target)
+    _count(job, st, True)
+
+
+def _run(job_id: str):
+    job = _jobs.get(job_id)
+    if job is None:
+        return
+    job["status"] = "running"
+    job["started_at"] = time.time()
+    try:
+        _remove_tree(job["trash_path"], job)
+        job["status"] = "done" if not job["errors"] else "partial"
+    except FileNotFoundError:
+        job["status"] = "done"
+    except OSError as e:
+        job["status"] = "failed"
+        job["errors"].append(str(e))
+    job["ended_at"] = time.time()
+    job["duration_ms"] = int((job["ended_at"] - job["started_at"]) * 1000)
+    del job["errors"][50:]
+
+
+def _worker_loop():
+    while True:
+        job_id = _queue.get()
+        try:
+            _run(job_id)
+        finally:
+            _queue.task_done()
+
+
+def _ensure_worker():
+    global _worker
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_worker_loop, daemon=True, name="nova-delete")
+            _worker.start()
+
+
+def _prune():
+    finished = sorted((j for j in _jobs.values() if j["ended_at"]), key=lambda j: j["ended_at"])
+    for j in finished[:max(0, len(finished) - KEEP_JOBS)]:
+        del _jobs[j["id"]]
+
+
+def _enqueue(job_id: str, path: Path, trash_path: Path, moved: bool, label: str) -> Dict[str, Any]:
+    job = {
+        "id": job_id,
+        "label": label,
+        "path": str(path),
+        "trash_path": str(trash_path),
+        "moved_to_trash": moved,
+        "status": "queued",
+        "files": 0,
+        "dirs": 0,
+        "bytes_reclaimed": 0,
+        "errors": [],
+        "queued_at": time.time(),
+        "started_at": None,
+        "ended_at": None,
+        "duration_ms": None,
+    }
+    with _lock:
+        _prune()
+        _jobs[job_id] = job
+    _ensure_worker()
+    _queue.put(job_id)
+    return job
+
+
+# ---------- public API ----------
+
+def schedule(path: Path, label: str = "") -> Dict[str, Any]:
+    """
+    Delete a file or directory tree without waiting for it: the target is
+    renamed into .trash/ (atomic, so it disappears at once) and removed by
+    a background thread. Returns the deletion job; poll get(job_id).
+    """
+    path = Path(path)
+    if not os.path.lexists(path):
+        raise FileNotFoundError(str(path))
+
+    job_id = uuid.uuid4().hex[:10]
+    TRASH.mkdir(parents=True, exist_ok=True)
+    trash_path = _trash_name(job_id, path.name)
+    try:
+        os.rename(path, trash_path)
+        moved = True
+    except OSError:
+        # other filesystem (EXDEV) or busy: delete in place, still in the background
+        trash_path = path
+        moved = False
+
+    return dict(_enqueue(job_id, path, trash_path, moved, label))
+
+
+def get(job_id: str) -> Optional[Dict[str, Any]]:
+    job = _jobs.get(job_id)
+    return dict(job) if job else None
+
+
+def list_jobs(limit: int = 50) -> List[Dict[str, Any]]:
+    with _lock:
+        jobs = sorted(_jobs.values(), key=lambda j: j["queued_at"], reverse=True)
+    return [dict(j) for j in jobs[:limit]]
+
+
+def wait(job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Poll until the job finishes (for callers that really need it gone)."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        job = get(job_id)
+        if job is None or job["ended_at"]:
+            return job
+        if deadline is not None and time.monotonic() > deadline:
+            return job
+        time.sleep(0.02)
+
+
+def _trash_name(job_id: str, name: str) -> Path:
+    # the owning process id is part of the name, so other workers leave it alone
+    return TRASH / f"{job_id}.{os.getpid()}_{name}"
+
+
+def _owner(p: Path) -> Optional[int]:
+    head = p.name.split("_", 1)[0]
+    _, _, pid = head.partition(".")
+    return int(pid) if pid.isdigit() else None
+
+
+def resume():
+    """
+    Queue whatever is left in .trash/ (e.g. after a crash mid-delete).
+    Entries of live server workers are skipped; orphans are claimed by
+    renaming them to this process first, under a lock, so only one
+    worker deletes each of them.
+    """
+    if not TRASH.exists():
+        return
+    with FileLock(LOCK_DIR / "trash_resume.lock"):
+        with _lock:
+            tracked = {j["trash_path"] for j in _jobs.values()}
+        for p in list(TRASH.iterdir()):
+            owner = _owner(p)
+            if str(p) in tracked or (owner and owner != os.getpid() and pid_alive(owner)):
+                continue
+            job_id = uuid.uuid4().hex[:10]
+            claimed = _trash_name(job_id, p.name.split("_", 1)[-1])
+            try:
+                os.rename(p, claimed)
+            except OSError:
+                continue
+            _enqueue(job_id, p, claimed, True, "leftover")
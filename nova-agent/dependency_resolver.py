@@ -0,0 +1,209 @@
+# dependency_resolver.py
+import os
+import re
+import sys
+import json
+import hashlib
+import threading
+import uuid
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable
+
+BASE = Path(__file__).resolve().parent
+CACHE_DIR = BASE / "cache"
+
+RESOLVER_VERSION = 1
+
+# import name -> distribution to install, for popular packages whose names
+# differ (used only when nothing installed provides the import)
+KNOWN_DISTS = {
+    "yaml": "PyYAML",
+    "dotenv": "python-dotenv",
+    "cv2": "opencv-python",
+    "PIL": "Pillow",
+    "sklearn": "scikit-learn",
+    "skimage": "scikit-image",
+    "bs4": "beautifulsoup4",
+    "dateutil": "python-dateutil",
+    "jwt": "PyJWT",
+    "Crypto": "pycryptodome",
+    "serial": "pyserial",
+    "attr": "attrs",
+    "magic": "python-magic",
+    "docx": "python-docx",
+    "pptx": "python-pptx",
+    "multipart": "python-multipart",
+    "jose": "python-jose",
+    "google": "protobuf",
+    "OpenSSL": "pyOpenSSL",
+    "win32api": "pywin32",
+    "fitz": "PyMuPDF",
+}
+
+_lock = threading.Lock()
+_memo: Dict[str, Dict[str, Any]] = {}
+
+
+def normalize(name: str) -> str:
+    """PEP 503 normalized distribution name."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+# ---------- environment fingerprint ----------
+
+def environment_fingerprint() -> str:
+    """
+    Cheap identity of the current environment: interpreter + the mtime of
+    every sys.path directory (site-packages changes whenever something is
+    installed or removed). O(len(sys.path)) stats, no metadata reads.
+    """
+    h = hashlib.sha1()
+    h.update(sys.executable.encode("utf-8"))
+    h.update(sys.version.encode("utf-8"))
+    for p in sys.path:
+        if not p or not os.path.isdir(p):
+            continue
+        try:
+            h.update(f"{p}\0{os.stat(p).st_mtime_ns}\n".encode("utf-8"))
+        except OSError:
+            continue
+    return h.hexdigest()[:16]
+
+
+# ---------- index build ----------
+
+def build_index() -> Dict[str, Any]:
+    """
+    import name -> distributions, from packages_distributions() plus each
+    distribution's top_level.txt; stdlib names from sys.stdlib_module_names.
+    """
+    modules: Dict[str, set] = {}
+    versions: Dict[str, str] = {}
+
+    try:
+        for mod, dists in metadata.packages_distributions().items():
+            modules.setdefault(mod, set()).update(dists)
+    except Exception:
+        pass
+
+    for dist in metadata.distributions():
+        name = dist.metadata.get("Name")
+        if not name:
+            continue
+        versions[normalize(name)] = dist.version
+        try:
+            top = dist.read_text("top_level.txt") or ""
+        except Exception:
+            top = ""
+        for line in top.splitlines():
+            mod = line.strip().replace("/", ".").split(".")[0]
+            if mod:
+                modules.setdefault(mod, set()).add(name)
+
+    stdlib = set(getattr(sys, "stdlib_module_names", ())) | set(sys.builtin_module_names)
+
+    return {
+        "version": RESOLVER_VERSION,
+        "fingerprint": environment_fingerprint(),
+        "stdlib": sorted(stdlib),
+        "modules": {m: sorted(d) for m, d in modules.items()},
+        "distributions": versions,
+    }
+
+
+def _cache_path(fp: str) -> Path:
+    return CACHE_DIR / f"dep_index_{fp}.json"
+
+
+def load_index() -> Dict[str, Any]:
+    """
+    Resolver index for the running environment, cached in memory and on
+    disk under its fingerprint (rebuilt only after installs/removals).
+    The index is returned with set views for O(1) lookups.
+    """
+    fp = environment_fingerprint()
+    with _lock:
+        idx = _memo.get(fp)
+        if idx is not None:
+            return idx
+
+        data = None
+        p = _cache_path(fp)
+        if p.exists():
+            try:
+                data = json.load(open(p, "r", encoding="utf-8"))
+                if data.get("version") != RESOLVER_VERSION:
+                    data = None
+            except Exception:
+                data = None
+
+        if data is None:
+            data = build_index()
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            # older fingerprints of this cache are stale now
+            for old in CACHE_DIR.glob("dep_index_*.json"):
+                old.unlink(missing_ok=True)
+            tmp = p.with_suffix(f".tmp_{uuid.uuid4().hex[:6]}")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, p)
+
+        data["stdlib_set"] = set(data["stdlib"])
+        _memo.clear()
+        _memo[fp] = data
+        return data
+
+
+# ---------- resolution ----------
+
+def _resolve(module: str, index: Dict[str, Any], have: set, local: set) -> Dict[str, Any]:
+    if module in index["stdlib_set"]:
+        return {"module": module, "kind": "stdlib"}
+    if module in local:
+        return {"module": module, "kind": "local"}
+
+    dists = index["modules"].get(module, [])
+    provided = [d for d in dists if normalize(d) in have]
+    if provided:
+        return {"module": module, "kind": "installed", "distributions": provided}
+
+    # not provided by anything we know of; guess the package to install
+    candidate = KNOWN_DISTS.get(module) or (dists[0] if dists else module)
+    if normalize(candidate) in have:
+        return {"module": module, "kind": "installed", "distributions": [candidate]}
+    return {"module": module, "kind": "missing", "install": candidate}
+
+
+def _have(index: Dict[str, Any], installed: Optional[Iterable[str]]) -> set:
+    if installed is None:
+        return set(index["distributions"])
+    return {normalize(n) for n in installed}
+
+
+def resolve(module: str,
+            installed: Optional[Iterable[str]] = None,
+            local_modules: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Classify one top-level import name:
+      stdlib | local | installed | missing
+    `installed` (distribution names, e.g. env_meta["pip_packages"]) overrides
+    the live environment when given.
+    """
+    index = load_index()
+    return _resolve(module, index, _have(index, installed), set(local_modules or ()))
+
+
+def find_missing(imports: Iterable[str],
+                 installed: Optional[Iterable[str]] = None,
+                 local_modules: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+    """Imports that nothing in the environment provides, with what to install."""
+    index = load_index()
+    have = _have(index, installed)
+    local = set(local_modules or ())
+    out = []
+    for imp in imports:
+        r = _resolve(imp, index, have, local)
+        if r["kind"] == "missing":
+            out.append(r)
+    return out
@@ -0,0 +1,117 @@
+# dir_listing.py
+import os
+import time
+import fnmatch
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from workspace_manager import SKIP_DIRS
+
+CACHE_TTL_S = float(os.getenv("NOVA_LIST_CACHE_S", "5"))
+CACHE_SIZE = 32
+MAX_DEPTH = 20
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+_lock = threading.Lock()
+# (path, depth, glob) -> {"entries", "dirs": {dir: mtime_ns}, "at"}
+_cache: "OrderedDict[Tuple[str, int, str], Dict[str, Any]]" = OrderedDict()
+
+
+def _walk(top: Path, depth: int, pattern: str) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Breadth-first scandir walk down to `depth` levels (1 = top only).
+    Type and stat data come from the DirEntry, which caches them (one
+    stat call per entry at most; on Windows scandir already has it). The mtime of every directory
+    read is returned so cached listings can be validated cheaply.
+    """
+    entries: List[Dict[str, Any]] = []
+    dirs: Dict[str, int] = {}
+    match_path = "/" in pattern
+    level = [(str(top), "", 1)]
+
+    while level:
+        nxt = []
+        for d, prefix, lvl in level:
+            try:
+                it = os.scandir(d)
+                dirs[d] = os.stat(d).st_mtime_ns
+            except OSError:
+                continue
+            with it:
+                for e in it:
+                    rel = prefix + e.name
+                    try:
+                        is_dir = e.is_dir(follow_symlinks=False)
+                        st = e.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if not pattern or fnmatch.fnmatch(rel if match_path else e.name, pattern):
+                        entries.append({
+                            "name": e.name,
+                            "path": rel,
+                            "is_dir": is_dir,
+                            "size": None if is_dir else st.st_size,
+                            "mtime": st.st_mtime,
+                            "depth": lvl,
+                        })
+                    if is_dir and lvl < depth and e.name not in SKIP_DIRS:
+                        nxt.append((e.path, rel + "/", lvl + 1))
+        level = nxt
+
+    entries.sort(key=lambda x: x["path"])
+    return entries, dirs
+
+
+def _still_valid(hit: Dict[str, Any]) -> bool:
+    if time.monotonic() - hit["at"] > CACHE_TTL_S:
+        return False
+    for d, mtime in hit["dirs"].items():
+        try:
+            if os.stat(d).st_mtime_ns != mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def list_entries(path: Path, depth: int = 1, pattern: Optional[str] = None,
+                 cursor: Optional[str] = None, limit: int = DEFAULT_LIMIT) -> Dict[str, Any]:
+    """
+    One page of a (possibly recursive) listing, sorted by relative path.
+    `cursor` is the next_cursor of the previous page: the last path it
+    returned. The page starts after that path in the current listing, so
+    entries added or removed between pages don't shift it. Listings are
+    kept for NOVA_LIST_CACHE_S seconds and dropped early as soon as any
+    directory they cover changes (its mtime moves).
+    """
+    depth = max(1, min(int(depth), MAX_DEPTH))
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    pattern = pattern or ""
+    key = (str(path), depth, pattern)
+
+    with _lock:
+        hit = _cache.get(key)
+    cached = hit is not None and _still_valid(hit)
+    if not cached:
+        entries, dirs = _walk(path, depth, pattern)
+        hit = {"entries": entries, "dirs": dirs, "at": time.monotonic()}
+        with _lock:
+            _cache[key] = hit
+            _cache.move_to_end(key)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    entries = hit["entries"]
+    start = bisect_right(entries, cursor, key=lambda e: e["path"]) if cursor else 0
+    page = entries[start:start + limit]
+    end = start + len(page)
+    return {
+        "entries": page,
+        "total": len(entries),
+        "next_cursor": page[-1]["path"] if end < len(entries) else None,
+        "cached": cached,
+    }
@@ -8,6 +8,8 @@ from pathlib import Path
 from datetime import datetime
 from typing import Optional, Dict, Any
 
+from tracing import traced
+
 BASE = Path(__file__).resolve().parent
 
 def _run_cmd(cmd):
@@ -55,6 +57,7 @@ def node_info():
             npm_list = None
     return {"node_version": node_v, "npm_version": npm_v, "npm_top_level": npm_list}
 
+@traced("env.capture")
 def capture_environment(request_id: str, dest_dir: Optional[str | Path] = None) -> Dict[str, Any]:
     """
     Capture environment metadata and optionally write JSON into dest_dir.
@@ -0,0 +1,183 @@
+# executors.py
+import os
+import time
+import asyncio
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import wraps
+from typing import Dict, Any, Callable, List, Optional
+
+import tracing
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+# pool -> worker threads. Each kind of blocking work gets its own bounded
+# pool, so slow LLM calls or a burst of backups cannot starve NLU, and
+# nothing of it runs on the event loop or Starlette's shared threadpool.
+POOL_SIZES = {
+    # NLU inference, AST scans (torch releases the GIL; keep it near the core count)
+    "cpu": _env_int("NOVA_CPU_WORKERS", min(4, os.cpu_count() or 1)),
+    # files, zips, SQLite
+    "io": _env_int("NOVA_IO_WORKERS", 16),
+    # outbound LLM / provider HTTP calls (mostly waiting on the network)
+    "llm": _env_int("NOVA_LLM_WORKERS", 16),
+    # threads that block on a child process (sandbox runs)
+    "subprocess": _env_int("NOVA_SUBPROCESS_WORKERS", 4),
+    # individual calls of a parallel tool batch; kept apart from io/subprocess
+    # because the batch itself runs there and waits on these
+    "tool": _env_int("NOVA_TOOL_WORKERS", 8),
+}
+# tasks allowed to wait for a thread per pool; beyond that callers get PoolSaturated (503)
+MAX_QUEUE = _env_int("NOVA_EXEC_MAX_QUEUE", 100)
+
+WAIT_SECONDS = tracing.Histogram(
+    "nova_executor_wait_seconds",
+    "Time a task waited in an executor queue before a worker picked it up.",
+    ("pool",),
+)
+RUN_SECONDS = tracing.Histogram(
+    "nova_executor_run_seconds",
+    "Time a task ran on an executor worker.",
+    ("pool",),
+)
+
+
+class PoolSaturated(Exception):
+    """Raised when a pool already has MAX_QUEUE tasks waiting."""
+
+
+class _Pool:
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = max(1, workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.done = {"ok": 0, "error": 0, "rejected": 0}
+
+    def _get(self) -> ThreadPoolExecutor:
+        # created on first use: importing app must not spawn threads
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix=f"nova-{self.name}")
+        return self._executor
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        # run in a copy of the caller's context, so spans nest under the request trace
+        ctx = contextvars.copy_context()
+        queued_at = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+            WAIT_SECONDS.observe(started - queued_at, pool=self.name)
+            outcome = "error"
+            try:
+                result = ctx.run(fn, *args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                RUN_SECONDS.observe(time.perf_counter() - started, pool=self.name)
+                with self._lock:
+                    self.active -= 1
+                    self.done[outcome] += 1
+
+        with self._lock:
+            if self.queued >= MAX_QUEUE:
+                self.done["rejected"] += 1
+                raise PoolSaturated(f"{self.name} pool has {self.queued} tasks waiting "
+                                    f"(NOVA_EXEC_MAX_QUEUE={MAX_QUEUE})")
+            self.queued += 1
+            executor = self._get()
+        try:
+            return executor.submit(task)
+        except RuntimeError:
+            with self._lock:
+                self.queued -= 1
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"workers": self.workers, "queued": self.queued, "active": self.active,
+                    "completed": dict(self.done)}
+
+    def shutdown(self):
+        with self._lock:
+            ex, self._executor = self._executor, None
+        if ex is not None:
+            ex.shutdown(wait=False, cancel_futures=True)
+
+
+_pools: Dict[str, _Pool] = {name: _Pool(name, n) for name, n in POOL_SIZES.items()}
+
+
+def _pool(name: str) -> _Pool:
+    try:
+        return _pools[name]
+    except KeyError:
+        raise ValueError(f"unknown executor pool: {name} (have {sorted(_pools)})")
+
+
+# ---------- public API ----------
+
+def submit(pool: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+    """Run fn(*args, **kwargs) on `pool` from sync code; returns a Future."""
+    return _pool(pool).submit(fn, *args, **kwargs)
+
+
+async def run(pool: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Await fn(*args, **kwargs) on `pool` without blocking the event loop."""
+    return await asyncio.wrap_future(_pool(pool).submit(fn, *args, **kwargs))
+
+
+def offload(pool: str):
+    """
+    Decorator for sync FastAPI endpoints: the handler becomes async and
+    its body runs on `pool` instead of Starlette's shared threadpool.
+    The original function stays reachable as `handler.__wrapped__`.
+    """
+    _pool(pool)
+
+    def deco(fn):
+        @wraps(fn)
+        async def endpoint(*args, **kwargs):
+            return await run(pool, fn, *args, **kwargs)
+        return endpoint
+    return deco
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    return {name: p.stats() for name, p in _pools.items()}
+
+
+def shutdown():
+    for p in _pools.values():
+        p.shutdown()
+
+
+# ---------- metrics ----------
+
+@tracing.register_collector
+def _metrics() -> List[str]:
+    s = stats()
+    lines = []
+    for metric, kind, help_text, key in (
+        ("nova_executor_queue_depth", "gauge", "Tasks waiting for a worker thread.", "queued"),
+        ("nova_executor_active", "gauge", "Tasks currently running.", "active"),
+        ("nova_executor_workers", "gauge", "Configured worker threads.", "workers"),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        lines += [f'{metric}{{pool="{name}"}} {st[key]}' for name, st in s.items()]
+    lines += ["# HELP nova_executor_tasks_total Finished executor tasks by outcome (rejected = queue full).",
+              "# TYPE nova_executor_tasks_total counter"]
+    for name, st in s.items():
+        lines += [f'nova_executor_tasks_total{{pool="{name}",outcome="{o}"}} {n}'
+                  for o, n in st["completed"].items()]
+    return lines + WAIT_SECONDS.render() + RUN_SECONDS.render()
@@ -0,0 +1,153 @@
+# file_locks.py
+import os
+import time
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BASE = Path(__file__).resolve().parent
+LOCK_DIR = BASE / "locks"
+
+REQUEST_LOCK_TIMEOUT_S = float(os.getenv("NOVA_REQUEST_LOCK_TIMEOUT_S", "60"))
+POLL_S = 0.05
+
+if os.name == "nt":
+    import msvcrt
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd: int):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd: int):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class LockTimeout(Exception):
+    """The lock is held elsewhere (another thread or server process) past the timeout."""
+
+
+# lock path -> [owning thread, depth, fd]; makes FileLock re-entrant per thread
+_held: Dict[str, List[int]] = {}
+_held_lock = threading.Lock()
+
+
+class FileLock:
+    """
+    Exclusive advisory lock on a lock file, shared by every thread and
+    every server process (flock on POSIX, msvcrt.locking on Windows; both
+    release automatically if the process dies). Re-entrant within a thread.
+    timeout=None waits forever, 0 tries once.
+    """
+
+    def __init__(self, path: Path, timeout: Optional[float] = None):
+        self.path = Path(path)
+        self.timeout = timeout
+
+    def acquire(self) -> "FileLock":
+        key = str(self.path)
+        me = threading.get_ident()
+        with _held_lock:
+            h = _held.get(key)
+            if h is not None and h[0] == me:
+                h[1] += 1
+                return self
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(key, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        try:
+            while not _try_lock(fd):
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise LockTimeout(f"{self.path.name} is locked by another operation")
+                time.sleep(POLL_S)
+        except BaseException:
+            os.close(fd)
+            raise
+        with _held_lock:
+            _held[key] = [me, 1, fd]
+        return self
+
+    def release(self):
+        key = str(self.path)
+        with _held_lock:
+            h = _held.get(key)
+            if h is None or h[0] != threading.get_ident():
+                raise RuntimeError(f"{self.path.name} is not held by this thread")
+            h[1] -= 1
+            if h[1] > 0:
+                return
+            del _held[key]
+        try:
+            _unlock(h[2])
+        finally:
+            os.close(h[2])
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def lock_name(key: str) -> str:
+    """
+    File name for an arbitrary key: a readable prefix plus a hash of the
+    raw key, so keys that sanitise alike ("a/b", "a_b") never share a lock.
+    """
+    readable = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in key)[:40]
+    return f"{readable}-{hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]}"
+
+
+def request_lock(request_id: str, timeout: Optional[float] = REQUEST_LOCK_TIMEOUT_S) -> FileLock:
+    """
+    Advisory lock for one request_id: apply_patch, run_tests, merge,
+    rollback and prepare hold it, so two workers never touch the same
+    workspace at once.
+    """
+    return FileLock(LOCK_DIR / "requests" / f"{lock_name(request_id)}.lock", timeout=timeout)
+
+
+def integrated_lock(timeout: Optional[float] = REQUEST_LOCK_TIMEOUT_S) -> FileLock:
+    """
+    Advisory lock for integrated/ itself: merges and restores from any
+    request hold it, so their writes never interleave.
+    """
+    return FileLock(LOCK_DIR / "integrated.lock", timeout=timeout)
+
+
+def pid_alive(pid: int) -> bool:
+    """Whether a process with this pid exists (used to find work orphaned by a dead worker)."""
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        import ctypes
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,153 @@
+# import_index.py
+import os
+import json
+import hashlib
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from workspace_manager import SKIP_DIRS
+from analysis_engine import analyze_files
+
+BASE = Path(__file__).resolve().parent
+CACHE_DIR = BASE / "cache"
+
+INDEX_VERSION = 3
+
+_lock = threading.Lock()
+# root path -> loaded index {"version": .., "files": {rel: entry}}
+_loaded: Dict[str, Dict[str, Any]] = {}
+
+
+# ---------- persistence ----------
+
+def _index_path(root: Path) -> Path:
+    key = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:12]
+    return CACHE_DIR / f"import_index_{key}.json"
+
+
+def _load(root: Path) -> Dict[str, Any]:
+    key = str(root)
+    idx = _loaded.get(key)
+    if idx is not None:
+        return idx
+
+    idx = {"version": INDEX_VERSION, "root": key, "files": {}}
+    p = _index_path(root)
+    if p.exists():
+        try:
+            data = json.load(open(p, "r", encoding="utf-8"))
+            if data.get("version") == INDEX_VERSION:
+                idx = data
+        except Exception:
+            pass
+    _loaded[key] = idx
+    return idx
+
+
+def _save(root: Path, idx: Dict[str, Any]):
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    p = _index_path(root)
+    tmp = p.with_suffix(f".tmp_{uuid.uuid4().hex[:6]}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(idx, f)
+    os.replace(tmp, p)
+
+
+# ---------- refresh ----------
+
+def _walk_py(root: Path):
+    """Yield (relative posix path, DirEntry) for every .py file under root."""
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            it = os.scandir(d)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIP_DIRS and not entry.name.startswith("."):
+                        stack.append(Path(entry.path))
+                elif entry.name.endswith(".py") and entry.is_file(follow_symlinks=False):
+                    yield Path(entry.path).relative_to(root).as_posix(), entry
+
+
+def refresh(project_root: Path) -> Dict[str, Any]:
+    """
+    Bring the on-disk index for project_root up to date.
+
+    Every call is one stat pass over the tree (DirEntry stat, no reads).
+    Only files whose mtime or size changed are read; of those, only files
+    whose sha256 changed are analyzed again (in parallel for big batches,
+    see analysis_engine.py). Returns the per-file facts plus stats.
+    """
+    root = Path(project_root).resolve()
+    stats = {"files": 0, "reused": 0, "rehashed": 0, "parsed": 0, "removed": 0}
+
+    with _lock:
+        idx = _load(root)
+        files = idx["files"]
+        seen = set()
+        changed = {}  # abs path -> (rel, stat)
+
+        if root.exists():
+            for rel, entry in _walk_py(root):
+                seen.add(rel)
+                stats["files"] += 1
+                st = entry.stat(follow_symlinks=False)
+                cur = files.get(rel)
+
+                if cur and cur["mtime_ns"] == st.st_mtime_ns and cur["size"] == st.st_size:
+                    stats["reused"] += 1
+                    continue
+                changed[entry.path] = (rel, st)
+
+        items = [(p, (files.get(rel) or {}).get("sha256")) for p, (rel, _) in changed.items()]
+        for path, digest, facts in analyze_files(items):
+            rel, st = changed[path]
+            if facts is None:
+                # touched but not changed
+                files[rel]["mtime_ns"] = st.st_mtime_ns
+                stats["rehashed"] += 1
+            else:
+                files[rel] = {
+                    "mtime_ns": st.st_mtime_ns,
+                    "size": st.st_size,
+                    "sha256": digest,
+                    **facts,
+                }
+                stats["parsed"] += 1
+
+        removed = set(files) - seen
+        for rel in removed:
+            del files[rel]
+        stats["removed"] = len(removed)
+
+        if changed or removed:
+            _save(root, idx)
+
+        return {"files": dict(files), "stats": stats}
+
+
+def imports_from(files: Dict[str, Dict[str, Any]]) -> List[str]:
+    out = set()
+    for entry in files.values():
+        out.update(entry.get("imports", []))
+    return sorted(out)
+
+
+def project_imports(project_root: Path) -> List[str]:
+    """Sorted union of imports across the project, from the index."""
+    return imports_from(refresh(project_root)["files"])
+
+
+def invalidate(project_root: Optional[Path] = None):
+    """Forget the in-memory copy (the next refresh re-reads it from disk)."""
+    with _lock:
+        if project_root is None:
+            _loaded.clear()
+        else:
+            _loaded.pop(str(Path(project_root).resolve()), None)
@@ -0,0 +1,285 @@
+# job_queue.py
+import os
+import json
+import time
+import uuid
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import tracing
+from file_locks import FileLock, LOCK_DIR, lock_name, pid_alive
+
+BASE = Path(__file__).resolve().parent
+JOBS_DIR = BASE / "jobs"
+
+MAX_WORKERS = int(os.getenv("NOVA_JOB_WORKERS", "4"))
+MAX_PENDING = int(os.getenv("NOVA_JOB_MAX_PENDING", "100"))
+MAX_ATTEMPTS = int(os.getenv("NOVA_JOB_MAX_ATTEMPTS", "3"))
+RETENTION_HOURS = float(os.getenv("NOVA_JOB_RETENTION_HOURS", "48"))
+
+ACTIVE = ("queued", "running")
+TERMINAL = ("succeeded", "failed", "interrupted")
+
+# handler(params, progress) -> JSON-serialisable result
+Handler = Callable[[Dict[str, Any], Callable[..., None]], Any]
+
+
+class QueueFull(Exception):
+    """Raised by submit() when MAX_PENDING jobs are already waiting/running."""
+
+
+_handlers: Dict[str, Handler] = {}
+_jobs: Dict[str, Dict[str, Any]] = {}
+_lock = threading.RLock()
+_pool: Optional[ThreadPoolExecutor] = None
+
+
+# ---------- registry ----------
+
+def register(kind: str):
+    """Decorator: register the function that executes jobs of `kind`."""
+    def deco(fn: Handler) -> Handler:
+        _handlers[kind] = fn
+        return fn
+    return deco
+
+
+# ---------- persistence ----------
+
+def _job_file(job_id: str) -> Path:
+    return JOBS_DIR / f"{job_id}.json"
+
+
+def _persist(job: Dict[str, Any]):
+    JOBS_DIR.mkdir(parents=True, exist_ok=True)
+    p = _job_file(job["job_id"])
+    tmp = p.with_suffix(f".tmp_{uuid.uuid4().hex[:6]}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(job, f, indent=2, default=str)
+    os.replace(tmp, p)
+
+
+def _update(job: Dict[str, Any], **fields):
+    """Apply changes, bump the version (SSE clients watch it) and persist."""
+    with _lock:
+        job.update(fields)
+        job["version"] = job.get("version", 0) + 1
+        job["updated"] = datetime.utcnow().isoformat()
+        _persist(job)
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def _active_marker(kind: str, request_id: str) -> Path:
+    """jobs/active/<kind:request_id>.json -> {"job_id"} of the latest job for that pair."""
+    return JOBS_DIR / "active" / f"{lock_name(f'{kind}:{request_id}')}.json"
+
+
+def _from_disk(job_id: str) -> Optional[Dict[str, Any]]:
+    """A job as persisted; with several server workers it may be another worker's."""
+    try:
+        return json.load(open(_job_file(job_id), "r", encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+# ---------- execution ----------
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="nova-job")
+    return _pool
+
+
+def _run(job: Dict[str, Any]):
+    handler = _handlers.get(job["kind"])
+    if handler is None:
+        _update(job, status="failed", error=f"no handler for job kind '{job['kind']}'",
+                finished=_now())
+        return
+
+    def progress(stage: str, message: str = "", **info):
+        entry = {"ts": _now(), "stage": stage, "message": message}
+        if info:
+            entry["info"] = info
+        with _lock:
+            job["progress"].append(entry)
+            _update(job, stage=stage)
+
+    # background jobs get their own trace (see /traces)
+    t, token = tracing.start_trace(f"job {job['kind']}")
+    _update(job, status="running", started=_now(), attempts=job.get("attempts", 0) + 1,
+            trace_id=t.id)
+    try:
+        with tracing.span(f"job.{job['kind']}"):
+            result = handler(job["params"], progress)
+        _update(job, status="succeeded", result=result, finished=_now())
+    except Exception as e:
+        _update(job, status="failed", error=str(e),
+                traceback=traceback.format_exc(limit=5), finished=_now())
+    finally:
+        tracing.end_trace(t, token)
+
+
+def submit(kind: str, params: Dict[str, Any], request_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Queue a job and return its record immediately.
+
+    If a job of the same kind is already queued/running for the same
+    request_id, that job is returned instead (with "deduplicated": True).
+    That check goes through jobs/ under a file lock, so it also holds
+    across server workers: the job may be another worker's.
+    """
+    if kind not in _handlers:
+        raise ValueError(f"unknown job kind: {kind}")
+    if not request_id:
+        return _submit(kind, params, request_id)
+
+    with FileLock(LOCK_DIR / "jobs" / f"{lock_name(f'{kind}:{request_id}')}.lock"):
+        marker = _active_marker(kind, request_id)
+        try:
+            job_id = json.load(open(marker, "r", encoding="utf-8"))["job_id"]
+        except (OSError, ValueError, KeyError):
+            job_id = None
+        existing = get_job(job_id) if job_id else None
+        if existing and existing["status"] in ACTIVE:
+            owner = existing.get("owner")
+            if not owner or owner == os.getpid() or pid_alive(owner):
+                return {**existing, "deduplicated": True}
+
+        job = _submit(kind, params, request_id)
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        tmp = marker.with_suffix(f".tmp_{uuid.uuid4().hex[:6]}")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"job_id": job["job_id"]}, f)
+        os.replace(tmp, marker)
+        return job
+
+
+def _submit(kind: str, params: Dict[str, Any], request_id: Optional[str]) -> Dict[str, Any]:
+    with _lock:
+        pending = sum(1 for j in _jobs.values() if j["status"] in ACTIVE)
+        if pending >= MAX_PENDING:
+            raise QueueFull(f"{pending} jobs pending (limit {MAX_PENDING})")
+
+        job = {
+            "job_id": uuid.uuid4().hex[:12],
+            "kind": kind,
+            "request_id": request_id,
+            "params": params,
+            "status": "queued",
+            "stage": None,
+            "progress": [],
+            "result": None,
+            "error": None,
+            "attempts": 0,
+            "created": _now(),
+            "started": None,
+            "finished": None,
+            "version": 0,
+            "owner": os.getpid(),
+        }
+        _jobs[job["job_id"]] = job
+        _update(job)
+
+    _get_pool().submit(_run, job)
+    return {**job, "deduplicated": False}
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Jobs run by this worker come from memory; anything else (submitted to
+    another worker behind the same load balancer) is read from jobs/.
+    """
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is not None and job.get("owner", os.getpid()) == os.getpid():
+            return dict(job)
+    return _from_disk(job_id) or (dict(job) if job else None)
+
+
+def list_jobs(status: Optional[str] = None,
+              request_id: Optional[str] = None,
+              limit: int = 50) -> List[Dict[str, Any]]:
+    with _lock:
+        jobs = [
+            {k: v for k, v in j.items() if k not in ("params", "result", "progress", "traceback")}
+            for j in _jobs.values()
+            if (status is None or j["status"] == status)
+            and (request_id is None or j.get("request_id") == request_id)
+        ]
+    jobs.sort(key=lambda j: j["created"], reverse=True)
+    return jobs[:limit]
+
+
+# ---------- startup ----------
+
+def resume_pending() -> Dict[str, int]:
+    """
+    Load persisted jobs after a restart. Jobs that were queued or running
+    are queued again (up to MAX_ATTEMPTS); old finished jobs are pruned.
+
+    With several workers, every one of them calls this at startup: the
+    file lock serialises them and jobs whose owner process is still alive
+    are left to it, so each orphaned job is resumed exactly once.
+    """
+    stats = {"loaded": 0, "resumed": 0, "interrupted": 0, "pruned": 0, "foreign": 0}
+    if not JOBS_DIR.exists():
+        return stats
+
+    cutoff = time.time() - RETENTION_HOURS * 3600
+    to_run = []
+
+    with FileLock(LOCK_DIR / "jobs_resume.lock"), _lock:
+        for p in JOBS_DIR.glob("*.json"):
+            try:
+                job = json.load(open(p, "r", encoding="utf-8"))
+            except Exception:
+                continue
+
+            if job.get("status") in TERMINAL and p.stat().st_mtime < cutoff:
+                p.unlink(missing_ok=True)
+                stats["pruned"] += 1
+                continue
+
+            _jobs[job["job_id"]] = job
+            stats["loaded"] += 1
+
+            if job.get("status") not in ACTIVE:
+                continue
+            owner = job.get("owner")
+            if owner and owner != os.getpid() and pid_alive(owner):
+                stats["foreign"] += 1
+                continue
+
+            entry = {"ts": _now(), "stage": "restart", "message": "server restarted"}
+            job["progress"].append(entry)
+            if job["kind"] in _handlers and job.get("attempts", 0) < MAX_ATTEMPTS:
+                _update(job, status="queued", owner=os.getpid())
+                to_run.append(job)
+                stats["resumed"] += 1
+            else:
+                _update(job, status="interrupted", finished=_now())
+                stats["interrupted"] += 1
+
+        for p in (JOBS_DIR / "active").glob("*.json"):
+            if p.stat().st_mtime < cutoff:
+                p.unlink(missing_ok=True)
+
+    for job in to_run:
+        _get_pool().submit(_run, job)
+    return stats
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,454 @@
+# patch_engine.py
+import os
+import re
+import json
+import uuid
+import time
+import hashlib
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from workspace_manager import SKIP_DIRS
+
+BASE = Path(__file__).resolve().parent
+WORKSPACE_ROOT = BASE / "workspace"
+WORKSPACE_META = BASE / "workspace_meta"
+
+OPS = ("write", "diff", "delete", "rename")
+
+
+class PatchError(Exception):
+    """Raised when an operation cannot be applied; nothing is written."""
+
+
+# ---------- unified diff parsing ----------
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+def _strip_prefix(p: str) -> Optional[str]:
+    p = p.split("\t", 1)[0].strip()
+    if p == "/dev/null":
+        return None
+    if p.startswith(("a/", "b/")):
+        return p[2:]
+    return p
+
+
+def parse_unified_diff(text: str) -> List[Dict[str, Any]]:
+    """
+    Parse unified diff text into file patches:
+      [{"old": path|None, "new": path|None, "hunks": [...]}, ...]
+
+    Each hunk: {"old_start", "old_len", "lines": [(tag, text), ...]} where tag
+    is ' ', '-' or '+'. A diff with only hunks (no ---/+++ headers) yields a
+    single patch with old/new = None; the caller supplies the path.
+    """
+    patches: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    hunk: Optional[Dict[str, Any]] = None
+
+    lines = text.splitlines(keepends=True)
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+
+        if line.startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ "):
+            current = {
+                "old": _strip_prefix(line[4:]),
+                "new": _strip_prefix(lines[i + 1][4:]),
+                "hunks": [],
+            }
+            patches.append(current)
+            hunk = None
+            i += 2
+            continue
+
+        m = _HUNK_RE.match(line)
+        if m:
+            if current is None:
+                current = {"old": None, "new": None, "hunks": []}
+                patches.append(current)
+            hunk = {
+                "old_start": int(m.group(1)),
+                "old_len": int(m.group(2)) if m.group(2) is not None else 1,
+                "lines": [],
+            }
+            current["hunks"].append(hunk)
+            i += 1
+            continue
+
+        if hunk is not None and line[:1] in (" ", "-", "+"):
+            hunk["lines"].append((line[0], line[1:]))
+        elif hunk is not None and line.startswith("\\"):
+            # "\ No newline at end of file" applies to the previous line
+            if hunk["lines"]:
+                tag, prev = hunk["lines"][-1]
+                hunk["lines"][-1] = (tag, prev.rstrip("\r\n"))
+        elif hunk is not None and line in ("\n", "\r\n"):
+            # some tools drop the leading space on empty context lines
+            hunk["lines"].append((" ", line))
+        # anything else (diff --git, index ..., mode lines) is ignored
+        i += 1
+
+    return patches
+
+
+def _norm(line: str) -> str:
+    return line.rstrip("\r\n")
+
+
+def _eol(lines: List[str]) -> Optional[str]:
+    """Line ending of the first terminated line, None if there is none."""
+    for line in lines:
+        if line.endswith("\r\n"):
+            return "\r\n"
+        if line.endswith(("\n", "\r")):
+            return line[-1]
+    return None
+
+
+def apply_hunks(original: str, hunks: List[Dict[str, Any]], max_fuzz: int = 200) -> str:
+    """
+    Apply parsed hunks to `original`. Context must match exactly (ignoring
+    line endings); if a hunk doesn't sit at its stated line, search up to
+    `max_fuzz` lines either side, like `patch` does. The file keeps its own
+    line endings: context lines are taken from `original` and added lines
+    are converted to its EOL.
+    """
+    src = original.splitlines(keepends=True)
+    eol = _eol(src)
+    out: List[str] = []
+    pos = 0  # next unconsumed line in src
+
+    for n, h in enumerate(hunks, 1):
+        old_block = [t for tag, t in h["lines"] if tag in (" ", "-")]
+        want = [_norm(t) for t in old_block]
+
+        expected = max(h["old_start"] - 1, 0) if old_block else h["old_start"]
+        found = None
+        for delta in range(0, max_fuzz + 1):
+            for start in ((expected + delta,) if delta == 0 else (expected - delta, expected + delta)):
+                if start < pos or start + len(want) > len(src):
+                    continue
+                if [_norm(t) for t in src[start:start + len(want)]] == want:
+                    found = start
+                    break
+            if found is not None:
+                break
+
+        if found is None:
+            raise PatchError(f"hunk {n} does not apply (expected at line {h['old_start']})")
+
+        out.extend(src[pos:found])
+        at = found
+        for tag, t in h["lines"]:
+            if tag == " ":
+                out.append(src[at])
+                at += 1
+            elif tag == "-":
+                at += 1
+            elif eol and _norm(t) != t:
+                out.append(_norm(t) + eol)
+            else:
+                out.append(t)
+        pos = found + len(want)
+
+    out.extend(src[pos:])
+    return "".join(out)
+
+
+# ---------- content hashes ----------
+
+def _sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _sha256_file(path: Path, block_size: int = 65536) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(block_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _manifest_path(request_id: str) -> Path:
+    return WORKSPACE_META / f"{request_id}.hashes.json"
+
+
+def _walk(ws: Path):
+    for root, dirs, files in os.walk(ws):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for f in files:
+            full = Path(root) / f
+            yield full.relative_to(ws).as_posix(), full
+
+
+def load_hashes(request_id: str) -> Dict[str, str]:
+    """
+    Per-file sha256 of a workspace. The manifest keeps each file's size
+    and mtime next to its hash; a file whose stat no longer matches (it
+    was written by run_command, write_file, a test run...) is re-hashed,
+    so only changed files are read. Files modified in the same second the
+    manifest was saved are always re-hashed: their mtime can't tell an
+    edit apart from the recorded version.
+    """
+    ws = WORKSPACE_ROOT / request_id
+    entries: Dict[str, List] = {}
+    saved_ns = 0
+    mp = _manifest_path(request_id)
+    if mp.exists():
+        try:
+            doc = json.load(open(mp, "r", encoding="utf-8"))
+            entries, saved_ns = doc["files"], doc["saved_ns"]
+        except Exception:
+            pass
+
+    fresh: Dict[str, List] = {}
+    dirty = False
+    for rel, full in _walk(ws):
+        st = full.stat()
+        e = entries.get(rel)
+        if (e and e[1] == st.st_size and e[2] == st.st_mtime_ns
+                and st.st_mtime_ns < saved_ns - 1_000_000_000):
+            fresh[rel] = e
+            continue
+        fresh[rel] = [_sha256_file(full), st.st_size, st.st_mtime_ns]
+        dirty = True
+    if dirty or len(fresh) != len(entries):
+        _save_hashes(request_id, fresh)
+    return {rel: e[0] for rel, e in fresh.items()}
+
+
+def _save_hashes(request_id: str, entries: Dict[str, List]):
+    WORKSPACE_META.mkdir(parents=True, exist_ok=True)
+    mp = _manifest_path(request_id)
+    tmp = mp.with_suffix(f".tmp_{uuid.uuid4().hex[:6]}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"saved_ns": time.time_ns(), "files": entries}, f)
+    os.replace(tmp, mp)
+
+
+def workspace_hash(hashes: Dict[str, str]) -> str:
+    h = hashlib.sha256()
+    for rel in sorted(hashes):
+        h.update(f"{rel}\0{hashes[rel]}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+# ---------- batch apply ----------
+
+def _rel(ws: Path, rel_path: Optional[str]) -> str:
+    if not rel_path:
+        raise PatchError("path is required")
+    rel = rel_path.replace("\\", "/").lstrip("/")
+    full = (ws / rel).resolve()
+    if not str(full).startswith(str(ws.resolve()) + os.sep):
+        raise PatchError(f"path escapes workspace: {rel_path}")
+    return full.relative_to(ws.resolve()).as_posix()
+
+
+def _expand(ops: List[Dict[str, Any]]) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Turn multi-file diffs into one 'diff' op per file so every result maps
+    to a single path. Returns (input_index, op) pairs.
+    """
+    out = []
+    for idx, op in enumerate(ops):
+        kind = op.get("op", "write")
+        if kind not in OPS:
+            raise PatchError(f"operation {idx}: unknown op '{kind}'")
+
+        if kind != "diff":
+            out.append((idx, op))
+            continue
+
+        patches = parse_unified_diff(op.get("diff") or "")
+        if not patches:
+            raise PatchError(f"operation {idx}: empty diff")
+        for p in patches:
+            if op.get("path") and len(patches) == 1:
+                out.append((idx, {"op": "diff", "path": op["path"], "hunks": p["hunks"]}))
+            elif p["new"] is None and p["old"]:
+                out.append((idx, {"op": "delete", "path": p["old"]}))
+            elif p["old"] is None and p["new"]:
+                out.append((idx, {"op": "diff", "path": p["new"], "hunks": p["hunks"], "create": True}))
+            elif p["new"]:
+                if p["old"] != p["new"]:
+                    out.append((idx, {"op": "rename", "path": p["old"], "to": p["new"]}))
+                out.append((idx, {"op": "diff", "path": p["new"], "hunks": p["hunks"]}))
+            else:
+                raise PatchError(f"operation {idx}: diff has no file header and no path")
+    return out
+
+
+def apply_batch(request_id: str, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Apply many operations to workspace/<request_id> as one unit.
+
+    Operations:
+      {"op": "write",  "path": "a.py", "code": "..."}        full content
+      {"op": "diff",   "path": "a.py", "diff": "@@ ... @@"}   unified diff
+      {"op": "diff",   "diff": "--- a/x\\n+++ b/x\\n..."}     multi-file diff
+      {"op": "delete", "path": "a.py"}
+      {"op": "rename", "path": "a.py", "to": "b.py"}
+
+    Every operation is resolved in memory first; the workspace is only
+    touched once all of them succeed. Files are then swapped in with
+    os.replace and rolled back if any swap fails, so a batch is applied
+    completely or not at all.
+    """
+    ws = WORKSPACE_ROOT / request_id
+    results: List[Dict[str, Any]] = []
+
+    # ---- phase 1: compute the new state in memory ----
+    state: Dict[str, Optional[str]] = {}  # rel -> new text, None = deleted
+
+    def current(rel: str) -> Optional[str]:
+        if rel in state:
+            return state[rel]
+        full = ws / rel
+        if not full.is_file():
+            return None
+        # newline="": keep CRLF / CR endings as they are on disk
+        with open(full, "r", encoding="utf-8", newline="") as f:
+            return f.read()
+
+    try:
+        expanded = _expand(operations)
+        for idx, op in expanded:
+            kind = op.get("op", "write")
+            rel = _rel(ws, op.get("path"))
+
+            if kind == "write":
+                state[rel] = op.get("code", "")
+            elif kind == "diff":
+                old = current(rel)
+                if old is None and not op.get("create"):
+                    raise PatchError(f"operation {idx}: {rel} does not exist")
+                state[rel] = apply_hunks(old or "", op["hunks"])
+            elif kind == "delete":
+                if current(rel) is None:
+                    raise PatchError(f"operation {idx}: {rel} does not exist")
+                state[rel] = None
+            elif kind == "rename":
+                to = _rel(ws, op.get("to"))
+                text = current(rel)
+                if text is None:
+                    raise PatchError(f"operation {idx}: {rel} does not exist")
+                state[rel] = None
+                state[to] = text
+                results.append({"index": idx, "op": "rename", "path": rel, "to": to, "status": "validated"})
+                continue
+
+            results.append({"index": idx, "op": kind, "path": rel, "status": "validated"})
+    except (PatchError, UnicodeDecodeError, OSError) as e:
+        return {
+            "request_id": request_id,
+            "status": "failed",
+            "detail": str(e),
+            "results": results,
+            "applied": 0,
+        }
+
+    # baseline manifest (first call scans the untouched workspace)
+    hashes = load_hashes(request_id)
+    previous = workspace_hash(hashes)
+
+    # ---- phase 2: stage, then swap in ----
+    token = uuid.uuid4().hex[:6]
+    staged: Dict[str, Path] = {}
+    moved_aside: List[Tuple[Path, Path]] = []
+    created: List[Path] = []
+    # size bookkeeping for the workspace lifecycle index; files still
+    # hardlinked to integrated/ (nlink > 1) never counted as disk use
+    size_delta = disk_delta = files_delta = 0
+
+    try:
+        for rel, text in state.items():
+            if text is None:
+                continue
+            target = ws / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_name(f".{target.name}.nova_stage_{token}")
+            with open(tmp, "w", encoding="utf-8", newline="") as f:
+                f.write(text)
+            staged[rel] = tmp
+
+        for rel, text in state.items():
+            target = ws / rel
+            if target.exists():
+                st = target.stat()
+                size_delta -= st.st_size
+                files_delta -= 1
+                if st.st_nlink <= 1:
+                    disk_delta -= st.st_size
+                aside = target.with_name(f".{target.name}.nova_old_{token}")
+                os.replace(target, aside)
+                moved_aside.append((aside, target))
+            if text is not None:
+                os.replace(staged[rel], target)
+                del staged[rel]
+                created.append(target)
+                written = target.stat().st_size
+                size_delta += written
+                disk_delta += written
+                files_delta += 1
+    except OSError as e:
+        for target in created:
+            target.unlink(missing_ok=True)
+        for aside, target in reversed(moved_aside):
+            os.replace(aside, target)
+        for tmp in staged.values():
+            tmp.unlink(missing_ok=True)
+        return {
+            "request_id": request_id,
+            "status": "failed",
+            "detail": f"rolled back: {e}",
+            "results": results,
+            "applied": 0,
+        }
+
+    for aside, _ in moved_aside:
+        aside.unlink(missing_ok=True)
+
+    # ---- phase 3: hashes for the incremental test cache ----
+    changed = []
+    for rel, text in state.items():
+        if text is None:
+            if hashes.pop(rel, None) is not None:
+                changed.append(rel)
+            continue
+        digest = _sha256_text(text)
+        if hashes.get(rel) != digest:
+            changed.append(rel)
+        hashes[rel] = digest
+    manifest = {}
+    for rel, digest in hashes.items():
+        try:
+            st = (ws / rel).stat()
+        except OSError:
+            continue
+        # the stat of a file this batch didn't touch is the one load_hashes checked
+        manifest[rel] = [digest, st.st_size, st.st_mtime_ns]
+    _save_hashes(request_id, manifest)
+
+    for r in results:
+        r["status"] = "applied"
+        final = r.get("to") or r["path"]
+        if state.get(final) is not None:
+            r["sha256"] = hashes[final]
+            r["bytes"] = len(state[final].encode("utf-8"))
+
+    return {
+        "request_id": request_id,
+        "status": "applied",
+        "results": results,
+        "applied": len(results),
+        "changed": sorted(changed),
+        "previous_hash": previous,
+        "workspace_hash": workspace_hash(hashes),
+        "bytes_delta": size_delta,
+        "disk_bytes_delta": disk_delta,
+        "files_delta": files_delta,
+    }
@@ -0,0 +1,308 @@
+# perf_analyzer.py
+import ast
+from typing import List, Dict, Any, Set
+
+SEVERITY = {"high": 3, "medium": 2, "low": 1}
+
+RULES = {
+    "str_concat_in_loop": {
+        "title": "Build strings with join() instead of += in loops",
+        "severity": "medium",
+        "explanation": (
+            "Appending to a string inside a loop copies the whole string every time, "
+            "which turns into quadratic work on long inputs. Collect parts in a list "
+            "and ''.join() them once after the loop (or write to io.StringIO)."
+        ),
+    },
+    "repeated_json_load": {
+        "title": "Load each JSON file once",
+        "severity": "medium",
+        "explanation": (
+            "The same JSON file is parsed more than once (or inside a loop). "
+            "Load it once and reuse the result, or cache it keyed by the file's mtime."
+        ),
+    },
+    "subprocess_in_loop": {
+        "title": "Avoid starting a process per loop iteration",
+        "severity": "high",
+        "explanation": (
+            "Each subprocess call costs a fork/exec plus interpreter start-up (tens of ms or more). "
+            "Batch the work into one command, run the processes concurrently, or call the library "
+            "in-process instead."
+        ),
+    },
+    "list_membership_in_loop": {
+        "title": "Use a set for membership checks inside loops",
+        "severity": "high",
+        "explanation": (
+            "`x in some_list` scans the list every time, so doing it inside a loop is O(n*m). "
+            "Convert the list to a set (or dict) once before the loop for O(1) lookups."
+        ),
+    },
+    "sync_io_in_async": {
+        "title": "Don't block the event loop inside async functions",
+        "severity": "high",
+        "explanation": (
+            "Blocking file/network/process calls inside `async def` stall every other request "
+            "served by the same event loop. Use async libraries, or run the call with "
+            "asyncio.to_thread / run_in_executor."
+        ),
+    },
+}
+
+_SUBPROCESS_CALLS = {
+    "subprocess.run", "subprocess.call", "subprocess.check_call",
+    "subprocess.check_output", "subprocess.Popen", "os.system", "os.popen",
+}
+
+_BLOCKING_CALLS = _SUBPROCESS_CALLS | {
+    "open", "time.sleep", "json.load", "shutil.copy", "shutil.copy2",
+    "shutil.copytree", "shutil.rmtree", "shutil.make_archive",
+    "requests.get", "requests.post", "requests.put", "requests.delete",
+    "requests.request", "httpx.get", "httpx.post", "httpx.put",
+    "httpx.delete", "httpx.request", "urllib.request.urlopen",
+}
+
+_BLOCKING_METHODS = {"read_text", "write_text", "read_bytes", "write_bytes"}
+
+
+def _call_name(node: ast.Call) -> str:
+    """Dotted name of the callee when it is a plain name/attribute chain."""
+    parts = []
+    f = node.func
+    while isinstance(f, ast.Attribute):
+        parts.append(f.attr)
+        f = f.value
+    if isinstance(f, ast.Name):
+        parts.append(f.id)
+        return ".".join(reversed(parts))
+    return ""
+
+
+def _is_stringy(node: ast.AST) -> bool:
+    if isinstance(node, ast.JoinedStr):
+        return True
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return True
+    if isinstance(node, ast.Call) and _call_name(node) in ("str", "repr", "format"):
+        return True
+    if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Mod)):
+        return _is_stringy(node.left) or _is_stringy(node.right)
+    return False
+
+
+def _is_listy(node: ast.AST) -> bool:
+    if isinstance(node, (ast.List, ast.ListComp)):
+        return True
+    return isinstance(node, ast.Call) and _call_name(node) in ("list", "sorted")
+
+
+class _HotspotVisitor(ast.NodeVisitor):
+
+    def __init__(self):
+        self.findings: List[Dict[str, Any]] = []
+        self.loop_depth = 0
+        self.in_async = False
+        self.string_names: Set[str] = set()
+        self.list_names: Set[str] = set()
+        self.json_sources: Dict[str, int] = {}
+        self._seen: Set[tuple] = set()
+
+    def _add(self, rule: str, node: ast.AST, detail: str = ""):
+        line = getattr(node, "lineno", 0)
+        # json.load(open(p)) etc. would otherwise report one line twice
+        if (rule, line) in self._seen:
+            return
+        self._seen.add((rule, line))
+        self.findings.append({
+            "rule": rule,
+            "line": line,
+            "col": getattr(node, "col_offset", 0),
+            "loop_depth": self.loop_depth,
+            "detail": detail,
+        })
+
+    # ---- scopes ----
+    def _visit_function(self, node, is_async: bool):
+        saved = (self.loop_depth, self.in_async, self.string_names, self.list_names)
+        self.loop_depth = 0
+        self.in_async = is_async
+        self.string_names, self.list_names = set(), set()
+        self.generic_visit(node)
+        self.loop_depth, self.in_async, self.string_names, self.list_names = saved
+
+    def visit_FunctionDef(self, node):
+        self._visit_function(node, False)
+
+    def visit_AsyncFunctionDef(self, node):
+        self._visit_function(node, True)
+
+    def visit_Lambda(self, node):
+        self._visit_function(node, False)
+
+    def _visit_loop(self, node):
+        # the iterable / test is evaluated once (for) or per pass (while);
+        # only the body counts as "inside the loop"
+        for field in ("target", "iter", "test"):
+            child = getattr(node, field, None)
+            if child is not None:
+                self.visit(child)
+        self.loop_depth += 1
+        for stmt in node.body:
+            self.visit(stmt)
+        self.loop_depth -= 1
+        for stmt in node.orelse:
+            self.visit(stmt)
+
+    visit_For = _visit_loop
+    visit_AsyncFor = _visit_loop
+    visit_While = _visit_loop
+
+    def _visit_comprehension(self, node):
+        self.loop_depth += 1
+        self.generic_visit(node)
+        self.loop_depth -= 1
+
+    visit_ListComp = _visit_comprehension
+    visit_SetComp = _visit_comprehension
+    visit_DictComp = _visit_comprehension
+    visit_GeneratorExp = _visit_comprehension
+
+    # ---- bindings ----
+    def visit_Assign(self, node):
+        for t in node.targets:
+            if isinstance(t, ast.Name):
+                if _is_stringy(node.value):
+                    self.string_names.add(t.id)
+                    self.list_names.discard(t.id)
+                elif _is_listy(node.value):
+                    self.list_names.add(t.id)
+                    self.string_names.discard(t.id)
+                else:
+                    self.string_names.discard(t.id)
+                    self.list_names.discard(t.id)
+        self.generic_visit(node)
+
+    def visit_AugAssign(self, node):
+        if (self.loop_depth and isinstance(node.op, ast.Add)
+                and isinstance(node.target, ast.Name)
+                and (node.target.id in self.string_names or _is_stringy(node.value))):
+            self._add("str_concat_in_loop", node, f"{node.target.id} += ...")
+        self.generic_visit(node)
+
+    # ---- membership ----
+    def visit_Compare(self, node):
+        if self.loop_depth:
+            for op, comp in zip(node.ops, node.comparators):
+                if not isinstance(op, (ast.In, ast.NotIn)):
+                    continue
+                if isinstance(comp, ast.Name) and comp.id in self.list_names:
+                    self._add("list_membership_in_loop", node, f"... in {comp.id}")
+                elif isinstance(comp, ast.ListComp) or (isinstance(comp, ast.List) and len(comp.elts) > 8):
+                    self._add("list_membership_in_loop", node, "... in [list literal]")
+        self.generic_visit(node)
+
+    # ---- calls ----
+    def visit_Call(self, node):
+        name = _call_name(node)
+
+        if self.loop_depth and name in _SUBPROCESS_CALLS:
+            self._add("subprocess_in_loop", node, name)
+
+        if name in ("json.load", "json.loads") and node.args:
+            src = _json_source(node.args[0])
+            if src:
+                seen = self.json_sources.get(src, 0)
+                self.json_sources[src] = seen + 1
+                if seen or self.loop_depth:
+                    self._add("repeated_json_load", node, src)
+
+        if self.in_async:
+            method = node.func.attr if isinstance(node.func, ast.Attribute) else ""
+            if name in _BLOCKING_CALLS or method in _BLOCKING_METHODS:
+                self._add("sync_io_in_async", node, name or f".{method}()")
+
+        self.generic_visit(node)
+
+    def visit_Await(self, node):
+        # awaited calls are not blocking even if their name looks like I/O
+        # (e.g. `await client.get(...)`); only look inside the arguments
+        call = node.value
+        if isinstance(call, ast.Call):
+            for a in call.args:
+                self.visit(a)
+            for kw in call.keywords:
+                self.visit(kw.value)
+        else:
+            self.generic_visit(node)
+
+
+def _json_source(arg: ast.AST) -> str:
+    """
+    For json.load(open(X)) / json.loads(Path(X).read_text()) return the
+    source text of X, so repeated loads of the same file can be matched.
+    """
+    if isinstance(arg, ast.Call):
+        name = _call_name(arg)
+        if name == "open" and arg.args:
+            return ast.unparse(arg.args[0])
+        if isinstance(arg.func, ast.Attribute) and arg.func.attr in ("read_text", "read_bytes"):
+            return ast.unparse(arg.func.value)
+    return ""
+
+
+def find_hotspots(tree: ast.AST) -> List[Dict[str, Any]]:
+    """
+    Static performance findings for one parsed module, most severe first.
+    Each: {rule, line, col, loop_depth, detail, severity, score}.
+    """
+    v = _HotspotVisitor()
+    v.visit(tree)
+    for f in v.findings:
+        sev = RULES[f["rule"]]["severity"]
+        f["severity"] = sev
+        # nested loops make the same pattern proportionally worse
+        f["score"] = SEVERITY[sev] * (1 + max(f["loop_depth"] - 1, 0))
+    v.findings.sort(key=lambda f: (-f["score"], f["line"]))
+    return v.findings
+
+
+def rank_suggestions(project_files: Dict[str, Dict[str, Any]], max_locations: int = 20) -> List[Dict[str, Any]]:
+    """
+    Group per-file findings (from the import index facts) into one
+    suggestion per rule, in the advisor's suggestion dict format, ranked
+    by total score.
+    """
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for rel, facts in project_files.items():
+        for f in facts.get("hotspots") or []:
+            grouped.setdefault(f["rule"], []).append({
+                "file": rel,
+                "line": f["line"],
+                "detail": f["detail"],
+                "score": f["score"],
+            })
+
+    suggestions = []
+    for rule, locs in grouped.items():
+        spec = RULES[rule]
+        locs.sort(key=lambda x: (-x["score"], x["file"], x["line"]))
+        score = sum(x["score"] for x in locs)
+        files = len({x["file"] for x in locs})
+        suggestions.append({
+            "id": f"hotspot_{rule}",
+            "title": spec["title"],
+            "category": "hotspots",
+            "difficulty": "easy" if spec["severity"] != "high" else "medium",
+            "impact": "high" if score >= 6 or spec["severity"] == "high" else "medium",
+            "auto_applicable": False,
+            "explanation": (
+                f"{len(locs)} occurrence(s) in {files} file(s), e.g. "
+                f"{locs[0]['file']}:{locs[0]['line']}. " + spec["explanation"]
+            ),
+            "locations": locs[:max_locations],
+            "score": score,
+        })
+
+    suggestions.sort(key=lambda s: -s["score"])
+    return suggestions
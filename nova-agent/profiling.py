@@ -0,0 +1,138 @@
+# profiling.py
+import os
+import json
+import uuid
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+BASE = Path(__file__).resolve().parent
+PROFILES = BASE / "profiles"
+RUNNER = BASE / "sandbox" / "profile_run.py"
+
+KEEP = int(os.getenv("NOVA_PROFILE_KEEP", "50"))
+INTERVAL_MS = float(os.getenv("NOVA_PROFILE_INTERVAL_MS", "1"))
+
+
+# ---------- running ----------
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex[:10]
+
+
+def profiled_command(script: Path, args: Optional[List[str]] = None,
+                     run_id: Optional[str] = None, label: str = "") -> Dict[str, Any]:
+    """
+    Command line that runs `python script args...` under the sampling
+    profiler (sandbox/profile_run.py). The report lands in
+    profiles/<run_id>.json once the script exits.
+    """
+    PROFILES.mkdir(parents=True, exist_ok=True)
+    run_id = run_id or new_run_id()
+    cmd = [
+        "python", str(RUNNER),
+        "--out", str(PROFILES / f"{run_id}.json"),
+        "--interval-ms", str(INTERVAL_MS),
+        "--label", label,
+        "--", str(script), *(args or []),
+    ]
+    return {"id": run_id, "cmd": cmd}
+
+
+def finish(run_id: str, top: int = 10) -> Optional[Dict[str, Any]]:
+    """
+    Summary of a finished run for tool/endpoint responses (None when the
+    target was killed before the report was written), and prune old runs.
+    """
+    _prune()
+    report = load_profile(run_id)
+    if report is None:
+        return None
+    return _summary(report, top)
+
+
+def _summary(report: Dict[str, Any], top: int = 10) -> Dict[str, Any]:
+    return {
+        "id": report["id"],
+        "label": report.get("label", ""),
+        "target": report.get("target"),
+        "started_at": report.get("started_at"),
+        "duration_ms": report.get("duration_ms"),
+        "exit_code": report.get("exit_code"),
+        "samples": report.get("samples", 0),
+        "stacks": len(report.get("collapsed", {})),
+        "top_functions": report.get("top_functions", [])[:top],
+    }
+
+
+def _prune():
+    runs = sorted(PROFILES.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for p in runs[KEEP:]:
+        p.unlink(missing_ok=True)
+
+
+# ---------- reading ----------
+
+def load_profile(run_id: str) -> Optional[Dict[str, Any]]:
+    if not run_id or "/" in run_id or "\\" in run_id or run_id.startswith("."):
+        return None
+    p = PROFILES / f"{run_id}.json"
+    try:
+        return json.load(open(p, "r", encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _recent(limit: int) -> List[Dict[str, Any]]:
+    if not PROFILES.exists():
+        return []
+    runs = sorted(PROFILES.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    out = []
+    for p in runs[:limit]:
+        report = load_profile(p.stem)
+        if report is not None:
+            out.append(report)
+    return out
+
+
+def list_profiles(limit: int = 50) -> List[Dict[str, Any]]:
+    """Most recent runs first, summaries only (no stacks)."""
+    return [_summary(r, top=3) for r in _recent(limit)]
+
+
+def collapsed_text(run_id: str) -> Optional[str]:
+    """
+    Brendan Gregg's collapsed-stack format ("a;b;c 42" per line), which
+    flamegraph.pl, speedscope and inferno all read directly.
+    """
+    report = load_profile(run_id)
+    if report is None:
+        return None
+    lines = [f"{stack} {n}" for stack, n in sorted(report.get("collapsed", {}).items())]
+    return "\n".join(lines) + "\n"
+
+
+def latest_hotspots(runs: int = 5, top: int = 5) -> List[Dict[str, Any]]:
+    """
+    Measured hotspots across the most recent profiled runs: project
+    functions (not stdlib/site-packages) ranked by their share of samples.
+    """
+    merged: Dict[tuple, Dict[str, Any]] = {}
+    for report in _recent(runs):
+        for fn in report.get("top_functions", []):
+            if not fn.get("in_project"):
+                continue
+            key = (fn["file"], fn["function"], fn["line"])
+            cur = merged.setdefault(key, {
+                "function": fn["function"],
+                "file": fn["file"],
+                "line": fn["line"],
+                "label": fn["label"],
+                "self_pct": 0.0,
+                "total_pct": 0.0,
+                "runs": [],
+            })
+            cur["self_pct"] = max(cur["self_pct"], fn["self_pct"])
+            cur["total_pct"] = max(cur["total_pct"], fn["total_pct"])
+            cur["runs"].append(report["id"])
+    ranked = sorted(merged.values(), key=lambda f: (f["self_pct"], f["total_pct"]), reverse=True)
+    return ranked[:top]
@@ -0,0 +1,198 @@
+# range_reader.py
+import os
+import mmap
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+# lines are indexed per block: for each BLOCK-sized slice we keep only the
+# number of newlines before it, so the index stays tiny (8 bytes per 64 KB)
+# and finding a line means one bisect + a scan of at most one block
+BLOCK = 64 * 1024
+MAX_READ_BYTES = int(os.getenv("NOVA_READ_MAX_BYTES", str(1024 * 1024)))
+INDEX_CACHE_SIZE = int(os.getenv("NOVA_LINE_INDEX_CACHE", "64"))
+STREAM_CHUNK = 256 * 1024
+
+_lock = threading.Lock()
+_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+class _Mapped:
+    """mmap of a whole file, read-only; empty files map to b''."""
+
+    def __init__(self, path: Path):
+        self.f = open(path, "rb")
+        size = os.fstat(self.f.fileno()).st_size
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __enter__(self):
+        return self.mm
+
+    def __exit__(self, *exc):
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self.f.close()
+
+
+# ---------- line index ----------
+
+def _build(mm, size: int) -> Dict[str, Any]:
+    before = array("q")
+    n = 0
+    for start in range(0, size, BLOCK):
+        before.append(n)
+        n += mm[start:start + BLOCK].count(b"\n")   # mmap.count() is 3.13+
+    total = n + (1 if size and mm[size - 1:size] != b"\n" else 0)
+    return {"before": before, "newlines": n, "lines": total}
+
+
+def line_index(path: Path, mm=None) -> Dict[str, Any]:
+    """
+    Cached block index for `path`, rebuilt only when size/mtime change.
+    {size, mtime_ns, lines, newlines, before}.
+    """
+    st = os.stat(path)
+    key = str(path)
+    with _lock:
+        idx = _cache.get(key)
+        if idx and idx["size"] == st.st_size and idx["mtime_ns"] == st.st_mtime_ns:
+            _cache.move_to_end(key)
+            return idx
+
+    if mm is None:
+        with _Mapped(path) as m:
+            idx = _build(m, st.st_size)
+    else:
+        idx = _build(mm, st.st_size)
+    idx.update({"size": st.st_size, "mtime_ns": st.st_mtime_ns})
+
+    with _lock:
+        _cache[key] = idx
+        _cache.move_to_end(key)
+        while len(_cache) > INDEX_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return idx
+
+
+def _line_offset(mm, idx: Dict[str, Any], line: int) -> int:
+    """Byte offset where 0-based `line` starts (size when past the end)."""
+    if line <= 0:
+        return 0
+    if line > idx["newlines"]:
+        return idx["size"]
+    # the line-th newline is in the last block that has fewer than `line` before it
+    b = bisect_left(idx["before"], line) - 1
+    pos = b * BLOCK - 1
+    for _ in range(line - idx["before"][b]):
+        pos = mm.find(b"\n", pos + 1)
+    return pos + 1
+
+
+# ---------- ranges ----------
+
+def resolve_range(mm, idx: Dict[str, Any], args: Dict[str, Any]) -> Tuple[int, int, Dict[str, Any]]:
+    """
+    Turn read arguments into a byte range [start, end).
+
+      offset/length        byte range
+      start_line/end_line  1-based, inclusive (or start_line + max_lines)
+      tail                 last N lines
+    Without any of these the whole file is the range.
+    """
+    size = idx["size"]
+    info: Dict[str, Any] = {}
+
+    if args.get("tail") is not None:
+        n = max(int(args["tail"]), 0)
+        end = size
+        pos = size - 1 if size and mm[size - 1:size] == b"\n" else size
+        start = pos
+        for _ in range(n):
+            start = mm.rfind(b"\n", 0, start)
+            if start < 0:
+                break
+        start = 0 if start < 0 else min(start + 1, size)
+        if n == 0:
+            start = size
+        first = idx["lines"] - n + 1
+        info.update({"mode": "tail", "start_line": max(first, 1), "end_line": idx["lines"]})
+        return start, end, info
+
+    if args.get("start_line") is not None or args.get("end_line") is not None:
+        first = max(int(args.get("start_line") or 1), 1)
+        if args.get("end_line") is not None:
+            last = int(args["end_line"])
+        elif args.get("max_lines") is not None:
+            last = first + int(args["max_lines"]) - 1
+        else:
+            last = idx["lines"]
+        last = min(last, idx["lines"])
+        start = _line_offset(mm, idx, first - 1)
+        end = _line_offset(mm, idx, last) if last >= first else start
+        info.update({"mode": "lines", "start_line": first, "end_line": max(last, first - 1)})
+        return start, end, info
+
+    start = min(max(int(args.get("offset") or 0), 0), size)
+    length = args.get("length")
+    end = size if length is None else min(start + max(int(length), 0), size)
+    info.update({"mode": "bytes" if ("offset" in args or length is not None) else "full"})
+    return start, end, info
+
+
+def read_range(path: Path, args: Dict[str, Any], max_bytes: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Read part of a file through mmap. The result is capped at max_bytes
+    (NOVA_READ_MAX_BYTES) -- larger ranges come back truncated with
+    `next_offset` set, so callers can page or switch to streaming.
+    """
+    cap = MAX_READ_BYTES if max_bytes is None else max_bytes
+    with _Mapped(path) as mm:
+        idx = line_index(path, mm)
+        start, end, info = resolve_range(mm, idx, args)
+        truncated = end - start > cap
+        stop = start + cap if truncated else end
+        data = mm[start:stop]
+
+    out = {
+        "size": idx["size"],
+        "total_lines": idx["lines"],
+        "offset": start,
+        "end": stop,
+        "truncated": truncated,
+        "content": data.decode("utf-8", errors="replace"),
+        **info,
+    }
+    if truncated:
+        out["next_offset"] = stop
+    return out
+
+
+def iter_range(path: Path, args: Dict[str, Any], chunk: int = STREAM_CHUNK) -> Tuple[Dict[str, Any], Iterator[bytes]]:
+    """
+    (header, byte iterator) for streaming a range without building it in
+    memory. The mapping stays open until the iterator is exhausted/closed.
+    """
+    m = _Mapped(path)
+    mm = m.mm
+    try:
+        idx = line_index(path, mm)
+        start, end, info = resolve_range(mm, idx, args)
+    except Exception:
+        m.__exit__(None, None, None)
+        raise
+
+    def gen():
+        try:
+            pos = start
+            while pos < end:
+                nxt = min(pos + chunk, end)
+                yield bytes(mm[pos:nxt])
+                pos = nxt
+        finally:
+            m.__exit__(None, None, None)
+
+    header = {"size": idx["size"], "total_lines": idx["lines"], "offset": start, "end": end, **info}
+    return header, gen()
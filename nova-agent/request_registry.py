@@ -0,0 +1,279 @@
+# request_registry.py
+import json
+import time
+import sqlite3
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import state_db
+from state_db import connect
+from file_locks import FileLock, LOCK_DIR
+
+log = logging.getLogger("nova.registry")
+
+BASE = Path(__file__).resolve().parent
+LEGACY_DIR = BASE / "requests"
+
+MAX_LIMIT = 500
+
+# columns callers may set directly; everything else goes into the JSON `data`
+COLUMNS = ("kind", "intent", "instruction", "path", "workspace", "backup_id")
+
+state_db.register_schema("""
+CREATE TABLE IF NOT EXISTS requests (
+    request_id  TEXT PRIMARY KEY,
+    kind        TEXT,
+    status      TEXT NOT NULL,
+    intent      TEXT,
+    instruction TEXT,
+    path        TEXT,
+    workspace   TEXT,
+    backup_id   TEXT,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL,
+    data        TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_requests_created ON requests (created_at DESC, request_id DESC);
+CREATE INDEX IF NOT EXISTS idx_requests_status_created ON requests (status, created_at DESC, request_id DESC);
+CREATE TABLE IF NOT EXISTS request_stages (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    request_id TEXT NOT NULL,
+    stage      TEXT NOT NULL,
+    status     TEXT,
+    at         REAL NOT NULL,
+    info       TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_stages_request ON request_stages (request_id, at);
+""")
+
+# ---------- helpers ----------
+
+def _ts(value: Any) -> Optional[float]:
+    """Epoch seconds from an epoch number or an ISO date/time (naive = UTC)."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts is not None else None
+
+
+# ---------- writes ----------
+
+def record(request_id: str, stage: str, status: Optional[str] = None,
+           data: Optional[Dict[str, Any]] = None, at: Optional[float] = None,
+           info: Optional[Dict[str, Any]] = None, **fields) -> None:
+    """
+    Upsert a request and log one stage event for it.
+
+    `status` (when given) becomes the request's current status; `fields`
+    set the indexed columns (kind, intent, instruction, path, workspace,
+    backup_id) and `data` is shallow-merged into the stored JSON record.
+    Unknown requests are created on the fly, so any stage may come first.
+    """
+    unknown = set(fields) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"unknown request fields: {sorted(unknown)}")
+    now = at if at is not None else time.time()
+    cols = {k: v for k, v in fields.items() if v is not None}
+
+    with state_db.transaction() as conn:
+        _record(conn, request_id, stage, status, data, now, info, cols)
+
+
+def _record(conn: sqlite3.Connection, request_id: str, stage: str, status: Optional[str],
+            data: Optional[Dict[str, Any]], now: float, info: Optional[Dict[str, Any]],
+            cols: Dict[str, Any]) -> None:
+    """record() inside the caller's transaction."""
+    row = conn.execute("SELECT status, data FROM requests WHERE request_id = ?", (request_id,)).fetchone()
+    if row is None:
+        merged = dict(data or {})
+        names = ["request_id", "status", "created_at", "updated_at", "data", *cols]
+        conn.execute(
+            f"INSERT INTO requests ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+            (request_id, status or stage, now, now, json.dumps(merged, default=str), *cols.values()),
+        )
+    else:
+        merged = {**json.loads(row["data"] or "{}"), **(data or {})}
+        sets = {"updated_at": now, "data": json.dumps(merged, default=str), **cols}
+        if status:
+            sets["status"] = status
+        conn.execute(
+            f"UPDATE requests SET {', '.join(f'{k} = ?' for k in sets)} WHERE request_id = ?",
+            (*sets.values(), request_id),
+        )
+    conn.execute(
+        "INSERT INTO request_stages (request_id, stage, status, at, info) VALUES (?, ?, ?, ?, ?)",
+        (request_id, stage, status, now, json.dumps(info, default=str) if info else None),
+    )
+
+
+# ---------- reads ----------
+
+def _summary(row: sqlite3.Row) -> Dict[str, Any]:
+    d = {k: row[k] for k in row.keys() if k != "data"}
+    d["created"] = _iso(d["created_at"])
+    d["updated"] = _iso(d["updated_at"])
+    return d
+
+
+def get(request_id: str) -> Optional[Dict[str, Any]]:
+    conn = connect()
+    row = conn.execute("SELECT * FROM requests WHERE request_id = ?", (request_id,)).fetchone()
+    if row is None:
+        return None
+    out = _summary(row)
+    out["data"] = json.loads(row["data"] or "{}")
+    out["stages"] = [
+        {"stage": s["stage"], "status": s["status"], "at": s["at"], "time": _iso(s["at"]),
+         **({"info": json.loads(s["info"])} if s["info"] else {})}
+        for s in conn.execute(
+            "SELECT stage, status, at, info FROM request_stages WHERE request_id = ? ORDER BY at, id",
+            (request_id,),
+        )
+    ]
+    return out
+
+
+def list_requests(status: Optional[str] = None, kind: Optional[str] = None,
+                  since: Any = None, until: Any = None,
+                  limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Newest first. Served from the (status, created_at) / (created_at)
+    indexes with keyset pagination: `cursor` is the next_cursor of the
+    previous page, so deep pages cost the same as the first one.
+    """
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    where, args = [], []
+    if status:
+        where.append("status = ?")
+        args.append(status)
+    if kind:
+        where.append("kind = ?")
+        args.append(kind)
+    if since is not None and since != "":
+        where.append("created_at >= ?")
+        args.append(_ts(since))
+    if until is not None and until != "":
+        where.append("created_at < ?")
+        args.append(_ts(until))
+    if cursor:
+        try:
+            c_at, c_id = cursor.split("_", 1)
+            c_at = float(c_at)
+        except ValueError:
+            raise ValueError("invalid cursor")
+        where.append("(created_at < ? OR (created_at = ? AND request_id < ?))")
+        args += [c_at, c_at, c_id]
+
+    sql = ("SELECT request_id, kind, status, intent, instruction, path, workspace, backup_id, "
+           "created_at, updated_at FROM requests")
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY created_at DESC, request_id DESC LIMIT ?"
+    rows = connect().execute(sql, (*args, limit + 1)).fetchall()
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    items = [_summary(r) for r in rows]
+    next_cursor = f"{rows[-1]['created_at']!r}_{rows[-1]['request_id']}" if more else None
+    return {"requests": items, "count": len(items), "next_cursor": next_cursor}
+
+
+def counts() -> Dict[str, int]:
+    rows = connect().execute("SELECT status, COUNT(*) AS n FROM requests GROUP BY status").fetchall()
+    return {r["status"]: r["n"] for r in rows}
+
+
+# ---------- legacy requests/*.json ----------
+
+# file suffix -> (stage, status, kind); order matters: plan, then prepare, then builder
+_LEGACY = (
+    (".plan.json", "plan", "planned", "plan"),
+    (".req.json", "prepare", "prepared", None),
+    (".builder.json", "builder", None, "builder"),
+)
+
+
+def migrate_legacy(directory: Path = LEGACY_DIR) -> Dict[str, Any]:
+    """
+    Import the old per-request JSON files once (the files are left in
+    place). Later calls are no-ops; delete the `legacy_import` meta row
+    to import again. Every worker calls this at startup, before serving;
+    the lock makes the others wait and then find the import done.
+    Requests already in the table keep their current status.
+    """
+    with FileLock(LOCK_DIR / "registry_migrate.lock"):
+        return _migrate_legacy(directory)
+
+
+def _migrate_legacy(directory: Path) -> Dict[str, Any]:
+    conn = connect()
+    done = conn.execute("SELECT value FROM meta WHERE key = 'legacy_import'").fetchone()
+    if done:
+        return {"imported": 0, "skipped": True, "previous": json.loads(done["value"])}
+
+    # read every file first, so the write transaction below holds the
+    # database lock only for the inserts
+    stats = {"imported": 0, "errors": []}
+    entries = []
+    if directory.exists():
+        for suffix, stage, status, kind in _LEGACY:
+            for f in sorted(directory.glob(f"*{suffix}")):
+                try:
+                    rec = json.load(open(f, "r", encoding="utf-8"))
+                    rid = rec.get("request_id") or f.name[:-len(suffix)]
+                    at = _ts(rec.get("created")) or f.stat().st_mtime
+                    backup = rec.get("backup") or {}
+                    cols = {
+                        "kind": kind,
+                        "intent": rec.get("intent"),
+                        "instruction": rec.get("instruction"),
+                        "workspace": rec.get("workspace"),
+                        "backup_id": backup.get("backup_id"),
+                    }
+                    entries.append((rid, stage, status or rec.get("status") or "planned", at,
+                                    {k: v for k, v in cols.items() if v is not None},
+                                    {k: v for k, v in rec.items() if k not in ("request_id", "created")},
+                                    f.name))
+                except (OSError, ValueError, AttributeError) as e:
+                    stats["errors"].append(f"{f.name}: {e}")
+
+    # all or nothing: a crash half-way leaves no partial import behind
+    # for the next start to stack a second copy on
+    with state_db.transaction() as conn:
+        # requests the server already tracks keep their live status; the
+        # import only sets status on rows it creates itself
+        live = {r["request_id"] for r in conn.execute("SELECT request_id FROM requests")}
+        imported = set()
+        for rid, stage, status, at, cols, data, name in entries:
+            _record(conn, rid, stage, None if rid in live else status, data, at,
+                    {"imported_from": name}, cols)
+            imported.add(rid)
+        stats["imported"] = len(entries)
+
+        # imported files may have been planned after they were prepared: the
+        # created_at of an imported request is its earliest stage
+        conn.executemany("""
+            UPDATE requests SET created_at = (
+                SELECT MIN(at) FROM request_stages s WHERE s.request_id = requests.request_id
+            ) WHERE request_id = ?
+        """, [(rid,) for rid in sorted(imported)])
+        summary = {"imported": stats["imported"], "errors": len(stats["errors"]), "at": time.time()}
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_import', ?)",
+                     (json.dumps(summary),))
+    if stats["errors"]:
+        log.warning(f"[REGISTRY] {len(stats['errors'])} legacy request files not imported: {stats['errors'][:5]}")
+    return {**stats, "skipped": False}
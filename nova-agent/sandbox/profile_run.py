@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import time
+import runpy
+import threading
+import traceback
+from collections import Counter
+
+# Usage:
+#   python profile_run.py --out <file.json> [--interval-ms 1] [--label text] -- script.py [args...]
+#
+# Runs script.py in this interpreter (like `python script.py args...`)
+# while a background thread samples the main thread's stack. Writes
+# collapsed stacks + top functions as JSON to --out when the script ends.
+
+THIS_FILES = {__file__, os.path.abspath(__file__)}
+RUNPY_FILES = {runpy.__file__, "<frozen runpy>"}
+
+
+def parse_args(argv):
+    opts = {"out": None, "interval_ms": 1.0, "label": ""}
+    i = 0
+    while i < len(argv):
+        a = argv[i]
+        if a == "--":
+            return opts, argv[i + 1:]
+        if a == "--out":
+            opts["out"] = argv[i + 1]
+            i += 2
+        elif a == "--interval-ms":
+            opts["interval_ms"] = float(argv[i + 1])
+            i += 2
+        elif a == "--label":
+            opts["label"] = argv[i + 1]
+            i += 2
+        else:
+            return opts, argv[i:]
+    return opts, []
+
+
+class Sampler(threading.Thread):
+    def __init__(self, thread_id, interval_s):
+        super().__init__(daemon=True, name="nova-sampler")
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.stacks = Counter()   # tuple of code keys (root -> leaf) -> samples
+        self.samples = 0
+        self._halt = threading.Event()
+
+    def run(self):
+        while not self._halt.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                if code.co_filename in THIS_FILES:
+                    break  # everything below is the profiler itself
+                stack.append((code.co_filename, code.co_name, code.co_firstlineno))
+                frame = frame.f_back
+            # drop runpy plumbing between us and the script
+            while stack and stack[-1][0] in RUNPY_FILES:
+                stack.pop()
+            if stack:
+                stack.reverse()
+                self.stacks[tuple(stack)] += 1
+                self.samples += 1
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+
+
+def frame_label(key, cwd):
+    filename, name, line = key
+    try:
+        rel = os.path.relpath(filename, cwd)
+    except ValueError:
+        rel = filename
+    if rel.startswith(".."):
+        rel = os.path.basename(filename)
+    return f"{name} ({rel}:{line})"
+
+
+def summarize(sampler, cwd, project_dirs, top_n=30):
+    collapsed = {}
+    self_counts = Counter()
+    total_counts = Counter()
+    for stack, n in sampler.stacks.items():
+        collapsed[";".join(frame_label(k, cwd) for k in stack)] = n
+        self_counts[stack[-1]] += n
+        for k in set(stack):
+            total_counts[k] += n
+
+    total = max(sampler.samples, 1)
+    top = []
+    for key, n in total_counts.most_common(top_n * 2):
+        filename, name, line = key
+        top.append({
+            "function": name,
+            "file": filename,
+            "line": line,
+            "label": frame_label(key, cwd),
+            "in_project": any(os.path.abspath(filename).startswith(d + os.sep) for d in project_dirs),
+            "self": self_counts.get(key, 0),
+            "total": n,
+            "self_pct": round(100.0 * self_counts.get(key, 0) / total, 1),
+            "total_pct": round(100.0 * n / total, 1),
+        })
+    # functions that burn time themselves first, then by inclusive time
+    top.sort(key=lambda f: (f["self"], f["total"]), reverse=True)
+    return collapsed, top[:top_n]
+
+
+def main():
+    opts, target = parse_args(sys.argv[1:])
+    if not opts["out"] or not target:
+        print("usage: profile_run.py --out FILE [--interval-ms N] [--label L] -- script.py [args...]")
+        sys.exit(2)
+
+    script = os.path.abspath(target[0])
+    cwd = os.path.abspath(os.getcwd())
+    sys.argv = [script] + target[1:]
+    sys.path[0] = os.path.dirname(script)
+
+    interval_s = max(opts["interval_ms"], 0.1) / 1000.0
+    # the sampler needs the GIL to take a sample; the default 5 ms switch
+    # interval would cap the sampling rate well below what was asked for
+    sys.setswitchinterval(min(sys.getswitchinterval(), interval_s))
+    sampler = Sampler(threading.main_thread().ident, interval_s)
+    exit_code = 0
+    started = time.time()
+    t0 = time.perf_counter()
+    sampler.start()
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException:
+        traceback.print_exc()
+        exit_code = 1
+    finally:
+        duration_ms = int((time.perf_counter() - t0) * 1000)
+        sampler.stop()
+
+        collapsed, top = summarize(sampler, cwd, {cwd, os.path.dirname(script)})
+        report = {
+            "id": os.path.splitext(os.path.basename(opts["out"]))[0],
+            "label": opts["label"],
+            "target": script,
+            "argv": target[1:],
+            "cwd": cwd,
+            "mode": "sampling",
+            "interval_ms": opts["interval_ms"],
+            "started_at": started,
+            "duration_ms": duration_ms,
+            "exit_code": exit_code,
+            "samples": sampler.samples,
+            "collapsed": collapsed,
+            "top_functions": top,
+        }
+        tmp = opts["out"] + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(report, f)
+        os.replace(tmp, opts["out"])
+
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# startup.py
+import os
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, Callable, List
+
+log = logging.getLogger("nova.startup")
+
+BASE = Path(__file__).resolve().parent
+
+# false = skip the background warmup; models and clients still load on
+# first use. Data migrations (run_migration) are not warmup and always run.
+WARMUP = os.getenv("NOVA_WARMUP", "true").lower() == "true"
+
+STARTED_AT = time.time()
+
+_lock = threading.Lock()
+_tasks: Dict[str, Dict[str, Any]] = {}
+_started = False
+
+
+# ---------- init work that used to run at import ----------
+
+def ensure_dirs(*dirs: Path):
+    for d in dirs:
+        Path(d).mkdir(parents=True, exist_ok=True)
+
+
+# ---------- background warmup ----------
+
+def add_task(name: str, fn: Callable[[], Any]):
+    """
+    Register slow initialization (model loads, SDK clients) to run after
+    the server is up instead of at import. fn raising marks the task
+    failed; /ready then lists it as degraded rather than blocking forever.
+    """
+    with _lock:
+        _tasks[name] = {"fn": fn, "status": "pending", "duration_ms": None, "error": None, "result": None}
+
+
+def _run_tasks():
+    for name, task in list(_tasks.items()):
+        if task["status"] != "pending":
+            continue
+        task["status"] = "running"
+        t0 = time.perf_counter()
+        try:
+            res = task["fn"]()
+            task["result"] = res if isinstance(res, (dict, list, str, int, float, bool)) else None
+            task["status"] = "done"
+        except Exception as e:
+            task["status"] = "failed"
+            task["error"] = str(e)
+            log.warning(f"[STARTUP] warmup task {name} failed: {e}")
+        task["duration_ms"] = int((time.perf_counter() - t0) * 1000)
+
+
+def begin():
+    """Start the registered warmup tasks on a background thread (once)."""
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+    if not WARMUP:
+        for task in _tasks.values():
+            if task["status"] == "pending":
+                task["status"] = "skipped"
+        return
+    threading.Thread(target=_run_tasks, daemon=True, name="nova-warmup").start()
+
+
+# ---------- data migrations ----------
+
+def run_migration(name: str, fn: Callable[[], Any]):
+    """
+    Run a one-off data import now, in the lifespan before the server takes
+    requests: live writes must not race it. NOVA_WARMUP does not apply.
+    A failure is logged and listed by /ready as degraded; serving goes on.
+    """
+    with _lock:
+        _tasks[name] = {"fn": fn, "status": "running", "duration_ms": None, "error": None, "result": None}
+        task = _tasks[name]
+    t0 = time.perf_counter()
+    try:
+        res = fn()
+        task["result"] = res if isinstance(res, (dict, list, str, int, float, bool)) else None
+        task["status"] = "done"
+    except Exception as e:
+        task["status"] = "failed"
+        task["error"] = str(e)
+        log.error(f"[STARTUP] migration {name} failed: {e}")
+    task["duration_ms"] = int((time.perf_counter() - t0) * 1000)
+
+
+# ---------- probes ----------
+
+def liveness() -> Dict[str, Any]:
+    return {"status": "alive", "pid": os.getpid(), "uptime_s": round(time.time() - STARTED_AT, 1)}
+
+
+def readiness(problems: List[str] = ()) -> Dict[str, Any]:
+    """
+    Ready once every warmup task has finished (done, failed or skipped)
+    and the caller reported no blocking problems.
+    """
+    with _lock:
+        tasks = {
+            name: {k: v for k, v in t.items() if k != "fn"}
+            for name, t in _tasks.items()
+        }
+    pending = [n for n, t in tasks.items() if t["status"] in ("pending", "running")]
+    problems = list(problems)
+    if not _started:
+        problems.append("lifespan startup has not run")
+    return {
+        "ready": not pending and not problems,
+        "pending": pending,
+        "degraded": [n for n, t in tasks.items() if t["status"] == "failed"],
+        "problems": problems,
+        "tasks": tasks,
+        "uptime_s": round(time.time() - STARTED_AT, 1),
+    }
@@ -0,0 +1,73 @@
+# state_db.py
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List
+
+BASE = Path(__file__).resolve().parent
+DB_PATH = Path(os.getenv("NOVA_DB", str(BASE / "nova.db")))
+
+# Shared SQLite store for state that several server processes (uvicorn
+# --workers N) read and write: the request registry, chat sessions.
+# WAL lets readers run while one writer commits; writers queue on
+# busy_timeout instead of failing.
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_schemas: List[str] = []
+_applied = 0
+
+
+def register_schema(sql: str):
+    """Modules add their CREATE TABLE / INDEX IF NOT EXISTS scripts at import."""
+    _schemas.append(sql)
+
+
+def _apply_schemas(conn: sqlite3.Connection):
+    global _applied
+    with _init_lock:
+        for sql in _schemas[_applied:]:
+            conn.executescript(sql)
+        _applied = len(_schemas)
+
+
+def connect() -> sqlite3.Connection:
+    """This thread's connection (created on first use)."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(DB_PATH), timeout=10, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=10000")
+        _local.conn = conn
+    if _applied < len(_schemas):
+        _apply_schemas(conn)
+    return conn
+
+
+@contextmanager
+def transaction():
+    """
+    BEGIN IMMEDIATE takes the write lock up front, so a read-modify-write
+    inside can't interleave with another process doing the same.
+    """
+    conn = connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+register_schema("""
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+""")
@@ -0,0 +1,33 @@
+# tests/conftest.py
+import sys
+from pathlib import Path
+
+import pytest
+
+# modules live at the top of nova-agent/ and import each other by name
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import state_db  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh SQLite state database for the test (NOVA_DB)."""
+    conn = getattr(state_db._local, "conn", None)
+    if conn is not None:
+        conn.close()
+        del state_db._local.conn
+    monkeypatch.setattr(state_db, "DB_PATH", tmp_path / "nova.db")
+    monkeypatch.setattr(state_db, "_applied", 0)
+    yield state_db.connect()
+    state_db._local.conn.close()
+    del state_db._local.conn
+
+
+@pytest.fixture
+def workspaces(tmp_path, monkeypatch):
+    """patch_engine pointed at a scratch workspace/ and workspace_meta/."""
+    import patch_engine
+    monkeypatch.setattr(patch_engine, "WORKSPACE_ROOT", tmp_path / "workspace")
+    monkeypatch.setattr(patch_engine, "WORKSPACE_META", tmp_path / "workspace_meta")
+    return tmp_path / "workspace"
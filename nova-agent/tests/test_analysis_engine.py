@@ -0,0 +1,75 @@
+# tests/test_analysis_engine.py
+import ast
+
+import pytest
+
+import analysis_engine
+from analysis_engine import analyze_files, analyze_source
+
+
+def _statement_imports(tree):
+    # the import-only walker analysis_engine used before the single-pass
+    # collector: follows statement bodies and nothing else
+    out = set()
+    stack = list(tree.body)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.Import):
+            for n in node.names:
+                out.add(n.name.split(".")[0])
+        elif isinstance(node, ast.ImportFrom):
+            if node.module and not node.level:
+                out.add(node.module.split(".")[0])
+        else:
+            for f in ("body", "orelse", "finalbody", "handlers"):
+                stack.extend(getattr(node, f, ()) or ())
+            for case in getattr(node, "cases", ()) or ():
+                stack.extend(case.body)
+    return sorted(out)
+
+
+FIXTURE = {
+    "top.py": "import os, sys.path\nfrom json import dumps\nfrom . import sibling\nfrom .pkg import x\n",
+    "cond.py": (
+        "try:\n    import ujson as json\nexcept ImportError:\n    import json\nelse:\n    import re\n"
+        "finally:\n    import gc\n"
+        "if True:\n    import fcntl\nelse:\n    import msvcrt\n"
+        "with open(__file__):\n    import io\n"
+        "for _ in ():\n    import itertools\nelse:\n    import functools\n"
+        "while False:\n    import heapq\n"
+    ),
+    "lazy.py": (
+        "class A:\n    import enum\n    def m(self):\n        import torch\n"
+        "        async def inner():\n            from groq import Groq\n"
+        "def f(x):\n    match x:\n        case 1:\n            import decimal\n"
+        "        case _:\n            import fractions\n    return [y for y in x]\n"
+    ),
+    "empty.py": "",
+}
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for name, src in FIXTURE.items():
+        (tmp_path / name).write_text(src)
+    return tmp_path
+
+
+def test_collector_import_edges_match_statement_walker():
+    for name, src in FIXTURE.items():
+        expected = _statement_imports(ast.parse(src))
+        assert analyze_source(src.encode())["imports"] == expected, name
+
+
+def test_pool_results_match_inline(tree, monkeypatch):
+    items = [(str(tree / name), None) for name in sorted(FIXTURE)]
+    inline = {p: facts["imports"] for p, _, facts in analyze_files(items)}
+
+    monkeypatch.setattr(analysis_engine, "PARALLEL_THRESHOLD", 0)
+    monkeypatch.setattr(analysis_engine, "MAX_WORKERS", 2)
+    try:
+        pooled = {p: facts["imports"] for p, _, facts in analyze_files(items)}
+        assert analysis_engine._pool is not None  # really went through the pool
+    finally:
+        analysis_engine.shutdown()
+    assert pooled == inline
@@ -0,0 +1,61 @@
+# tests/test_chat_store.py
+import json
+
+import pytest
+
+import chat_store
+
+
+@pytest.fixture
+def store(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(chat_store, "LOCK_DIR", tmp_path / "locks")
+    return chat_store
+
+
+def _legacy(tmp_path, **sessions):
+    d = tmp_path / "chat_sessions"
+    d.mkdir()
+    for sid, entries in sessions.items():
+        (d / f"{sid}.json").write_text(json.dumps(entries))
+    return d
+
+
+def _messages(sid):
+    return [m["message"] for m in chat_store.history(sid)]
+
+
+OLD = [
+    {"role": "user", "message": "hi", "ts": "2024-01-01T00:00:00"},
+    {"role": "assistant", "message": "hello", "ts": "2024-01-01T00:00:01"},
+]
+
+
+def test_history_and_limit(store):
+    for i in range(5):
+        store.append("s", "user", f"m{i}")
+    assert _messages("s") == ["m0", "m1", "m2", "m3", "m4"]
+    assert [m["message"] for m in store.history("s", limit=2)] == ["m3", "m4"]
+    assert store.history("other") == []
+
+
+def test_migrate_imports_sessions_once(store, tmp_path):
+    d = _legacy(tmp_path, s1=OLD, bad={"not": "a list"})
+    res = store.migrate_legacy(d)
+    assert (res["imported"], res["messages"], len(res["errors"])) == (1, 2, 1)
+    assert _messages("s1") == ["hi", "hello"]
+    assert store.migrate_legacy(d)["skipped"] is True
+    assert _messages("s1") == ["hi", "hello"]
+
+
+def test_migrate_keeps_messages_written_first(store, tmp_path):
+    # a message reached the session before the import did
+    store.append("s1", "user", "new question")
+    store.migrate_legacy(_legacy(tmp_path, s1=OLD))
+    assert _messages("s1") == ["hi", "hello", "new question"]
+
+
+def test_migrate_does_not_duplicate_imported_rows(store, tmp_path):
+    # an earlier import stopped after this session but before it was marked done
+    store.append_many("s1", OLD)
+    store.migrate_legacy(_legacy(tmp_path, s1=OLD))
+    assert _messages("s1") == ["hi", "hello"]
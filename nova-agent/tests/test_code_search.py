@@ -0,0 +1,82 @@
+# tests/test_code_search.py
+import code_search
+
+
+def _search(root, query, **kw):
+    return code_search.search({"r": root}, query, **kw)["matches"]
+
+
+def test_line_mapping_ignores_other_line_breaks(tmp_path):
+    # \x0c and \u2028 are line breaks to str.splitlines(), not to the search
+    (tmp_path / "f.txt").write_bytes("a\x0cb\nneedle here\nc\u2028d\ne\n".encode("utf-8"))
+    [m] = _search(tmp_path, "needle", context=1)
+    assert m["line"] == 2
+    assert m["text"] == "needle here"
+    assert m["before"] == ["a\x0cb"]
+    assert m["after"] == ["c\u2028d"]
+
+
+def test_crlf_lines(tmp_path):
+    (tmp_path / "f.txt").write_bytes(b"one\r\ntwo\r\nneedle\r\n")
+    [m] = _search(tmp_path, "needle", context=2)
+    assert (m["line"], m["col"], m["text"]) == (3, 1, "needle")
+    assert m["before"] == ["one", "two"]
+    assert m["after"] == []
+
+
+def test_one_match_per_line_and_columns(tmp_path):
+    (tmp_path / "f.py").write_text("x = 1\n  foo(foo)\nfoo\n")
+    ms = _search(tmp_path, "foo")
+    assert [(m["line"], m["col"]) for m in ms] == [(2, 3), (3, 1)]
+
+
+def test_regex_and_glob(tmp_path):
+    (tmp_path / "a.py").write_text("def handler_one():\n    pass\n")
+    (tmp_path / "b.txt").write_text("def handler_two():\n")
+    ms = _search(tmp_path, r"def handler_\w+", regex=True, path_glob="*.py")
+    assert [(m["path"], m["line"]) for m in ms] == [("a.py", 1)]
+
+
+def test_index_follows_edits(tmp_path):
+    f = tmp_path / "f.txt"
+    f.write_text("nothing\n")
+    assert _search(tmp_path, "needle") == []
+    f.write_text("a needle\n")
+    [m] = _search(tmp_path, "needle")
+    assert m["line"] == 1
+
+
+def test_required_literals():
+    assert code_search.required_literals(r"foo\d+barbaz") == ["foo", "barbaz"]
+    assert code_search.required_literals(r"(abc|xyz)") == []
+
+
+def test_refresh_reads_files_without_the_index_lock(tmp_path, monkeypatch):
+    (tmp_path / "f.txt").write_text("a needle\n")
+    idx = code_search.TrigramIndex(tmp_path)
+    held = []
+    real = code_search._read_text
+
+    def spy(path, size):
+        held.append(idx.lock.locked())
+        return real(path, size)
+
+    monkeypatch.setattr(code_search, "_read_text", spy)
+    assert idx.refresh()["reindexed"] == 1
+    assert held == [False]
+    assert idx.candidates(["needle"]) == ["f.txt"]
+
+
+def test_search_tool_scopes_workspace_to_request(tmp_path, monkeypatch):
+    from brain import tools_engine
+
+    monkeypatch.setattr(tools_engine, "WORKSPACE_ROOT", tmp_path / "workspace")
+    monkeypatch.setattr(tools_engine, "INTEGRATED_ROOT", tmp_path / "integrated")
+    for rid in ("mine", "other"):
+        (tmp_path / "workspace" / rid).mkdir(parents=True)
+        (tmp_path / "workspace" / rid / "f.py").write_text(f"needle = '{rid}'\n")
+
+    res = tools_engine.tool_search_code({"query": "needle", "root": "workspace", "request_id": "mine"})
+    assert [m["text"] for m in res["matches"]] == ["needle = 'mine'"]
+    assert tools_engine.tool_search_code({"query": "needle", "root": "workspace"})["ok"] is False
+    assert tools_engine.tool_search_code({"query": "needle", "root": "workspace", "request_id": "../workspace"})["ok"] is False
@@ -0,0 +1,63 @@
+# tests/test_dir_listing.py
+import dir_listing
+from dir_listing import list_entries
+
+
+def _pages(path, limit, **kw):
+    out, cursor = [], None
+    while True:
+        page = list_entries(path, cursor=cursor, limit=limit, **kw)
+        out.append([e["path"] for e in page["entries"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return out
+
+
+def test_pages_cover_listing_once(tmp_path):
+    for n in "abcde":
+        (tmp_path / n).touch()
+    assert _pages(tmp_path, 2) == [["a", "b"], ["c", "d"], ["e"]]
+
+
+def test_cursor_survives_changes_between_pages(tmp_path, monkeypatch):
+    monkeypatch.setattr(dir_listing, "CACHE_TTL_S", 0)
+    for n in "abcdef":
+        (tmp_path / n).touch()
+    first = list_entries(tmp_path, limit=2)
+    assert [e["path"] for e in first["entries"]] == ["a", "b"]
+
+    # one entry before the cursor goes away, one appears: no skip, no repeat
+    (tmp_path / "a").unlink()
+    (tmp_path / "aa").touch()
+    second = list_entries(tmp_path, cursor=first["next_cursor"], limit=2)
+    assert [e["path"] for e in second["entries"]] == ["c", "d"]
+
+    # the cursor entry itself is gone: continue after where it was
+    (tmp_path / "d").unlink()
+    third = list_entries(tmp_path, cursor=second["next_cursor"], limit=2)
+    assert [e["path"] for e in third["entries"]] == ["e", "f"]
+    assert third["next_cursor"] is None
+
+
+def test_recursive_and_glob(tmp_path):
+    (tmp_path / "pkg" / "sub").mkdir(parents=True)
+    (tmp_path / "pkg" / "mod.py").touch()
+    (tmp_path / "pkg" / "sub" / "deep.py").touch()
+    (tmp_path / "pkg" / "notes.txt").touch()
+    (tmp_path / "__pycache__").mkdir()
+    (tmp_path / "__pycache__" / "x.py").touch()
+
+    top = list_entries(tmp_path)
+    assert [e["path"] for e in top["entries"]] == ["__pycache__", "pkg"]
+
+    py = list_entries(tmp_path, depth=5, pattern="*.py")
+    assert [e["path"] for e in py["entries"]] == ["pkg/mod.py", "pkg/sub/deep.py"]
+
+
+def test_cache_dropped_when_directory_changes(tmp_path):
+    (tmp_path / "a").touch()
+    assert list_entries(tmp_path)["cached"] is False
+    assert list_entries(tmp_path)["cached"] is True
+    (tmp_path / "b").touch()
+    again = list_entries(tmp_path)
+    assert [e["path"] for e in again["entries"]] == ["a", "b"]
@@ -0,0 +1,65 @@
+# tests/test_file_locks.py
+import threading
+
+import pytest
+
+from file_locks import FileLock, LockTimeout, request_lock
+
+
+def _try_from_other_thread(path) -> bool:
+    got = []
+
+    def worker():
+        try:
+            with FileLock(path, timeout=0):
+                got.append(True)
+        except LockTimeout:
+            got.append(False)
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    return got[0]
+
+
+def test_reentrant_within_a_thread(tmp_path):
+    path = tmp_path / "x.lock"
+    with FileLock(path, timeout=0):
+        with FileLock(path, timeout=0):
+            assert _try_from_other_thread(path) is False
+        # the inner release must not drop the outer hold
+        assert _try_from_other_thread(path) is False
+    assert _try_from_other_thread(path) is True
+
+
+def test_timeout_when_held_elsewhere(tmp_path):
+    path = tmp_path / "x.lock"
+    held, release = threading.Event(), threading.Event()
+
+    def holder():
+        with FileLock(path):
+            held.set()
+            release.wait()
+
+    t = threading.Thread(target=holder)
+    t.start()
+    held.wait()
+    try:
+        with pytest.raises(LockTimeout):
+            FileLock(path, timeout=0.1).acquire()
+    finally:
+        release.set()
+        t.join()
+    with FileLock(path, timeout=1):
+        pass
+
+
+def test_release_by_non_owner_rejected(tmp_path):
+    lock = FileLock(tmp_path / "x.lock")
+    with pytest.raises(RuntimeError):
+        lock.release()
+
+
+def test_request_ids_that_sanitise_alike_get_their_own_lock():
+    assert request_lock("a/b").path != request_lock("a_b").path
+    assert request_lock("a/b").path == request_lock("a/b").path
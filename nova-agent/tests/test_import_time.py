@@ -0,0 +1,32 @@
+# tests/test_import_time.py
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks import check_import_time
+from benchmarks.check_import_time import MUST_BE_LAZY, NOVA
+
+PROBE = (
+    "import sys, json, app; "
+    "print(json.dumps(sorted({m.split('.')[0] for m in sys.modules})))"
+)
+
+
+def test_import_app_keeps_heavy_modules_lazy(tmp_path):
+    # a fresh interpreter: this test process may have imported anything
+    env = {**os.environ, "NOVA_DB": str(tmp_path / "nova.db"),
+           "GROQ_API_KEY": "", "DEEPSEEK_API_KEY": "", "OPENROUTER_API_KEY": ""}
+    r = subprocess.run([sys.executable, "-c", PROBE], cwd=str(NOVA), env=env,
+                       capture_output=True, text=True)
+    assert r.returncode == 0, r.stderr[-4000:]
+    loaded = set(json.loads(r.stdout.strip().splitlines()[-1]))
+    assert sorted(loaded & set(MUST_BE_LAZY)) == []
+
+
+@pytest.mark.skipif(not os.getenv("NOVA_IMPORT_BUDGET_MS"),
+                    reason="timing budget only enforced when NOVA_IMPORT_BUDGET_MS is set")
+def test_import_app_within_budget():
+    assert check_import_time.main(["--runs", "3"]) == 0
@@ -0,0 +1,50 @@
+# tests/test_job_queue.py
+import threading
+
+import pytest
+
+import job_queue
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOBS_DIR", tmp_path / "jobs")
+    monkeypatch.setattr(job_queue, "LOCK_DIR", tmp_path / "locks")
+    monkeypatch.setattr(job_queue, "_jobs", {})
+    release = threading.Event()
+
+    @job_queue.register("test_wait")
+    def _wait(params, progress):
+        release.wait(5)
+        return "done"
+
+    yield job_queue
+    release.set()
+    # let the jobs finish writing while JOBS_DIR still points at tmp_path
+    if job_queue._pool is not None:
+        job_queue._pool.shutdown(wait=True)
+        job_queue._pool = None
+    job_queue._handlers.pop("test_wait", None)
+
+
+def test_dedup_sees_jobs_of_other_workers(queue, monkeypatch):
+    first = queue.submit("test_wait", {}, request_id="r1")
+    # another worker: same jobs/ on disk, nothing in memory
+    monkeypatch.setattr(queue, "_jobs", {})
+    again = queue.submit("test_wait", {}, request_id="r1")
+    assert again["deduplicated"] is True
+    assert again["job_id"] == first["job_id"]
+    assert queue.submit("test_wait", {}, request_id="r2")["deduplicated"] is False
+
+
+def test_job_of_a_dead_worker_is_not_reused(queue, monkeypatch):
+    first = queue.submit("test_wait", {}, request_id="r1")
+    # submitted by a worker that has since died
+    job = queue._jobs[first["job_id"]]
+    job["owner"] = 999999999
+    queue._persist(job)
+    monkeypatch.setattr(queue, "_jobs", {})
+    monkeypatch.setattr(queue, "pid_alive", lambda pid: False)
+    again = queue.submit("test_wait", {}, request_id="r1")
+    assert again["deduplicated"] is False
+    assert again["job_id"] != first["job_id"]
@@ -0,0 +1,106 @@
+# tests/test_llm_routing.py
+import pytest
+
+from brain import llm_routing as routing
+
+
+@pytest.fixture(autouse=True)
+def fresh(monkeypatch):
+    routing.reset()
+    monkeypatch.setattr(routing, "PRIOR_LATENCY_S", 0.0)
+    monkeypatch.setattr(routing, "ERROR_PENALTY_S", 10.0)
+    yield
+    routing.reset()
+
+
+class _Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = _Response(status_code, headers)
+
+
+TIER = [("groq", "chat"), ("deepseek", "chat"), ("deepseek", "reason"), ("openrouter", "chat")]
+
+
+def model_of(provider, variant):
+    return f"{provider}-{variant}"
+
+
+def _order(tier=TIER):
+    return routing.order(tier, model_of)[0]
+
+
+def test_no_data_keeps_static_order():
+    assert _order() == TIER
+
+
+def test_faster_provider_goes_first_and_keeps_variant_order():
+    for _ in range(3):
+        routing.record_success("groq", "groq-chat", 2.0)
+        routing.record_success("deepseek", "deepseek-chat", 0.5)
+        routing.record_success("openrouter", "openrouter-chat", 1.0)
+    assert _order() == [("deepseek", "chat"), ("deepseek", "reason"), ("openrouter", "chat"), ("groq", "chat")]
+
+
+def test_unmeasured_provider_is_tried_before_measured_ones():
+    routing.record_success("groq", "groq-chat", 0.2)
+    assert _order([("groq", "chat"), ("openrouter", "chat")])[0] == ("openrouter", "chat")
+
+
+def test_errors_cost_the_penalty():
+    for _ in range(3):
+        routing.record_success("groq", "groq-chat", 1.0)
+        routing.record_failure("openrouter", "openrouter-chat", 0.1, RuntimeError("boom"))
+    tier = [("openrouter", "chat"), ("groq", "chat")]
+    ordered, scores = routing.order(tier, model_of)
+    assert ordered == [("groq", "chat"), ("openrouter", "chat")]
+    assert scores["openrouter/chat"]["error_rate"] > 0.5
+
+
+def test_429_with_retry_after_backs_off(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(routing.time, "time", lambda: now[0])
+    routing.record_failure("groq", "groq-chat", 0.1, _HTTPError(429, {"retry-after": "7"}))
+
+    ordered, scores = routing.order(TIER, model_of)
+    assert ordered[-1] == ("groq", "chat")
+    assert scores["groq/chat"]["backoff_s"] == 7.0
+
+    # once it expires groq is ranked by score again (its error still counts)
+    now[0] += 8
+    assert routing.order(TIER, model_of)[1]["groq/chat"]["backoff_s"] == 0
+
+
+def test_429_without_retry_after_doubles(monkeypatch):
+    monkeypatch.setattr(routing.time, "time", lambda: 1000.0)
+    waits = []
+    for _ in range(3):
+        routing.record_failure("groq", "groq-chat", 0.1, _HTTPError(429))
+        waits.append(routing.snapshot()["backoff"]["groq"])
+    assert waits == [routing.BACKOFF_BASE_S, 2 * routing.BACKOFF_BASE_S, 4 * routing.BACKOFF_BASE_S]
+
+
+def test_backed_off_providers_sorted_by_time_left(monkeypatch):
+    monkeypatch.setattr(routing.time, "time", lambda: 1000.0)
+    routing.record_failure("groq", "groq-chat", 0.1, _HTTPError(429, {"retry-after": "30"}))
+    routing.record_failure("openrouter", "openrouter-chat", 0.1, _HTTPError(429, {"retry-after": "5"}))
+    assert _order() == [("deepseek", "chat"), ("deepseek", "reason"), ("openrouter", "chat"), ("groq", "chat")]
+
+
+def test_success_clears_backoff():
+    routing.record_failure("groq", "groq-chat", 0.1, _HTTPError(429, {"retry-after": "60"}))
+    routing.record_success("groq", "groq-chat", 0.1)
+    assert routing.snapshot()["backoff"] == {}
+    routing.record_failure("openrouter", "openrouter-chat", 0.1, _HTTPError(429, {"retry-after": "60"}))
+    assert _order([("openrouter", "chat"), ("groq", "chat")]) == [("groq", "chat"), ("openrouter", "chat")]
+
+
+def test_other_errors_do_not_back_off():
+    routing.record_failure("groq", "groq-chat", 0.1, _HTTPError(500, {"retry-after": "60"}))
+    assert routing.snapshot()["backoff"] == {}
@@ -0,0 +1,102 @@
+# tests/test_merge.py
+import os
+
+import pytest
+
+import workspace_manager as wm
+from workspace_manager import MergeConflict, merge_workspace, provision_workspace
+
+
+@pytest.fixture
+def roots(tmp_path, monkeypatch):
+    monkeypatch.setattr(wm, "WORKSPACE_ROOT", tmp_path / "workspace")
+    monkeypatch.setattr(wm, "WORKSPACE_META", tmp_path / "workspace_meta")
+    integrated = tmp_path / "integrated"
+    integrated.mkdir()
+    (integrated / "a.py").write_text("a = 1\n")
+    (integrated / "b.py").write_text("b = 1\n")
+    return integrated
+
+
+def _edit(path, text):
+    # bump mtime past the seeded one even on coarse-grained filesystems
+    st = os.stat(path) if path.exists() else None
+    path.write_text(text)
+    if st is not None:
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def _provision(rid, integrated):
+    provision_workspace(rid, source=integrated, mode="copy")
+    return wm.WORKSPACE_ROOT / rid
+
+
+def test_untouched_files_do_not_undo_other_merges(roots):
+    one, two = _provision("one", roots), _provision("two", roots)
+    _edit(one / "a.py", "a = 2\n")
+    _edit(two / "b.py", "b = 2\n")
+
+    assert merge_workspace("one", roots) == {"copied": ["a.py"], "deleted": []}
+    # two still holds the stale a.py it was seeded with
+    assert merge_workspace("two", roots) == {"copied": ["b.py"], "deleted": []}
+    assert (roots / "a.py").read_text() == "a = 2\n"
+    assert (roots / "b.py").read_text() == "b = 2\n"
+
+
+def test_conflict_writes_nothing(roots):
+    one, two = _provision("one", roots), _provision("two", roots)
+    _edit(one / "a.py", "a = 2\n")
+    _edit(one / "new.py", "x = 1\n")
+    _edit(two / "a.py", "a = 3\n")
+    merge_workspace("two", roots)
+
+    with pytest.raises(MergeConflict) as exc:
+        merge_workspace("one", roots)
+    assert [c["path"] for c in exc.value.conflicts] == ["a.py"]
+    assert (roots / "a.py").read_text() == "a = 3\n"
+    assert not (roots / "new.py").exists()
+
+
+def test_same_change_on_both_sides_is_not_a_conflict(roots):
+    one, two = _provision("one", roots), _provision("two", roots)
+    _edit(one / "a.py", "a = 2\n")
+    _edit(two / "a.py", "a = 2\n")
+    merge_workspace("one", roots)
+    assert merge_workspace("two", roots) == {"copied": [], "deleted": []}
+
+
+def test_deletions_are_carried_over(roots):
+    one = _provision("one", roots)
+    (one / "b.py").unlink()
+    assert merge_workspace("one", roots) == {"copied": [], "deleted": ["b.py"]}
+    assert not (roots / "b.py").exists()
+    # the merged state is the new baseline
+    assert merge_workspace("one", roots) == {"copied": [], "deleted": []}
+
+
+def test_deleted_here_changed_there_conflicts(roots):
+    one, two = _provision("one", roots), _provision("two", roots)
+    (one / "b.py").unlink()
+    _edit(two / "b.py", "b = 2\n")
+    merge_workspace("two", roots)
+    with pytest.raises(MergeConflict):
+        merge_workspace("one", roots)
+    assert (roots / "b.py").read_text() == "b = 2\n"
+
+
+def test_unseeded_workspace_copies_everything(roots):
+    ws = wm.WORKSPACE_ROOT / "bare"
+    ws.mkdir(parents=True)
+    (ws / "a.py").write_text("a = 9\n")
+    (ws / "c.py").write_text("c = 1\n")
+    assert merge_workspace("bare", roots) == {"copied": ["a.py", "c.py"], "deleted": []}
+    assert (roots / "b.py").exists()
+
+
+def test_merge_breaks_hardlinks(roots):
+    ws = _provision("h", roots)
+    (ws / "a.py").unlink()
+    os.link(roots / "b.py", ws / "a.py")
+    merge_workspace("h", roots)
+    assert not os.path.samefile(ws / "a.py", roots / "a.py")
+    assert (roots / "b.py").read_text() == "b = 1\n"
@@ -0,0 +1,149 @@
+# tests/test_patch_engine.py
+import os
+import time
+
+import pytest
+
+import patch_engine
+from patch_engine import PatchError, apply_batch, apply_hunks, parse_unified_diff
+
+
+def _ws(root, request_id="r1", **files):
+    ws = root / request_id
+    ws.mkdir(parents=True)
+    for name, data in files.items():
+        (ws / name).write_bytes(data)
+    return ws
+
+
+# ---------- hunks ----------
+
+def test_apply_hunk_at_stated_line():
+    [p] = parse_unified_diff("@@ -2,3 +2,3 @@\n b\n-c\n+C\n d\n")
+    assert apply_hunks("a\nb\nc\nd\ne\n", p["hunks"]) == "a\nb\nC\nd\ne\n"
+
+
+def test_apply_hunk_with_offset():
+    [p] = parse_unified_diff("@@ -1,3 +1,3 @@\n b\n-c\n+C\n d\n")
+    assert apply_hunks("x\ny\nb\nc\nd\n", p["hunks"]) == "x\ny\nb\nC\nd\n"
+
+
+def test_apply_hunk_context_mismatch():
+    [p] = parse_unified_diff("@@ -1,2 +1,2 @@\n nope\n-c\n+C\n")
+    with pytest.raises(PatchError):
+        apply_hunks("a\nb\nc\n", p["hunks"])
+
+
+def test_apply_hunk_no_newline_at_end():
+    [p] = parse_unified_diff("@@ -1,2 +1,2 @@\n a\n-b\n\\ No newline at end of file\n+B\n\\ No newline at end of file\n")
+    assert apply_hunks("a\nb", p["hunks"]) == "a\nB"
+
+
+# ---------- line endings ----------
+
+def test_diff_keeps_crlf():
+    [p] = parse_unified_diff("@@ -1,3 +1,4 @@\n x\n-y\n+Y\n+Y2\n z\n")
+    assert apply_hunks("x\r\ny\r\nz\r\n", p["hunks"]) == "x\r\nY\r\nY2\r\nz\r\n"
+
+
+def test_batch_rename_and_diff_keep_crlf(workspaces):
+    ws = _ws(workspaces, a=b"line1\r\nline2\r\n", b=b"x\r\ny\r\nz\r\n")
+    res = apply_batch("r1", [
+        {"op": "rename", "path": "a", "to": "c"},
+        {"op": "diff", "path": "b", "diff": "@@ -1,3 +1,3 @@\n x\n-y\n+Y\n z\n"},
+    ])
+    assert res["status"] == "applied"
+    assert not (ws / "a").exists()
+    assert (ws / "c").read_bytes() == b"line1\r\nline2\r\n"
+    assert (ws / "b").read_bytes() == b"x\r\nY\r\nz\r\n"
+
+
+# ---------- batches ----------
+
+def test_batch_write_delete_rename(workspaces):
+    ws = _ws(workspaces, keep=b"1\n", gone=b"2\n", old=b"3\n")
+    res = apply_batch("r1", [
+        {"op": "write", "path": "pkg/new.py", "code": "x = 1\n"},
+        {"op": "delete", "path": "gone"},
+        {"op": "rename", "path": "old", "to": "renamed"},
+    ])
+    assert res["status"] == "applied" and res["applied"] == 3
+    assert (ws / "pkg" / "new.py").read_text() == "x = 1\n"
+    assert not (ws / "gone").exists()
+    assert not (ws / "old").exists() and (ws / "renamed").read_bytes() == b"3\n"
+    assert res["changed"] == ["gone", "old", "pkg/new.py", "renamed"]
+
+
+def test_multi_file_diff(workspaces):
+    ws = _ws(workspaces, a=b"1\n2\n", b=b"x\n")
+    diff = (
+        "--- a/a\n+++ b/a\n@@ -1,2 +1,2 @@\n 1\n-2\n+two\n"
+        "--- a/b\n+++ /dev/null\n@@ -1 +0,0 @@\n-x\n"
+        "--- /dev/null\n+++ b/c\n@@ -0,0 +1 @@\n+new\n"
+    )
+    res = apply_batch("r1", [{"op": "diff", "diff": diff}])
+    assert res["status"] == "applied"
+    assert (ws / "a").read_text() == "1\ntwo\n"
+    assert not (ws / "b").exists()
+    assert (ws / "c").read_text() == "new\n"
+
+
+def test_failed_operation_changes_nothing(workspaces):
+    ws = _ws(workspaces, a=b"1\n")
+    res = apply_batch("r1", [
+        {"op": "write", "path": "a", "code": "changed\n"},
+        {"op": "delete", "path": "missing"},
+    ])
+    assert res["status"] == "failed" and res["applied"] == 0
+    assert (ws / "a").read_bytes() == b"1\n"
+
+
+def test_path_escape_rejected(workspaces):
+    _ws(workspaces)
+    res = apply_batch("r1", [{"op": "write", "path": "../outside", "code": "x"}])
+    assert res["status"] == "failed"
+    assert not (workspaces / "outside").exists()
+
+
+@pytest.mark.parametrize("failing", ["a", "b"])
+def test_swap_failure_rolls_back(workspaces, monkeypatch, failing):
+    ws = _ws(workspaces, a=b"old a\n", b=b"old b\n")
+    real_replace = os.replace
+
+    def flaky(src, dst):
+        if ".nova_stage_" in str(src) and os.path.basename(dst) == failing:
+            raise OSError("disk full")
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", flaky)
+    res = apply_batch("r1", [
+        {"op": "write", "path": "a", "code": "new a\n"},
+        {"op": "write", "path": "b", "code": "new b\n"},
+    ])
+    monkeypatch.setattr(os, "replace", real_replace)
+
+    assert res["status"] == "failed" and "rolled back" in res["detail"]
+    assert (ws / "a").read_bytes() == b"old a\n"
+    assert (ws / "b").read_bytes() == b"old b\n"
+    assert sorted(p.name for p in ws.iterdir()) == ["a", "b"]
+
+
+# ---------- hash manifest ----------
+
+def test_manifest_sees_writes_outside_the_engine(workspaces, monkeypatch):
+    ws = _ws(workspaces, a=b"1\n")
+    first = apply_batch("r1", [{"op": "write", "path": "b", "code": "2\n"}])
+
+    # an edit from run_command / write_file / a test run
+    (ws / "a").write_bytes(b"edited elsewhere\n")
+    later = time.time() + 5
+    os.utime(ws / "a", (later, later))
+    monkeypatch.setattr(time, "time_ns", lambda: int((later + 5) * 1e9))
+
+    hashes = patch_engine.load_hashes("r1")
+    assert hashes["a"] == patch_engine._sha256_text("edited elsewhere\n")
+    assert patch_engine.workspace_hash(hashes) != first["workspace_hash"]
+
+    second = apply_batch("r1", [{"op": "write", "path": "c", "code": "3\n"}])
+    assert second["previous_hash"] == patch_engine.workspace_hash(hashes)
+    assert second["changed"] == ["c"]
@@ -0,0 +1,61 @@
+# tests/test_pipeline.py
+import threading
+import time
+
+import pytest
+
+from brain.pipeline import PipelineError, Stage, run_stages
+
+
+def _boom(done):
+    raise RuntimeError("boom")
+
+
+def test_failure_does_not_wait_for_running_stages():
+    release = threading.Event()
+    try:
+        start = time.perf_counter()
+        with pytest.raises(PipelineError) as exc:
+            run_stages([
+                Stage("slow", lambda done: release.wait(5)),
+                Stage("bad", _boom),
+            ])
+        assert time.perf_counter() - start < 2
+        assert exc.value.stage == "bad"
+        assert "bad" in exc.value.timings
+    finally:
+        release.set()
+
+
+def test_failure_skips_dependent_stages():
+    ran = []
+    with pytest.raises(PipelineError):
+        run_stages([
+            Stage("bad", _boom),
+            Stage("queued", lambda done: ran.append("queued")),
+            Stage("after", lambda done: ran.append("after"), deps=["bad"]),
+        ], max_workers=1)
+    time.sleep(0.1)
+    assert "after" not in ran
+
+
+def test_builder_records_failed_status(db, tmp_path, monkeypatch):
+    import request_registry
+    from brain import builder_engine
+
+    monkeypatch.setattr(request_registry, "LOCK_DIR", tmp_path / "locks")
+    monkeypatch.setattr(builder_engine, "provision_workspace", lambda *a, **kw: {"files": 0})
+    monkeypatch.setattr(builder_engine, "record_provision", lambda *a: None)
+    monkeypatch.setattr(builder_engine, "create_backup", lambda **kw: {"backup_id": "b"})
+    monkeypatch.setattr(builder_engine, "capture_environment", lambda **kw: {})
+
+    def no_llm(**kw):
+        raise RuntimeError("no provider")
+    monkeypatch.setattr(builder_engine, "chat_with_builder", no_llm)
+
+    with pytest.raises(PipelineError):
+        builder_engine.run_builder_pipeline("build it", existing_request_id="bf")
+    got = request_registry.get("bf")
+    assert got["status"] == "failed"
+    assert got["data"]["failed_stage"] == "plan"
+    assert "plan" in got["data"]["timings"]["stages"]
@@ -0,0 +1,43 @@
+# tests/test_provision.py
+import errno
+
+import pytest
+
+import workspace_manager as wm
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    monkeypatch.setattr(wm, "WORKSPACE_ROOT", tmp_path / "workspace")
+    monkeypatch.setattr(wm, "WORKSPACE_META", tmp_path / "workspace_meta")
+    src = tmp_path / "integrated"
+    src.mkdir()
+    for n in "abc":
+        (src / f"{n}.py").write_text(n)
+    return src
+
+
+def _reflink_failing(code, calls):
+    def fake(src, dst):
+        calls.append(src.name)
+        raise OSError(code, "nope")
+    return fake
+
+
+def test_unsupported_reflink_falls_back_to_copy_once(source, monkeypatch):
+    calls = []
+    monkeypatch.setitem(wm.STRATEGIES, "reflink", _reflink_failing(errno.EOPNOTSUPP, calls))
+    stats = wm.provision_workspace("r", source=source, mode="auto")
+    assert len(calls) == 1
+    assert stats["by_strategy"]["copy"] == 3
+    assert stats["errors"] == []
+
+
+def test_other_reflink_errors_are_reported_per_file(source, monkeypatch):
+    calls = []
+    monkeypatch.setitem(wm.STRATEGIES, "reflink", _reflink_failing(errno.EACCES, calls))
+    stats = wm.provision_workspace("r", source=source, mode="auto")
+    # reflink stays enabled and every failure surfaces
+    assert len(calls) == 3
+    assert len(stats["errors"]) == 3
+    assert stats["files"] == 0
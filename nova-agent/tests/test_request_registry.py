@@ -0,0 +1,113 @@
+# tests/test_request_registry.py
+import json
+
+import pytest
+
+import request_registry as registry
+
+
+@pytest.fixture
+def reg(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "LOCK_DIR", tmp_path / "locks")
+    return registry
+
+
+def _ids(page):
+    return [r["request_id"] for r in page["requests"]]
+
+
+def test_keyset_pages_newest_first(reg):
+    for i in range(7):
+        reg.record(f"r{i}", "plan", status="planned", at=1000.0 + i)
+    pages, cursor = [], None
+    while True:
+        page = reg.list_requests(limit=3, cursor=cursor)
+        pages.append(_ids(page))
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == [["r6", "r5", "r4"], ["r3", "r2", "r1"], ["r0"]]
+
+
+def test_cursor_breaks_created_at_ties_by_id(reg):
+    for rid in ("a", "b", "c", "d"):
+        reg.record(rid, "plan", at=500.0)
+    first = reg.list_requests(limit=2)
+    second = reg.list_requests(limit=2, cursor=first["next_cursor"])
+    assert _ids(first) + _ids(second) == ["d", "c", "b", "a"]
+    assert second["next_cursor"] is None
+
+
+def test_cursor_stable_when_newer_requests_arrive(reg):
+    for i in range(4):
+        reg.record(f"r{i}", "plan", at=100.0 + i)
+    first = reg.list_requests(limit=2)
+    reg.record("newest", "plan", at=999.0)
+    assert _ids(reg.list_requests(limit=2, cursor=first["next_cursor"])) == ["r1", "r0"]
+
+
+def test_filters_and_invalid_cursor(reg):
+    reg.record("p", "plan", status="planned", kind="plan", at=10.0)
+    reg.record("m", "merge", status="merged", at=20.0)
+    assert _ids(reg.list_requests(status="merged")) == ["m"]
+    assert _ids(reg.list_requests(kind="plan")) == ["p"]
+    assert _ids(reg.list_requests(since=15)) == ["m"]
+    with pytest.raises(ValueError):
+        reg.list_requests(cursor="garbage")
+
+
+def test_record_merges_data_and_logs_stages(reg):
+    reg.record("r", "plan", status="planned", data={"a": 1}, at=1.0)
+    reg.record("r", "patch", data={"b": 2}, at=2.0)
+    got = reg.get("r")
+    assert got["status"] == "planned"
+    assert got["data"] == {"a": 1, "b": 2}
+    assert [s["stage"] for s in got["stages"]] == ["plan", "patch"]
+
+
+def test_legacy_import_keeps_live_status(reg, tmp_path):
+    legacy = tmp_path / "requests"
+    legacy.mkdir()
+    (legacy / "live.plan.json").write_text(json.dumps({"request_id": "live", "created": "2024-01-01T00:00:00"}))
+    (legacy / "old.req.json").write_text(json.dumps({"request_id": "old", "instruction": "x"}))
+    reg.record("live", "merge", status="merged")
+
+    res = reg.migrate_legacy(legacy)
+    assert res["imported"] == 2
+    assert reg.get("live")["status"] == "merged"
+    assert reg.get("old")["status"] == "prepared"
+    assert reg.migrate_legacy(legacy)["skipped"] is True
+
+
+def test_legacy_import_is_all_or_nothing(reg, tmp_path, monkeypatch):
+    legacy = tmp_path / "requests"
+    legacy.mkdir()
+    for rid in ("a", "b"):
+        (legacy / f"{rid}.req.json").write_text(json.dumps({"request_id": rid}))
+    calls = []
+    real = reg._record
+
+    def flaky(conn, rid, *args):
+        calls.append(rid)
+        if len(calls) == 2:
+            raise RuntimeError("disk full")
+        return real(conn, rid, *args)
+
+    monkeypatch.setattr(reg, "_record", flaky)
+    with pytest.raises(RuntimeError):
+        reg.migrate_legacy(legacy)
+    assert reg.get("a") is None
+
+    monkeypatch.setattr(reg, "_record", real)
+    assert reg.migrate_legacy(legacy)["imported"] == 2
+    assert [s["stage"] for s in reg.get("a")["stages"]] == ["prepare"]
+
+
+def test_legacy_import_leaves_other_requests_created_at(reg, tmp_path):
+    legacy = tmp_path / "requests"
+    legacy.mkdir()
+    (legacy / "old.req.json").write_text(json.dumps({"request_id": "old"}))
+    reg.record("live", "plan", at=100.0)
+    reg.record("live", "patch", at=50.0)  # a stage logged with an earlier clock
+    reg.migrate_legacy(legacy)
+    assert reg.get("live")["created_at"] == 100.0
@@ -0,0 +1,15 @@
+# tests/test_tools_batch.py
+import threading
+
+from brain import tools_engine
+from brain.tools_engine import ToolSpec, run_tools_batch
+
+
+def test_parallel_calls_run_on_the_tool_pool(monkeypatch):
+    def where(args):
+        return {"ok": True, "thread": threading.current_thread().name, "n": args["n"]}
+
+    monkeypatch.setitem(tools_engine.TOOLS, "where", ToolSpec("where", "", False, where))
+    res = run_tools_batch([{"tool": "where", "args": {"n": i}} for i in range(4)])
+    assert [r["n"] for r in res["results"]] == [0, 1, 2, 3]
+    assert all(r["thread"].startswith("nova-tool") for r in res["results"])
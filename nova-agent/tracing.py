@@ -0,0 +1,263 @@
+# tracing.py
+import os
+import time
+import uuid
+import bisect
+import logging
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Any, List, Optional, Tuple
+
+log = logging.getLogger("nova.tracing")
+
+KEEP_TRACES = int(os.getenv("NOVA_TRACE_KEEP", "200"))
+OTEL_ENDPOINT = os.getenv("NOVA_OTEL_ENDPOINT", "")   # e.g. http://127.0.0.1:4318/v1/traces
+
+# seconds; wide enough for 40 s builder runs and slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+# ---------- Prometheus histograms ----------
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...],
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> [bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            s[0][i] += 1
+            s[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: (list(v[0]), v[1]) for k, v in self._series.items()}
+        for key, (counts, total) in sorted(series.items()):
+            base = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key))
+            sep = "," if base else ""
+            acc = 0
+            for b, c in zip(self.buckets, counts):
+                acc += c
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{b}"}} {acc}')
+            acc += counts[-1]
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {acc}')
+            lines.append(f"{self.name}_sum{{{base}}} {total}")
+            lines.append(f"{self.name}_count{{{base}}} {acc}")
+        return lines
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+HTTP_DURATION = Histogram(
+    "nova_http_request_duration_seconds",
+    "HTTP request latency by route template and status code.",
+    ("method", "route", "status"),
+)
+SPAN_DURATION = Histogram(
+    "nova_span_duration_seconds",
+    "Duration of traced internal stages (intent, LLM calls, backup, env, sandbox, merge...).",
+    ("span", "status", "provider"),
+)
+
+# other modules may add their own collectors (callables returning lines)
+_collectors: List[Any] = []
+
+
+def register_collector(fn):
+    """fn() -> list of Prometheus text lines, appended to /metrics."""
+    _collectors.append(fn)
+    return fn
+
+
+def render_metrics() -> str:
+    lines = HTTP_DURATION.render() + SPAN_DURATION.render()
+    for fn in _collectors:
+        try:
+            lines.extend(fn())
+        except Exception as e:  # a broken collector must not break /metrics
+            log.warning(f"[TRACING] collector {fn} failed: {e}")
+    return "\n".join(lines) + "\n"
+
+
+# ---------- optional OpenTelemetry export ----------
+
+_otel_tracer = None
+if OTEL_ENDPOINT:
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        _provider = TracerProvider(resource=Resource.create({"service.name": "nova-agent"}))
+        _provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=OTEL_ENDPOINT)))
+        _otel_tracer = _provider.get_tracer("nova")
+    except ImportError:
+        log.warning("[TRACING] NOVA_OTEL_ENDPOINT is set but opentelemetry-sdk / "
+                    "opentelemetry-exporter-otlp-proto-http are not installed; OTel export disabled")
+
+
+# ---------- traces / spans ----------
+
+class Trace:
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.started_at = time.time()
+        self.t0 = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+        self.duration_ms: Optional[float] = None
+        self.status: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            spans = list(self.spans)
+        return {
+            "trace_id": self.id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "spans": sorted(spans, key=lambda s: s["start_ms"]),
+        }
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("nova_trace", default=None)
+_current_span: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("nova_span", default=None)
+_recent: deque = deque(maxlen=KEEP_TRACES)
+_recent_lock = threading.Lock()
+
+
+def start_trace(name: str) -> Tuple[Trace, Any]:
+    t = Trace(name)
+    return t, _current_trace.set(t)
+
+
+def end_trace(t: Trace, token, status: Optional[int] = None):
+    t.duration_ms = round((time.perf_counter() - t.t0) * 1000, 2)
+    t.status = status
+    _current_trace.reset(token)
+    with _recent_lock:
+        _recent.append(t)
+
+
+def current_trace_id() -> Optional[str]:
+    t = _current_trace.get()
+    return t.id if t else None
+
+
+@contextmanager
+def span(name: str, provider: str = "", **attrs):
+    """
+    Time a block. Always feeds the nova_span_duration_seconds histogram;
+    inside a traced request the span is also recorded on the trace (with
+    its parent, so /traces/{id} shows the tree), and exported to
+    OpenTelemetry when NOVA_OTEL_ENDPOINT is configured.
+    """
+    t = _current_trace.get()
+    span_id = uuid.uuid4().hex[:8]
+    parent = _current_span.get()
+    token = _current_span.set(span_id)
+    status = "ok"
+    start = time.perf_counter()
+    otel_cm = _otel_tracer.start_as_current_span(name) if _otel_tracer else None
+    otel_span = otel_cm.__enter__() if otel_cm else None
+    try:
+        yield attrs
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        end = time.perf_counter()
+        _current_span.reset(token)
+        SPAN_DURATION.observe(end - start, span=name, status=status, provider=provider)
+        if t is not None:
+            rec = {
+                "span_id": span_id,
+                "parent_id": parent,
+                "name": name,
+                "start_ms": round((start - t.t0) * 1000, 2),
+                "duration_ms": round((end - start) * 1000, 2),
+                "status": status,
+                "thread": threading.current_thread().name,
+            }
+            if provider:
+                rec["provider"] = provider
+            if attrs:
+                rec["attrs"] = {k: v for k, v in attrs.items() if isinstance(v, (str, int, float, bool))}
+            with t.lock:
+                t.spans.append(rec)
+        if otel_span is not None:
+            for k, v in attrs.items():
+                if isinstance(v, (str, int, float, bool)):
+                    otel_span.set_attribute(k, v)
+            if provider:
+                otel_span.set_attribute("llm.provider", provider)
+            otel_cm.__exit__(None, None, None)
+
+
+def traced(name: str):
+    """Decorator form of span()."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def list_traces(limit: int = 50, min_ms: float = 0) -> List[Dict[str, Any]]:
+    with _recent_lock:
+        traces = list(_recent)
+    out = []
+    for t in reversed(traces):
+        if (t.duration_ms or 0) < min_ms:
+            continue
+        d = t.to_dict()
+        d["span_count"] = len(d.pop("spans"))
+        out.append(d)
+        if len(out) >= limit:
+            break
+    return out
+
+
+def get_trace(trace_id: str) -> Optional[Dict[str, Any]]:
+    with _recent_lock:
+        for t in _recent:
+            if t.id == trace_id:
+                return t.to_dict()
+    return None
+
+
+def server_timing(t: Trace, limit: int = 12) -> str:
+    """Server-Timing header value: the slowest top-level spans of the trace."""
+    with t.lock:
+        top = [s for s in t.spans if s["parent_id"] is None]
+    top.sort(key=lambda s: s["duration_ms"], reverse=True)
+    parts = []
+    for s in top[:limit]:
+        token = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in s["name"])
+        part = f"{token};dur={s['duration_ms']}"
+        if token != s["name"]:
+            part += f';desc="{s["name"]}"'
+        parts.append(part)
+    return ", ".join(parts)
@@ -0,0 +1,297 @@
+# workspace_lifecycle.py
+import os
+import json
+import time
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from workspace_manager import SKIP_DIRS
+import deletion_service
+from file_locks import FileLock, LockTimeout, LOCK_DIR, request_lock
+
+BASE = Path(__file__).resolve().parent
+WORKSPACE_ROOT = BASE / "workspace"
+WORKSPACE_META = BASE / "workspace_meta"
+INDEX_PATH = WORKSPACE_META / "index.json"
+
+# ---- Policy (env) ----
+TTL_HOURS = float(os.getenv("NOVA_WORKSPACE_TTL_HOURS", "72"))
+QUOTA_MB = float(os.getenv("NOVA_WORKSPACE_QUOTA_MB", "2048"))
+JANITOR_INTERVAL_S = int(os.getenv("NOVA_WORKSPACE_JANITOR_S", "600"))
+# workspaces used this recently are never evicted by the quota pass
+MIN_IDLE_S = int(os.getenv("NOVA_WORKSPACE_MIN_IDLE_S", "300"))
+
+_lock = threading.RLock()
+_index: Optional[Dict[str, Dict[str, Any]]] = None
+_index_mtime: Optional[int] = None
+# the index is shared by all server workers: every read-modify-write holds this too
+_file_lock = FileLock(LOCK_DIR / "workspace_index.lock")
+
+
+# ---------- index persistence ----------
+
+def _mtime() -> Optional[int]:
+    try:
+        return INDEX_PATH.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+@contextmanager
+def _locked():
+    """Thread + inter-process lock around the index; reloads it if another worker saved it."""
+    global _index
+    with _lock, _file_lock:
+        if _index is not None and _mtime() != _index_mtime:
+            _index = None
+        yield
+
+
+def _load() -> Dict[str, Dict[str, Any]]:
+    global _index, _index_mtime
+    if _index is None:
+        _index = {}
+        _index_mtime = _mtime()
+        if INDEX_PATH.exists():
+            try:
+                _index = json.load(open(INDEX_PATH, "r", encoding="utf-8"))
+            except Exception:
+                _index = {}
+    return _index
+
+
+def _save():
+    global _index_mtime
+    WORKSPACE_META.mkdir(parents=True, exist_ok=True)
+    tmp = INDEX_PATH.with_suffix(f".tmp_{uuid.uuid4().hex[:6]}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(_index, f, indent=2)
+    os.replace(tmp, INDEX_PATH)
+    _index_mtime = _mtime()
+
+
+def _entry(idx: Dict[str, Dict[str, Any]], request_id: str) -> Dict[str, Any]:
+    now = time.time()
+    e = idx.get(request_id)
+    if e is None:
+        e = idx[request_id] = {
+            "request_id": request_id,
+            "created": now,
+            "last_access": now,
+            "size_bytes": 0,
+            "disk_bytes": 0,
+            "files": 0,
+        }
+    return e
+
+
+def _measure(ws: Path) -> Dict[str, int]:
+    size = disk = files = 0
+    for root, dirs, names in os.walk(ws):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for n in names:
+            try:
+                st = os.stat(os.path.join(root, n))
+            except OSError:
+                continue
+            files += 1
+            size += st.st_size
+            if st.st_nlink <= 1:
+                disk += st.st_size
+    return {"size_bytes": size, "disk_bytes": disk, "files": files}
+
+
+# ---------- public API ----------
+
+def touch(request_id: str,
+          size_delta: int = 0,
+          disk_delta: int = 0,
+          files_delta: int = 0):
+    """Mark a workspace as used now and apply any size change we know of."""
+    with _locked():
+        idx = _load()
+        e = _entry(idx, request_id)
+        e["last_access"] = time.time()
+        e["size_bytes"] = max(0, e["size_bytes"] + size_delta)
+        e["disk_bytes"] = max(0, e["disk_bytes"] + disk_delta)
+        e["files"] = max(0, e["files"] + files_delta)
+        _save()
+
+
+def record_provision(request_id: str, stats: Dict[str, Any]):
+    """
+    Account for a freshly seeded workspace. Reflinked/hardlinked files
+    share storage with integrated/, so only copied bytes count as disk use.
+    """
+    touch(
+        request_id,
+        size_delta=stats.get("bytes", 0),
+        disk_delta=stats.get("bytes_copied", 0),
+        files_delta=stats.get("files", 0),
+    )
+
+
+def forget(request_id: str):
+    """Drop a workspace from the index (its folder was removed elsewhere)."""
+    with _locked():
+        idx = _load()
+        if idx.pop(request_id, None) is not None:
+            _save()
+    (WORKSPACE_META / f"{request_id}.hashes.json").unlink(missing_ok=True)
+    (WORKSPACE_META / f"{request_id}.base.json").unlink(missing_ok=True)
+
+
+def reconcile() -> int:
+    """
+    Add workspaces that exist on disk but not in the index (created before
+    the index existed, or by hand). Only those folders are walked once.
+    Also drops index entries whose folder is gone. Returns #entries changed.
+    """
+    changed = 0
+    with _locked():
+        idx = _load()
+        on_disk = set()
+        if WORKSPACE_ROOT.exists():
+            with os.scandir(WORKSPACE_ROOT) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        on_disk.add(entry.name)
+
+        for rid in on_disk - set(idx):
+            ws = WORKSPACE_ROOT / rid
+            e = _entry(idx, rid)
+            e.update(_measure(ws))
+            e["created"] = e["last_access"] = ws.stat().st_mtime
+            changed += 1
+
+        for rid in set(idx) - on_disk:
+            idx.pop(rid, None)
+            changed += 1
+
+        if changed:
+            _save()
+    return changed
+
+
+def list_workspaces() -> List[Dict[str, Any]]:
+    """Index-backed listing (no directory walk), most recently used first."""
+    now = time.time()
+    with _locked():
+        entries = [dict(e) for e in _load().values()]
+    for e in entries:
+        e["age_s"] = int(now - e["created"])
+        e["idle_s"] = int(now - e["last_access"])
+        e["workspace"] = str(WORKSPACE_ROOT / e["request_id"])
+    entries.sort(key=lambda e: e["last_access"], reverse=True)
+    return entries
+
+
+def _remove(request_id: str):
+    ws = WORKSPACE_ROOT / request_id
+    if ws.exists():
+        deletion_service.schedule(ws, label=f"evict:{request_id}")
+    (WORKSPACE_META / f"{request_id}.hashes.json").unlink(missing_ok=True)
+    (WORKSPACE_META / f"{request_id}.base.json").unlink(missing_ok=True)
+
+
+def _busy(request_id: str) -> bool:
+    """Whether another operation (in any worker) holds the request's lock right now."""
+    try:
+        with request_lock(request_id, timeout=0):
+            return False
+    except LockTimeout:
+        return True
+
+
+def evict(dry_run: bool = False,
+          ttl_hours: Optional[float] = None,
+          quota_mb: Optional[float] = None) -> Dict[str, Any]:
+    """
+    1) drop workspaces idle for longer than the TTL
+    2) if the total disk use is still above the quota, drop least recently
+       used workspaces (never ones used in the last MIN_IDLE_S seconds)
+    Workspaces with an operation in flight (request lock held) are skipped.
+    """
+    ttl_s = (TTL_HOURS if ttl_hours is None else ttl_hours) * 3600
+    quota = int((QUOTA_MB if quota_mb is None else quota_mb) * 1024 * 1024)
+    now = time.time()
+    evicted = []
+
+    with _locked():
+        idx = _load()
+        lru = sorted(idx.values(), key=lambda e: e["last_access"])
+        busy = {e["request_id"] for e in lru if _busy(e["request_id"])}
+
+        for e in list(lru):
+            if e["request_id"] in busy:
+                continue
+            if ttl_s > 0 and now - e["last_access"] > ttl_s:
+                evicted.append({"request_id": e["request_id"], "reason": "ttl",
+                                "disk_bytes": e["disk_bytes"]})
+                lru.remove(e)
+
+        total = sum(e["disk_bytes"] for e in lru)
+        for e in list(lru):
+            if quota <= 0 or total <= quota:
+                break
+            if now - e["last_access"] < MIN_IDLE_S or e["request_id"] in busy:
+                continue
+            evicted.append({"request_id": e["request_id"], "reason": "quota",
+                            "disk_bytes": e["disk_bytes"]})
+            total -= e["disk_bytes"]
+            lru.remove(e)
+
+        if not dry_run:
+            for ev in evicted:
+                idx.pop(ev["request_id"], None)
+            if evicted:
+                _save()
+
+    if not dry_run:
+        for ev in evicted:
+            _remove(ev["request_id"])
+
+    return {
+        "dry_run": dry_run,
+        "evicted": evicted,
+        "reclaimed_bytes": sum(ev["disk_bytes"] for ev in evicted),
+        "remaining_disk_bytes": total,
+        "quota_bytes": quota,
+    }
+
+
+# ---------- background janitor ----------
+
+_janitor: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+def _janitor_loop(interval: int):
+    while not _stop.wait(interval):
+        try:
+            evict()
+        except Exception:
+            pass
+
+
+def start_janitor(interval: Optional[int] = None):
+    """Reconcile once, then run evict() every `interval` seconds."""
+    global _janitor
+    reconcile()
+    if _janitor is not None and _janitor.is_alive():
+        return
+    _stop.clear()
+    _janitor = threading.Thread(
+        target=_janitor_loop,
+        args=(interval or JANITOR_INTERVAL_S,),
+        name="nova-workspace-janitor",
+        daemon=True,
+    )
+    _janitor.start()
+
+
+def stop_janitor():
+    _stop.set()
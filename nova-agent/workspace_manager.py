@@ -0,0 +1,370 @@
+# workspace_manager.py
+import os
+import sys
+import errno
+import json
+import time
+import shutil
+import uuid
+import filecmp
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import fcntl  # not available on Windows
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+BASE = Path(__file__).resolve().parent
+WORKSPACE_ROOT = BASE / "workspace"
+INTEGRATED_ROOT = BASE / "integrated"
+WORKSPACE_META = BASE / "workspace_meta"
+
+# ioctl number for FICLONE (linux/fs.h): share extents between two files
+FICLONE = 0x40049409
+
+# auto (reflink, else copy) | reflink | hardlink | copy | none
+# hardlink is opt-in: workspace files share inodes with integrated/, so
+# anything that runs in a workspace first gets private copies (detach_tree)
+PROVISION_MODE = os.getenv("NOVA_WORKSPACE_PROVISION", "auto").strip().lower()
+
+# never seeded into a workspace
+SKIP_DIRS = {"__pycache__", ".git", ".pytest_cache", ".mypy_cache"}
+SKIP_PREFIXES = (".nova_restore_tmp_",)
+
+
+class MergeConflict(Exception):
+    """integrated/ changed since provisioning in a file the workspace also changed."""
+
+    def __init__(self, conflicts: List[Dict[str, str]]):
+        super().__init__(f"{len(conflicts)} file(s) changed in both the workspace and integrated/")
+        self.conflicts = conflicts
+
+
+# ---------- low-level clone strategies ----------
+
+def _reflink(src: Path, dst: Path):
+    """
+    Copy-on-write clone: the new file shares data blocks with src until
+    one of them is written (btrfs, XFS with reflink=1, bcachefs, ...).
+    """
+    if fcntl is None or not sys.platform.startswith("linux"):
+        raise OSError(errno.EOPNOTSUPP, "reflink not supported on this platform")
+
+    with open(src, "rb") as fs, open(dst, "wb") as fd:
+        try:
+            fcntl.ioctl(fd.fileno(), FICLONE, fs.fileno())
+        except OSError:
+            fd.close()
+            dst.unlink(missing_ok=True)
+            raise
+    shutil.copystat(src, dst)
+
+
+def _hardlink(src: Path, dst: Path):
+    os.link(src, dst)
+
+
+def _copy(src: Path, dst: Path):
+    shutil.copy2(src, dst)
+
+
+STRATEGIES = {
+    "reflink": _reflink,
+    "hardlink": _hardlink,
+    "copy": _copy,
+}
+
+
+# errnos that mean "this filesystem can't do that", not "this file failed":
+# the strategy is dropped for the rest of the walk and copy takes over
+UNSUPPORTED_ERRNOS = {
+    "reflink": {errno.EOPNOTSUPP, errno.EXDEV, errno.EINVAL},
+    "hardlink": {errno.EOPNOTSUPP, errno.EXDEV, errno.EPERM, errno.EMLINK},
+}
+
+
+def _strategy_chain(mode: str) -> list:
+    if mode == "reflink":
+        return ["reflink", "copy"]
+    if mode == "hardlink":
+        return ["hardlink", "copy"]
+    if mode == "copy":
+        return ["copy"]
+    return ["reflink", "copy"]
+
+
+# ---------- break-on-write for hardlinked files ----------
+
+def detach_file(path: Path) -> bool:
+    """
+    If `path` shares its inode with another file (hardlink provisioning),
+    replace it with a private copy so a following write cannot leak into
+    integrated/. Returns True when a copy was made.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+
+    if st.st_nlink <= 1:
+        return False
+
+    tmp = path.with_name(f".{path.name}.nova_detach_{uuid.uuid4().hex[:6]}")
+    shutil.copy2(path, tmp)
+    os.replace(tmp, path)
+    return True
+
+
+def detach_tree(root: Path) -> int:
+    """
+    detach_file every hardlinked file under `root`. Run before a process
+    or test run that may write in a workspace, since those writes can't
+    be intercepted per file. A no-op unless hardlink provisioning is on.
+    Returns the number of files copied.
+    """
+    if PROVISION_MODE != "hardlink":
+        return 0
+    n = 0
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for f in files:
+            n += detach_file(Path(dirpath) / f)
+    return n
+
+
+def write_text(path: Path, content: str):
+    """
+    Write a workspace file without touching a hardlinked original.
+    Writes go to a temp file in the same folder, then replace the target.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.nova_tmp_{uuid.uuid4().hex[:6]}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+# ---------- provisioning ----------
+
+def provision_workspace(request_id: str,
+                        source: Optional[Path] = None,
+                        mode: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Create workspace/<request_id> and seed it from integrated/.
+
+    Each file is cloned with the cheapest strategy the filesystem supports:
+    reflink (FICLONE) -> copy. Reflinks are metadata-only, so provisioning
+    cost depends on the number of files rather than their size. Hardlinks
+    (mode="hardlink") are just as cheap but shared with integrated/:
+    writes must go through write_text or follow detach_tree.
+
+    Files that already exist in the workspace are left alone (re-used
+    request_id keeps its edits).
+    """
+    source = Path(source) if source else INTEGRATED_ROOT
+    mode = (mode or PROVISION_MODE or "auto").lower()
+    ws = WORKSPACE_ROOT / request_id
+    ws.mkdir(parents=True, exist_ok=True)
+    # rel -> [size, mtime_ns] of the integrated/ file each workspace file was seeded from
+    base = load_base(request_id) or {}
+
+    stats = {
+        "workspace": str(ws),
+        "source": str(source),
+        "mode": mode,
+        "files": 0,
+        "dirs": 0,
+        "bytes": 0,
+        "bytes_copied": 0,
+        "skipped_existing": 0,
+        "by_strategy": {"reflink": 0, "hardlink": 0, "copy": 0},
+        "errors": [],
+    }
+
+    if mode == "none" or not source.exists():
+        stats["duration_ms"] = 0
+        return stats
+
+    start = time.perf_counter()
+    chain = _strategy_chain(mode)
+    stack = [(source, ws)]
+
+    while stack:
+        src_dir, dst_dir = stack.pop()
+        with os.scandir(src_dir) as it:
+            for entry in it:
+                name = entry.name
+                if name in SKIP_DIRS or name.startswith(SKIP_PREFIXES):
+                    continue
+
+                dst = dst_dir / name
+                if entry.is_dir(follow_symlinks=False):
+                    dst.mkdir(exist_ok=True)
+                    stats["dirs"] += 1
+                    stack.append((Path(entry.path), dst))
+                    continue
+
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                if dst.exists():
+                    stats["skipped_existing"] += 1
+                    continue
+
+                src = Path(entry.path)
+                for strategy in list(chain):
+                    try:
+                        STRATEGIES[strategy](src, dst)
+                    except OSError as e:
+                        if e.errno not in UNSUPPORTED_ERRNOS.get(strategy, ()):
+                            stats["errors"].append(f"{src}: {e}")
+                            break
+                        # filesystem-level capability: don't retry it per file
+                        chain.remove(strategy)
+                        continue
+                    st = entry.stat(follow_symlinks=False)
+                    size = st.st_size
+                    base[dst.relative_to(ws).as_posix()] = [st.st_size, st.st_mtime_ns]
+                    stats["by_strategy"][strategy] += 1
+                    stats["files"] += 1
+                    stats["bytes"] += size
+                    if strategy == "copy":
+                        stats["bytes_copied"] += size
+                    break
+
+    save_base(request_id, base)
+    stats["duration_ms"] = int((time.perf_counter() - start) * 1000)
+    return stats
+
+
+# ---------- merge back into integrated/ ----------
+
+def _base_path(request_id: str) -> Path:
+    return WORKSPACE_META / f"{request_id}.base.json"
+
+
+def load_base(request_id: str) -> Optional[Dict[str, List[int]]]:
+    """
+    {rel: [size, mtime_ns]} of the integrated/ files a workspace was seeded
+    from, or None for a workspace that was never seeded (seed=false, or
+    provisioned before the manifest existed).
+    """
+    try:
+        return json.load(open(_base_path(request_id), "r", encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def save_base(request_id: str, base: Dict[str, List[int]]):
+    WORKSPACE_META.mkdir(parents=True, exist_ok=True)
+    p = _base_path(request_id)
+    tmp = p.with_suffix(f".tmp_{uuid.uuid4().hex[:6]}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(base, f)
+    os.replace(tmp, p)
+
+
+def _stat(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _workspace_files(ws: Path) -> Dict[str, Path]:
+    out = {}
+    for root, dirs, files in os.walk(ws):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for f in files:
+            # staging / detach / write temp files of an operation in flight
+            if f.startswith(".") and ".nova_" in f:
+                continue
+            full = Path(root) / f
+            out[full.relative_to(ws).as_posix()] = full
+    return out
+
+
+def plan_merge(request_id: str, dest: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    What merging workspace/<request_id> into `dest` (integrated/) would do,
+    judged against the provisioning manifest (load_base):
+
+      - files the workspace never changed are left alone, even if dest has
+        moved on since (another merge, a restore)
+      - changed or new files are copied, deleted files are deleted, as
+        long as dest still holds what the workspace was seeded from
+      - if dest changed too, the file is a conflict, unless both sides
+        now have the same content
+
+    A workspace without a manifest (never seeded) copies every file whose
+    content differs from dest, as merge always did, and deletes nothing.
+    """
+    dest = Path(dest) if dest else INTEGRATED_ROOT
+    ws = WORKSPACE_ROOT / request_id
+    base = load_base(request_id)
+    current = _workspace_files(ws)
+    copies: List[str] = []
+    deletes: List[str] = []
+    conflicts: List[Dict[str, str]] = []
+
+    for rel in sorted(set(current) | set(base or ())):
+        src = current.get(rel)
+        seeded = tuple(base[rel]) if base and rel in base else None
+        if seeded is not None and src is not None and _stat(src) == seeded:
+            continue  # untouched in the workspace
+        target = dest / rel
+        now = _stat(target)
+
+        if src is None:
+            if now is None:
+                continue
+            if now == seeded:
+                deletes.append(rel)
+            else:
+                conflicts.append({"path": rel, "reason": "deleted in the workspace, changed in integrated/"})
+            continue
+
+        if now is not None and filecmp.cmp(src, target, shallow=False):
+            continue  # already the same
+        if base is None or now == seeded:
+            copies.append(rel)
+        elif seeded is None:
+            conflicts.append({"path": rel, "reason": "added in the workspace and in integrated/"})
+        else:
+            conflicts.append({"path": rel, "reason": "changed in the workspace and in integrated/"})
+
+    return {"copy": copies, "delete": deletes, "conflicts": conflicts}
+
+
+def merge_workspace(request_id: str, dest: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Apply plan_merge. Raises MergeConflict (nothing written) if any file
+    conflicts. Callers hold the integrated/ lock (file_locks.integrated_lock)
+    so two merges never interleave. Files are swapped in with os.replace,
+    which also keeps hardlinked workspaces from seeing the write.
+    """
+    dest = Path(dest) if dest else INTEGRATED_ROOT
+    ws = WORKSPACE_ROOT / request_id
+    plan = plan_merge(request_id, dest)
+    if plan["conflicts"]:
+        raise MergeConflict(plan["conflicts"])
+
+    base = load_base(request_id)
+    for rel in plan["copy"]:
+        target = dest / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.nova_merge_{uuid.uuid4().hex[:6]}")
+        shutil.copy2(ws / rel, tmp)
+        os.replace(tmp, target)
+        if base is not None:
+            base[rel] = list(_stat(target))
+    for rel in plan["delete"]:
+        (dest / rel).unlink(missing_ok=True)
+        if base is not None:
+            base.pop(rel, None)
+    # what was merged is the new baseline: later edits are judged against it
+    if base is not None:
+        save_base(request_id, base)
+    return {"copied": plan["copy"], "deleted": plan["delete"]}